@@ -8,6 +8,11 @@ from alembic import context
 from app.db.base import Base
 from app.db.models.molecule import Molecule
 from app.db.models.parent_molecule import ParentMolecule
+from app.db.models.cluster_run import ClusterRun, ClusterCentroid, ClusterMember
+from app.db.models.molecule_synonym import MoleculeSynonym
+from app.db.models.standardization_cache import StandardizationCacheEntry
+from app.db.models.molecule_fingerprint import MoleculeFingerprint
+from app.db.models.near_duplicate import NearDuplicateRun, NearDuplicate
 
 import os
 
@@ -0,0 +1,36 @@
+"""standardization cache
+
+Revision ID: 2f8c4a6e0b93
+Revises: d7e3b5a19f04
+Create Date: 2026-10-18 13:02:41.617390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f8c4a6e0b93'
+down_revision: Union[str, None] = 'd7e3b5a19f04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('standardization_cache',
+    sa.Column('key', sa.String(length=40), nullable=False),
+    sa.Column('pipeline_version', sa.String(length=16), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key', 'pipeline_version')
+    )
+    op.create_index(op.f('ix_standardization_cache_pipeline_version'), 'standardization_cache', ['pipeline_version'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_standardization_cache_pipeline_version'), table_name='standardization_cache')
+    op.drop_table('standardization_cache')
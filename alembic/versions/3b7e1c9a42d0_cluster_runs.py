@@ -0,0 +1,72 @@
+"""cluster runs
+
+Revision ID: 3b7e1c9a42d0
+Revises: 6acae52c0ea4
+Create Date: 2026-10-18 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e1c9a42d0'
+down_revision: Union[str, None] = '6acae52c0ea4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('cluster_runs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('cutoff', sa.Float(), nullable=False),
+    sa.Column('n_clusters', sa.Integer(), nullable=True),
+    sa.Column('n_members', sa.Integer(), nullable=True),
+    sa.Column('_created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('_updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('_deleted_at', sa.DateTime(), nullable=True),
+    sa.Column('_created_by', sa.UUID(), nullable=True),
+    sa.Column('_updated_by', sa.UUID(), nullable=True),
+    sa.Column('_deleted_by', sa.UUID(), nullable=True),
+    sa.Column('_is_deleted', sa.Boolean(), nullable=True),
+    sa.Column('_status', sa.String(), nullable=True),
+    sa.Column('_version', sa.Integer(), nullable=True),
+    sa.Column('_owner_id', sa.UUID(), nullable=True),
+    sa.Column('_tenant_id', sa.UUID(), nullable=True),
+    sa.Column('_tags', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_cluster_runs_id'), 'cluster_runs', ['id'], unique=True)
+    op.create_index(op.f('ix_cluster_runs_name'), 'cluster_runs', ['name'], unique=True)
+    op.create_table('cluster_centroids',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('run_id', sa.UUID(), nullable=False),
+    sa.Column('cluster', sa.Integer(), nullable=False),
+    sa.Column('molecule_id', sa.UUID(), nullable=False),
+    sa.Column('fingerprint', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['molecule_id'], ['molecules.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['run_id'], ['cluster_runs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('run_id', 'cluster')
+    )
+    op.create_table('cluster_members',
+    sa.Column('run_id', sa.UUID(), nullable=False),
+    sa.Column('molecule_id', sa.UUID(), nullable=False),
+    sa.Column('cluster', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['molecule_id'], ['molecules.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['run_id'], ['cluster_runs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('run_id', 'molecule_id')
+    )
+    op.create_index('ix_cluster_members_run_id_cluster', 'cluster_members', ['run_id', 'cluster'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cluster_members_run_id_cluster', table_name='cluster_members')
+    op.drop_table('cluster_members')
+    op.drop_table('cluster_centroids')
+    op.drop_index(op.f('ix_cluster_runs_name'), table_name='cluster_runs')
+    op.drop_index(op.f('ix_cluster_runs_id'), table_name='cluster_runs')
+    op.drop_table('cluster_runs')
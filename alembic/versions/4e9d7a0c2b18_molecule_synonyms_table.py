@@ -0,0 +1,73 @@
+"""molecule synonyms table
+
+Revision ID: 4e9d7a0c2b18
+Revises: c5f0a83b1d6e
+Create Date: 2026-10-18 11:27:45.903311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e9d7a0c2b18'
+down_revision: Union[str, None] = 'c5f0a83b1d6e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('molecule_synonyms',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('molecule_id', sa.UUID(), nullable=False),
+    sa.Column('name_normalized', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['molecule_id'], ['molecules.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('molecule_id', 'name_normalized')
+    )
+    op.create_index(op.f('ix_molecule_synonyms_molecule_id'), 'molecule_synonyms', ['molecule_id'], unique=False)
+    op.create_index('ix_molecule_synonyms_name_normalized', 'molecule_synonyms', ['name_normalized'], unique=False, postgresql_ops={'name_normalized': 'text_pattern_ops'})
+    op.create_index('ix_molecule_synonyms_name_normalized_trgm', 'molecule_synonyms', ['name_normalized'], unique=False, postgresql_using='gin', postgresql_ops={'name_normalized': 'gin_trgm_ops'})
+
+    # Split the comma-joined strings (registered with both ',' and ', ') into rows
+    op.execute(
+        r"""
+        INSERT INTO molecule_synonyms (molecule_id, name_normalized, name)
+        SELECT m.id,
+               lower(regexp_replace(btrim(s.name), '\s+', ' ', 'g')),
+               min(btrim(s.name))
+        FROM molecules m,
+             unnest(string_to_array(m.synonyms, ',')) AS s(name)
+        WHERE m.synonyms IS NOT NULL AND btrim(s.name) <> ''
+        GROUP BY m.id, lower(regexp_replace(btrim(s.name), '\s+', ' ', 'g'))
+        """
+    )
+
+    op.drop_index('ix_molecules_synonyms_trgm', table_name='molecules')
+    op.drop_index(op.f('ix_molecules_synonyms'), table_name='molecules')
+    op.drop_column('molecules', 'synonyms')
+
+
+def downgrade() -> None:
+    op.add_column('molecules', sa.Column('synonyms', sa.String(), nullable=True))
+    op.execute(
+        """
+        UPDATE molecules m
+        SET synonyms = s.synonyms
+        FROM (
+            SELECT molecule_id, string_agg(name, ', ' ORDER BY name) AS synonyms
+            FROM molecule_synonyms
+            GROUP BY molecule_id
+        ) s
+        WHERE s.molecule_id = m.id
+        """
+    )
+    op.create_index(op.f('ix_molecules_synonyms'), 'molecules', ['synonyms'], unique=False)
+    op.create_index('ix_molecules_synonyms_trgm', 'molecules', ['synonyms'], unique=False, postgresql_using='gin', postgresql_ops={'synonyms': 'gin_trgm_ops'})
+    op.drop_index('ix_molecule_synonyms_name_normalized_trgm', table_name='molecule_synonyms')
+    op.drop_index('ix_molecule_synonyms_name_normalized', table_name='molecule_synonyms')
+    op.drop_index(op.f('ix_molecule_synonyms_molecule_id'), table_name='molecule_synonyms')
+    op.drop_table('molecule_synonyms')
@@ -0,0 +1,42 @@
+"""molecule fingerprints
+
+Revision ID: 5b1e9d7c3a26
+Revises: 2f8c4a6e0b93
+Create Date: 2026-10-18 13:41:09.284613
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import app
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e9d7c3a26'
+down_revision: Union[str, None] = '2f8c4a6e0b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Side-table fingerprints registered when this revision was written; later definitions
+# get their index from the backfill job
+FINGERPRINT_NAMES = ['fcfp6', 'morgan_count', 'atompair', 'torsion']
+
+
+def upgrade() -> None:
+    op.create_table('molecule_fingerprints',
+    sa.Column('molecule_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('fp_name', sa.String(), nullable=False),
+    sa.Column('fp', app.db.models.molecule.BfpType(), nullable=False),
+    sa.ForeignKeyConstraint(['molecule_id'], ['molecules.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('molecule_id', 'fp_name')
+    )
+    for name in FINGERPRINT_NAMES:
+        op.create_index(f'ix_molecule_fingerprints_{name}', 'molecule_fingerprints', ['fp'], unique=False, postgresql_using='gist', postgresql_where=sa.text(f"fp_name = '{name}'"))
+
+
+def downgrade() -> None:
+    for name in FINGERPRINT_NAMES:
+        op.drop_index(f'ix_molecule_fingerprints_{name}', table_name='molecule_fingerprints', postgresql_using='gist', postgresql_where=sa.text(f"fp_name = '{name}'"))
+    op.drop_table('molecule_fingerprints')
@@ -0,0 +1,67 @@
+"""near duplicates
+
+Revision ID: 7d2b9f4e6a15
+Revises: e4a8c2d6f1b7
+Create Date: 2026-10-18 15:06:42.118374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2b9f4e6a15'
+down_revision: Union[str, None] = 'e4a8c2d6f1b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('near_duplicate_runs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('threshold', sa.Float(), nullable=False),
+    sa.Column('state', sa.String(), nullable=False),
+    sa.Column('n_molecules', sa.Integer(), nullable=True),
+    sa.Column('total_blocks', sa.Integer(), nullable=True),
+    sa.Column('processed_blocks', sa.Integer(), nullable=True),
+    sa.Column('n_pairs', sa.Integer(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('_created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('_updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('_deleted_at', sa.DateTime(), nullable=True),
+    sa.Column('_created_by', sa.UUID(), nullable=True),
+    sa.Column('_updated_by', sa.UUID(), nullable=True),
+    sa.Column('_deleted_by', sa.UUID(), nullable=True),
+    sa.Column('_is_deleted', sa.Boolean(), nullable=True),
+    sa.Column('_status', sa.String(), nullable=True),
+    sa.Column('_version', sa.Integer(), nullable=True),
+    sa.Column('_owner_id', sa.UUID(), nullable=True),
+    sa.Column('_tenant_id', sa.UUID(), nullable=True),
+    sa.Column('_tags', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_near_duplicate_runs_id'), 'near_duplicate_runs', ['id'], unique=True)
+    op.create_table('near_duplicates',
+    sa.Column('run_id', sa.UUID(), nullable=False),
+    sa.Column('molecule_id_a', sa.UUID(), nullable=False),
+    sa.Column('molecule_id_b', sa.UUID(), nullable=False),
+    sa.Column('similarity', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['molecule_id_a'], ['molecules.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['molecule_id_b'], ['molecules.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['run_id'], ['near_duplicate_runs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('run_id', 'molecule_id_a', 'molecule_id_b')
+    )
+    op.create_index('ix_near_duplicates_molecule_id_b', 'near_duplicates', ['molecule_id_b'], unique=False)
+    op.create_index('ix_near_duplicates_run_id_similarity', 'near_duplicates', ['run_id', 'similarity'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_near_duplicates_run_id_similarity', table_name='near_duplicates')
+    op.drop_index('ix_near_duplicates_molecule_id_b', table_name='near_duplicates')
+    op.drop_table('near_duplicates')
+    op.drop_index(op.f('ix_near_duplicate_runs_id'), table_name='near_duplicate_runs')
+    op.drop_table('near_duplicate_runs')
@@ -0,0 +1,36 @@
+"""murcko scaffolds
+
+Revision ID: 8c41d2e7f5a9
+Revises: 3b7e1c9a42d0
+Create Date: 2026-10-18 10:03:54.118206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41d2e7f5a9'
+down_revision: Union[str, None] = '3b7e1c9a42d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('molecules', 'parent_molecules'):
+        op.add_column(table, sa.Column('murcko_scaffold', sa.String(), nullable=True))
+        op.add_column(table, sa.Column('generic_murcko_scaffold', sa.String(), nullable=True))
+        op.add_column(table, sa.Column('murcko_scaffold_hash', sa.String(), nullable=True))
+        op.create_index(op.f(f'ix_{table}_generic_murcko_scaffold'), table, ['generic_murcko_scaffold'], unique=False)
+        op.create_index(op.f(f'ix_{table}_murcko_scaffold_hash'), table, ['murcko_scaffold_hash'], unique=False)
+
+
+def downgrade() -> None:
+    for table in ('parent_molecules', 'molecules'):
+        op.drop_index(op.f(f'ix_{table}_murcko_scaffold_hash'), table_name=table)
+        op.drop_index(op.f(f'ix_{table}_generic_murcko_scaffold'), table_name=table)
+        op.drop_column(table, 'murcko_scaffold_hash')
+        op.drop_column(table, 'generic_murcko_scaffold')
+        op.drop_column(table, 'murcko_scaffold')
@@ -0,0 +1,30 @@
+"""registration hashes
+
+Revision ID: 9a2f6d3e1c57
+Revises: 4e9d7a0c2b18
+Create Date: 2026-10-18 12:06:12.448915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a2f6d3e1c57'
+down_revision: Union[str, None] = '4e9d7a0c2b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for column in ('hash_no_stereo', 'hash_tautomer', 'hash_connectivity'):
+        op.add_column('molecules', sa.Column(column, sa.String(), nullable=True))
+        op.create_index(op.f(f'ix_molecules_{column}'), 'molecules', [column], unique=False)
+
+
+def downgrade() -> None:
+    for column in ('hash_connectivity', 'hash_tautomer', 'hash_no_stereo'):
+        op.drop_index(op.f(f'ix_molecules_{column}'), table_name='molecules')
+        op.drop_column('molecules', column)
@@ -0,0 +1,44 @@
+"""fingerprint popcounts
+
+Revision ID: a3c7e0f4d812
+Revises: 5b1e9d7c3a26
+Create Date: 2026-10-18 14:06:52.731048
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c7e0f4d812'
+down_revision: Union[str, None] = '5b1e9d7c3a26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('molecules', sa.Column('morgan_popcount', sa.Integer(), nullable=True))
+    op.add_column('molecules', sa.Column('rdkit_popcount', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_molecules_morgan_popcount'), 'molecules', ['morgan_popcount'], unique=False)
+    op.create_index(op.f('ix_molecules_rdkit_popcount'), 'molecules', ['rdkit_popcount'], unique=False)
+    op.add_column('parent_molecules', sa.Column('morgan_popcount', sa.Integer(), nullable=True))
+    op.add_column('parent_molecules', sa.Column('rdkit_popcount', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_parent_molecules_morgan_popcount'), 'parent_molecules', ['morgan_popcount'], unique=False)
+    op.create_index(op.f('ix_parent_molecules_rdkit_popcount'), 'parent_molecules', ['rdkit_popcount'], unique=False)
+    op.add_column('molecule_fingerprints', sa.Column('popcount', sa.Integer(), nullable=True))
+    op.create_index('ix_molecule_fingerprints_fp_name_popcount', 'molecule_fingerprints', ['fp_name', 'popcount'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_molecule_fingerprints_fp_name_popcount', table_name='molecule_fingerprints')
+    op.drop_column('molecule_fingerprints', 'popcount')
+    op.drop_index(op.f('ix_parent_molecules_rdkit_popcount'), table_name='parent_molecules')
+    op.drop_index(op.f('ix_parent_molecules_morgan_popcount'), table_name='parent_molecules')
+    op.drop_column('parent_molecules', 'rdkit_popcount')
+    op.drop_column('parent_molecules', 'morgan_popcount')
+    op.drop_index(op.f('ix_molecules_rdkit_popcount'), table_name='molecules')
+    op.drop_index(op.f('ix_molecules_morgan_popcount'), table_name='molecules')
+    op.drop_column('molecules', 'rdkit_popcount')
+    op.drop_column('molecules', 'morgan_popcount')
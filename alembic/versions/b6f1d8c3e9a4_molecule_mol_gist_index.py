@@ -0,0 +1,29 @@
+"""molecule mol gist index
+
+Revision ID: b6f1d8c3e9a4
+Revises: 7d2b9f4e6a15
+Create Date: 2026-10-18 15:41:09.582731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f1d8c3e9a4'
+down_revision: Union[str, None] = '7d2b9f4e6a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The btree index on mol cannot serve substructure (@>) searches
+    op.drop_index(op.f('ix_molecules_mol'), table_name='molecules')
+    op.create_index('ix_molecules_mol_gist', 'molecules', ['mol'], unique=False, postgresql_using='gist')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_molecules_mol_gist', table_name='molecules', postgresql_using='gist')
+    op.create_index(op.f('ix_molecules_mol'), 'molecules', ['mol'], unique=False)
@@ -0,0 +1,30 @@
+"""trigram name indexes
+
+Revision ID: c5f0a83b1d6e
+Revises: 8c41d2e7f5a9
+Create Date: 2026-10-18 10:41:07.552390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f0a83b1d6e'
+down_revision: Union[str, None] = '8c41d2e7f5a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS "pg_trgm"')
+    # btree indexes cannot serve '%x%' ILIKE; GIN trigram indexes can
+    op.create_index('ix_molecules_name_trgm', 'molecules', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_molecules_synonyms_trgm', 'molecules', ['synonyms'], unique=False, postgresql_using='gin', postgresql_ops={'synonyms': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_molecules_synonyms_trgm', table_name='molecules')
+    op.drop_index('ix_molecules_name_trgm', table_name='molecules')
@@ -0,0 +1,28 @@
+"""inchikey indexes
+
+Revision ID: d7e3b5a19f04
+Revises: 9a2f6d3e1c57
+Create Date: 2026-10-18 12:31:08.275604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e3b5a19f04'
+down_revision: Union[str, None] = '9a2f6d3e1c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_molecules_inchi_key'), 'molecules', ['inchi_key'], unique=False)
+    op.create_index(op.f('ix_parent_molecules_inchi_key'), 'parent_molecules', ['inchi_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_parent_molecules_inchi_key'), table_name='parent_molecules')
+    op.drop_index(op.f('ix_molecules_inchi_key'), table_name='molecules')
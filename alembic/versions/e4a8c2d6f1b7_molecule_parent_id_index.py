@@ -0,0 +1,26 @@
+"""molecule parent_id index
+
+Revision ID: e4a8c2d6f1b7
+Revises: a3c7e0f4d812
+Create Date: 2026-10-18 14:32:17.406925
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a8c2d6f1b7'
+down_revision: Union[str, None] = 'a3c7e0f4d812'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_molecules_parent_id'), 'molecules', ['parent_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_molecules_parent_id'), table_name='molecules')
@@ -0,0 +1,38 @@
+"""fingerprint gist indexes
+
+Revision ID: f3a9c1e7d4b2
+Revises: b6f1d8c3e9a4
+Create Date: 2026-10-18 16:27:35.914062
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c1e7d4b2'
+down_revision: Union[str, None] = 'b6f1d8c3e9a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The btree indexes of the initial revision cannot serve the % and # similarity operators
+INDEXES = [
+    ('molecules', 'morgan_fp'),
+    ('molecules', 'rdkit_fp'),
+    ('parent_molecules', 'morgan_fp'),
+]
+
+
+def upgrade() -> None:
+    for table, column in INDEXES:
+        op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table)
+        op.create_index(f'ix_{table}_{column}_gist', table, [column], unique=False, postgresql_using='gist')
+
+
+def downgrade() -> None:
+    for table, column in INDEXES:
+        op.drop_index(f'ix_{table}_{column}_gist', table_name=table, postgresql_using='gist')
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
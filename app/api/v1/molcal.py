@@ -1,9 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from uuid import UUID
 from app.db.base import SessionLocal
-from app.schemas.cluster_dto import ClusterInputDto, ClusterOutputDto
-from app.services.molcal.cluster import cluster_molecules_with_centroids
+from app.schemas.cluster_dto import (
+    ClusterInputDto,
+    ClusterOutputDto,
+    ClusterStoredInputDto,
+)
+from app.schemas.cluster_run_dto import (
+    ClusterAssignInputDto,
+    ClusterRunCreateDto,
+    ClusterRunDto,
+)
+from app.services.molcal.cluster import (
+    cluster_molecules_with_centroids,
+    cluster_stored_molecules,
+)
+from app.schemas.diversity_dto import DiversityPickInputDto, DiversityPickOutputDto
+from app.services.molcal import cluster_runs
+from app.services.molcal.diversity import pick_diverse_molecules
+from app.schemas.properties_dto import PropertiesInputDto
+from app.services.molcal.properties import stream_properties, validate_profile
+from app.schemas.near_duplicate_dto import (
+    NearDuplicatePairDto,
+    NearDuplicateRunCreateDto,
+    NearDuplicateRunDto,
+)
+from app.services.molcal import near_duplicates
+from app.schemas.similarity_matrix_dto import SimilarityMatrixInputDto
+from app.services.molcal.similarity_matrix import (
+    load_matrix_fingerprints,
+    matrix_headers,
+    stream_similarity_matrix,
+)
+from app.repositories import cluster_run as cluster_run_repo
+from app.repositories import near_duplicate as near_duplicate_repo
 from app.core.logging_config import logger
 import time
 
@@ -21,16 +54,23 @@ async def get_db():
 
 @router.post("/cluster", response_model=List[ClusterOutputDto])
 async def cluster_molecules(
-    molecules: List[ClusterInputDto], db: AsyncSession = Depends(get_db)
+    molecules: List[ClusterInputDto],
+    cutoff: float = 0.7,
+    method: str = "butina",
+    db: AsyncSession = Depends(get_db),
 ):
     try:
-        logger.info(f"Clustering request received with {len(molecules)} molecules.")
+        logger.info(
+            f"Clustering request received with {len(molecules)} molecules (method: {method})."
+        )
         
         # Start time for measuring the clustering duration
         start_time = time.time()
         
         # Perform the clustering
-        result = cluster_molecules_with_centroids(molecules)
+        result = await cluster_molecules_with_centroids(
+            molecules, cutoff=cutoff, method=method
+        )
         
         # End time after clustering
         end_time = time.time()
@@ -45,3 +85,239 @@ async def cluster_molecules(
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/cluster-stored", response_model=List[ClusterOutputDto])
+async def cluster_stored(
+    cluster_input: ClusterStoredInputDto, db: AsyncSession = Depends(get_db)
+):
+    try:
+        logger.info(
+            f"Stored clustering request received for "
+            f"{len(cluster_input.ids) if cluster_input.ids is not None else 'filtered'} molecules."
+        )
+
+        start_time = time.time()
+        result = await cluster_stored_molecules(db, cluster_input)
+        duration = time.time() - start_time
+        logger.info(
+            f"Clustering of {len(result)} stored molecules completed in {duration:.4f} seconds."
+        )
+
+        return result
+
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error clustering stored molecules: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/cluster-runs", response_model=ClusterRunDto)
+async def create_cluster_run(
+    run_input: ClusterRunCreateDto, db: AsyncSession = Depends(get_db)
+):
+    try:
+        logger.info(f"Creating cluster run: {run_input.name}")
+        return await cluster_runs.create_cluster_run(db, run_input)
+    except HTTPException as e:
+        raise e
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error creating cluster run {run_input.name}: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/cluster-runs/{id}", response_model=ClusterRunDto)
+async def read_cluster_run(id: UUID, db: AsyncSession = Depends(get_db)):
+    db_cluster_run = await cluster_run_repo.get_cluster_run(db, id)
+    if db_cluster_run is None:
+        raise HTTPException(status_code=404, detail=f"Cluster run not found, ID: {id}")
+    return db_cluster_run
+
+
+@router.get("/cluster-runs/{id}/members", response_model=List[ClusterOutputDto])
+async def read_cluster_run_members(id: UUID, db: AsyncSession = Depends(get_db)):
+    try:
+        db_cluster_run = await cluster_run_repo.get_cluster_run(db, id)
+        if db_cluster_run is None:
+            raise HTTPException(
+                status_code=404, detail=f"Cluster run not found, ID: {id}"
+            )
+        return await cluster_run_repo.get_cluster_members(db, id)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Error fetching members of cluster run {id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/cluster-runs/{id}/assign", response_model=List[ClusterOutputDto])
+async def assign_to_cluster_run(
+    id: UUID, assign_input: ClusterAssignInputDto, db: AsyncSession = Depends(get_db)
+):
+    try:
+        logger.info(f"Assigning {len(assign_input.ids)} molecules to cluster run {id}")
+        result = await cluster_runs.assign_to_cluster_run(db, id, assign_input.ids)
+        if result is None:
+            raise HTTPException(
+                status_code=404, detail=f"Cluster run not found, ID: {id}"
+            )
+        return result
+    except HTTPException as e:
+        raise e
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error assigning molecules to cluster run {id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/cluster-runs/{id}/recluster", response_model=ClusterRunDto)
+async def recluster_cluster_run(id: UUID, db: AsyncSession = Depends(get_db)):
+    try:
+        logger.info(f"Reclustering cluster run {id}")
+        result = await cluster_runs.recluster_run(db, id)
+        if result is None:
+            raise HTTPException(
+                status_code=404, detail=f"Cluster run not found, ID: {id}"
+            )
+        return result
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Error reclustering cluster run {id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/near-duplicate-runs", response_model=NearDuplicateRunDto)
+async def create_near_duplicate_run(
+    run_input: NearDuplicateRunCreateDto,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Start a vault-wide search for molecule pairs at or above a Morgan Tanimoto threshold.
+    Poll the returned run for progress and read the pairs once it has completed.
+    """
+    try:
+        logger.info(f"Starting near-duplicate run at threshold {run_input.threshold}")
+        run = await near_duplicates.create_near_duplicate_run(db, run_input)
+        background_tasks.add_task(
+            near_duplicates.run_near_duplicate_job, run.id, run_input.parallelism
+        )
+        return run
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error starting near-duplicate run: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/near-duplicate-runs/{id}", response_model=NearDuplicateRunDto)
+async def read_near_duplicate_run(id: UUID, db: AsyncSession = Depends(get_db)):
+    db_run = await near_duplicate_repo.get_near_duplicate_run(db, id)
+    if db_run is None:
+        raise HTTPException(
+            status_code=404, detail=f"Near-duplicate run not found, ID: {id}"
+        )
+    return db_run
+
+
+@router.get(
+    "/near-duplicate-runs/{id}/pairs", response_model=List[NearDuplicatePairDto]
+)
+async def read_near_duplicate_pairs(
+    id: UUID,
+    min_similarity: float = 0.0,
+    limit: int = 100,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        db_run = await near_duplicate_repo.get_near_duplicate_run(db, id)
+        if db_run is None:
+            raise HTTPException(
+                status_code=404, detail=f"Near-duplicate run not found, ID: {id}"
+            )
+        return await near_duplicate_repo.get_near_duplicates(
+            db, id, min_similarity=min_similarity, limit=limit, offset=offset
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Error fetching pairs of near-duplicate run {id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/diversity-pick", response_model=List[DiversityPickOutputDto])
+async def diversity_pick(
+    pick_input: DiversityPickInputDto, db: AsyncSession = Depends(get_db)
+):
+    try:
+        logger.info(f"Diversity pick request received for {pick_input.npick} molecules.")
+
+        start_time = time.time()
+        result = await pick_diverse_molecules(db, pick_input)
+        duration = time.time() - start_time
+        logger.info(f"Picked {len(result)} molecules in {duration:.4f} seconds.")
+
+        return result
+
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error picking diverse molecules: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/similarity-matrix")
+async def similarity_matrix(
+    matrix_input: SimilarityMatrixInputDto, db: AsyncSession = Depends(get_db)
+):
+    """
+    Pairwise Morgan Tanimoto similarity of up to 20k molecules (IDs or SMILES) as a
+    binary application/octet-stream. The X-Matrix-* headers give the shape, dtype and
+    layout: the dense row-major matrix, or (row uint32, col uint32, value) records of
+    the pairs i < j at or above the cutoff when `sparse` is set.
+    """
+    try:
+        fps = await load_matrix_fingerprints(db, matrix_input)
+        logger.info(
+            f"Similarity matrix request received for {len(fps)} molecules "
+            f"({matrix_input.dtype}, {'sparse' if matrix_input.sparse else 'dense'})."
+        )
+        return StreamingResponse(
+            stream_similarity_matrix(
+                fps, matrix_input.dtype, matrix_input.sparse, matrix_input.cutoff
+            ),
+            media_type="application/octet-stream",
+            headers=matrix_headers(
+                len(fps), matrix_input.dtype, matrix_input.sparse, matrix_input.cutoff
+            ),
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error computing similarity matrix: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/properties")
+async def molecule_properties(molecules: List[PropertiesInputDto], profile: str = "full"):
+    """
+    Canonical SMILES, InChIKeys, descriptors and Ro5 flags for structures without
+    registering them. Streams one JSON object per line (NDJSON) in input order.
+    """
+    try:
+        logger.info(f"Properties request received for {len(molecules)} molecules.")
+        validate_profile(profile)
+        return StreamingResponse(
+            stream_properties(molecules, profile), media_type="application/x-ndjson"
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error computing molecule properties: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
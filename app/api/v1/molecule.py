@@ -6,7 +6,7 @@ from app.db.base import SessionLocal
 from app.repositories import molecule as molecule_repo
 from app.schemas.molecule_dto import InputMoleculeDto, UpdateMoleculeDto
 from app.core.logging_config import logger
-from app.schemas.similar_molecule_dto import SimilarMoleculeDto
+from app.schemas.similar_molecule_dto import SimilarMoleculeDto, SimilarParentMoleculeDto
 from app.services.molecule import batch_registration, registration
 from app.schemas.molecule import MoleculeBase
 from app.repositories.molecule import (
@@ -16,7 +16,44 @@ from app.repositories.molecule import (
     search_substructure_multiple,
 )
 from app.services.molecule.batch_registration_parent import process_all_molecule_batches
-from app.services.molecule.similarity import find_similar_molecules
+from app.services.molecule.similarity import (
+    find_similar_molecules,
+    find_similar_parents,
+    benchmark_approximate_search,
+)
+from app.services.molecule.backfill import (
+    backfill_scaffolds,
+    backfill_registration_hashes,
+    backfill_descriptors,
+    backfill_fingerprints,
+    backfill_named_fingerprint,
+    MAX_PARALLELISM as MAX_BACKFILL_PARALLELISM,
+)
+from app.repositories import scaffold as scaffold_repo
+from app.schemas.scaffold_dto import ScaffoldCountDto
+from app.schemas.name_completion_dto import NameCompletionDto
+from app.services.molecule.name_index import name_index
+from app.services.molecule.lsh_index import (
+    lsh_index_stats,
+    remove_from_lsh_index,
+    start_lsh_index_build,
+)
+from app.services.molecule.lookup import (
+    lookup_molecules_by_smiles,
+    lookup_molecules_by_inchikeys,
+)
+from app.utils.molecules.helper import normalize_inchikey
+from app.utils.molecules.fp_similarity import validate_metric
+from app.utils.molecules.fingerprints import (
+    FINGERPRINT_COLUMNS,
+    get_config as get_fingerprint_config,
+)
+from app.utils.molecules.standardization_cache import standardization_cache
+from app.services.molecule.standardization_store import (
+    prefetch_standardizations,
+    schedule_flush,
+)
+from app.schemas.lookup_dto import BulkLookupResultDto
 
 router = APIRouter()
 
@@ -32,12 +69,14 @@ async def get_db():
 
 @router.post("/", response_model=MoleculeBase)
 async def create_molecule(
-    molecule: InputMoleculeDto, db: AsyncSession = Depends(get_db)
+    molecule: InputMoleculeDto,
+    dedup_level: str = "exact",
+    db: AsyncSession = Depends(get_db),
 ):
     try:
         logger.info(f"Creating a new molecule with data: {molecule.model_dump()}")
         # result = await molecule_repo.create_molecule(db=db, molecule=molecule)
-        result = await registration.register(molecule, db)
+        result = await registration.register(molecule, db, dedup_level=dedup_level)
         logger.debug(f"Molecule created successfully: {result}")
         return result
 
@@ -93,11 +132,13 @@ async def read_molecules(ids: List[UUID] = Query(...), db: AsyncSession = Depend
 
 @router.get("/by-name", response_model=List[MoleculeBase])
 async def read_molecule_by_name(
-    name: str, limit: int = 100, db: AsyncSession = Depends(get_db)
+    name: str, limit: int = 100, ranked: bool = True, db: AsyncSession = Depends(get_db)
 ):
     try:
         logger.info(f"Fetching molecule with Name: {name}")
-        db_molecule = await get_molecule_by_name(db=db, name=name, limit=limit)
+        db_molecule = await get_molecule_by_name(
+            db=db, name=name, limit=limit, ranked=ranked
+        )
         if db_molecule is None:
             logger.warning(f"Molecule with name {name} not found")
             raise HTTPException(
@@ -115,11 +156,33 @@ async def read_molecule_by_name(
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@router.get("/autocomplete", response_model=List[NameCompletionDto])
+async def autocomplete_molecule_name(prefix: str, limit: int = 10):
+    """
+    Name and synonym completions for a prefix, served from the in-process name index.
+    """
+    return name_index.complete(prefix, limit=limit)
+
+
+@router.get("/standardization-cache/stats")
+async def standardization_cache_stats():
+    """
+    Size, hit rate and pending writes of the standardization cache of this process.
+    """
+    return standardization_cache.stats()
+
+
 @router.get("/by-smiles-canonical", response_model=MoleculeBase)
-async def read_molecule(smiles: str, db: AsyncSession = Depends(get_db)):
+async def read_molecule(
+    smiles: str, dedup_level: str = "exact", db: AsyncSession = Depends(get_db)
+):
     try:
         logger.info(f"Fetching molecule with canonical smiles: {smiles}")
-        db_molecule = await get_molecule_by_smiles(db=db, smiles_canonical=smiles)
+        await prefetch_standardizations("smiles", [smiles])
+        db_molecule = await get_molecule_by_smiles(
+            db=db, smiles_canonical=smiles, dedup_level=dedup_level
+        )
+        schedule_flush()
         if db_molecule is None:
             logger.warning(f"Molecule with smiles_canonical {smiles} not found")
             raise HTTPException(
@@ -137,6 +200,59 @@ async def read_molecule(smiles: str, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@router.post("/by-smiles-canonical/bulk", response_model=List[BulkLookupResultDto])
+async def read_molecules_by_smiles_bulk(
+    smiles: List[str], dedup_level: str = "exact", db: AsyncSession = Depends(get_db)
+):
+    try:
+        logger.info(f"Bulk lookup of {len(smiles)} SMILES")
+        return await lookup_molecules_by_smiles(
+            db=db, smiles_list=smiles, dedup_level=dedup_level
+        )
+    except ValueError as ve:
+        logger.error(f"Invalid bulk lookup request: {ve}")
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error in bulk SMILES lookup: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/by-inchikey", response_model=List[MoleculeBase])
+async def read_molecules_by_inchikey(
+    inchi_key: str, db: AsyncSession = Depends(get_db)
+):
+    try:
+        logger.info(f"Fetching molecules with InChIKey: {inchi_key}")
+        key = normalize_inchikey(inchi_key)
+        found = await molecule_repo.get_molecules_by_inchikeys(db=db, inchi_keys=[key])
+        if key not in found:
+            logger.warning(f"Molecule with InChIKey {inchi_key} not found")
+            raise HTTPException(
+                status_code=404, detail=f"Molecule not found, InChIKey: {inchi_key}"
+            )
+        return found[key]
+    except HTTPException as e:
+        raise e
+    except ValueError as ve:
+        logger.error(f"Invalid InChIKey : {inchi_key}")
+        raise HTTPException(status_code=400, detail=f"Invalid InChIKey: {ve}")
+    except Exception as e:
+        logger.error(f"Error fetching molecules with InChIKey {inchi_key}: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/by-inchikey/bulk", response_model=List[BulkLookupResultDto])
+async def read_molecules_by_inchikey_bulk(
+    inchi_keys: List[str], db: AsyncSession = Depends(get_db)
+):
+    try:
+        logger.info(f"Bulk lookup of {len(inchi_keys)} InChIKeys")
+        return await lookup_molecules_by_inchikeys(db=db, inchi_keys=inchi_keys)
+    except Exception as e:
+        logger.error(f"Error in bulk InChIKey lookup: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
 # Update molecule can ONLY update molecule name and synonyms
 @router.put("/{id}", response_model=MoleculeBase)
 async def update_molecule(
@@ -148,6 +264,8 @@ async def update_molecule(
             f"Updating molecule with ID: {id} with data: {molecule.model_dump()}"
         )
         result = await molecule_repo.update_molecule(db=db, id=id, molecule=molecule)
+        name_index.remove_molecule(id)
+        name_index.add_molecule(result)
         logger.debug(f"Molecule updated successfully: {result}")
         return result
     except HTTPException as e:
@@ -162,6 +280,8 @@ async def delete_molecule(id: UUID, db: AsyncSession = Depends(get_db)):
     try:
         logger.info(f"Deleting molecule with ID: {id}")
         await molecule_repo.delete_molecule(db=db, id=id)
+        name_index.remove_molecule(id)
+        remove_from_lsh_index(id)
         logger.debug(f"Molecule with ID {id} deleted successfully")
         return {"detail": "Molecule deleted"}
     except HTTPException as e:
@@ -176,6 +296,13 @@ async def similarity_search(
     smiles: str,
     threshold: float = 0.7,
     limit: int = 100,
+    fingerprint: str = "morgan",
+    fused: bool = False,
+    morgan_weight: float = 0.5,
+    metric: str = "tanimoto",
+    tversky_alpha: float = 1.0,
+    tversky_beta: float = 1.0,
+    approximate: bool = False,
     molecular_weight_min: Optional[float] = None,
     molecular_weight_max: Optional[float] = None,
     clogp_min: Optional[float] = None,
@@ -194,6 +321,18 @@ async def similarity_search(
     rings_max: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
 ):
+    try:
+        get_fingerprint_config(fingerprint)
+        if not 0 <= morgan_weight <= 1:
+            raise ValueError("morgan_weight must be between 0 and 1.")
+        validate_metric(metric, tversky_alpha, tversky_beta)
+        if approximate and (fused or fingerprint != "morgan"):
+            raise ValueError(
+                "Approximate search covers plain Morgan searches only (fingerprint=morgan, fused=false)."
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Prepare a dictionary of filters with non-None values
     filters = {
         "molecular_weight_min": molecular_weight_min,
@@ -219,7 +358,114 @@ async def similarity_search(
 
     # Pass the filters dictionary to the molecule search function
     results = await find_similar_molecules(
-        db=db, query_molecule=smiles, threshold=threshold, limit=limit, filters=filters
+        db=db,
+        query_molecule=smiles,
+        threshold=threshold,
+        limit=limit,
+        filters=filters,
+        fp_name=fingerprint,
+        fused=fused,
+        morgan_weight=morgan_weight,
+        metric=metric,
+        tversky_alpha=tversky_alpha,
+        tversky_beta=tversky_beta,
+        approximate=approximate,
+    )
+
+    return results
+
+
+@router.get("/similarity/approximate/benchmark")
+async def approximate_similarity_benchmark(
+    smiles_list: List[str] = Query(...),
+    threshold: float = 0.7,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Compare approximate and exact Morgan Tanimoto searches for the given queries,
+    reporting recall and timings.
+    """
+    try:
+        return await benchmark_approximate_search(
+            db=db, query_molecules=smiles_list, threshold=threshold, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error benchmarking approximate similarity search: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/similarity/parents", response_model=List[SimilarParentMoleculeDto])
+async def parent_similarity_search(
+    smiles: str,
+    threshold: float = 0.7,
+    limit: int = 100,
+    include_children: bool = False,
+    metric: str = "tanimoto",
+    tversky_alpha: float = 1.0,
+    tversky_beta: float = 1.0,
+    molecular_weight_min: Optional[float] = None,
+    molecular_weight_max: Optional[float] = None,
+    clogp_min: Optional[float] = None,
+    clogp_max: Optional[float] = None,
+    lipinski_hbd_min: Optional[int] = None,
+    lipinski_hbd_max: Optional[int] = None,
+    tpsa_min: Optional[float] = None,
+    tpsa_max: Optional[float] = None,
+    rotatable_bonds_min: Optional[int] = None,
+    rotatable_bonds_max: Optional[int] = None,
+    heavy_atoms_min: Optional[int] = None,
+    heavy_atoms_max: Optional[int] = None,
+    aromatic_rings_min: Optional[int] = None,
+    aromatic_rings_max: Optional[int] = None,
+    rings_min: Optional[int] = None,
+    rings_max: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Similarity search on parent molecules, returning one hit per parent and optionally
+    its registered molecules.
+    """
+    try:
+        validate_metric(metric, tversky_alpha, tversky_beta)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Prepare a dictionary of filters with non-None values
+    filters = {
+        "molecular_weight_min": molecular_weight_min,
+        "molecular_weight_max": molecular_weight_max,
+        "clogp_min": clogp_min,
+        "clogp_max": clogp_max,
+        "lipinski_hbd_min": lipinski_hbd_min,
+        "lipinski_hbd_max": lipinski_hbd_max,
+        "tpsa_min": tpsa_min,
+        "tpsa_max": tpsa_max,
+        "rotatable_bonds_min": rotatable_bonds_min,
+        "rotatable_bonds_max": rotatable_bonds_max,
+        "heavy_atoms_min": heavy_atoms_min,
+        "heavy_atoms_max": heavy_atoms_max,
+        "aromatic_rings_min": aromatic_rings_min,
+        "aromatic_rings_max": aromatic_rings_max,
+        "rings_min": rings_min,
+        "rings_max": rings_max,
+    }
+
+    # Clean the dictionary by removing filters that are None
+    filters = {k: v for k, v in filters.items() if v is not None}
+
+    results = await find_similar_parents(
+        db=db,
+        query_molecule=smiles,
+        threshold=threshold,
+        limit=limit,
+        filters=filters,
+        metric=metric,
+        tversky_alpha=tversky_alpha,
+        tversky_beta=tversky_beta,
+        include_children=include_children,
     )
 
     return results
@@ -229,6 +475,7 @@ async def similarity_search(
 async def substructure_search(
     smiles: str,
     limit: int = 100,
+    mode: str = "smiles",
     molecular_weight_min: Optional[float] = None,
     molecular_weight_max: Optional[float] = None,
     clogp_min: Optional[float] = None,
@@ -248,7 +495,7 @@ async def substructure_search(
     db: AsyncSession = Depends(get_db),
 ):
     try:
-        logger.info(f"Initiating substructure search for smiles: {smiles}")
+        logger.info(f"Initiating substructure search for {mode}: {smiles}")
         # Prepare a dictionary of filters with non-None values
         filters = {
             "molecular_weight_min": molecular_weight_min,
@@ -273,7 +520,7 @@ async def substructure_search(
         filters = {k: v for k, v in filters.items() if v is not None}
         # Call the repository function to execute the substructure search
         results = await molecule_repo.search_substructure_molecules(
-            db=db, query_smiles=smiles, limit=limit, filters=filters
+            db=db, query_smiles=smiles, limit=limit, filters=filters, mode=mode
         )
 
         if not results:
@@ -283,6 +530,8 @@ async def substructure_search(
 
         return results
 
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         logger.error(f"Error performing substructure search: {e}")
         # Raise a detailed HTTP exception with a 500 status code
@@ -297,6 +546,7 @@ async def substructure_search_all(
     smiles_list: List[str] = Query(...),
     condition: str = Query(...),
     limit: int = 100,
+    mode: str = "smiles",
     molecular_weight_min: Optional[float] = None,
     molecular_weight_max: Optional[float] = None,
     clogp_min: Optional[float] = None,
@@ -322,6 +572,7 @@ async def substructure_search_all(
 
     Args:
         smiles_list (List[str]): A list of SMILES strings representing the query molecules.
+        mode (str): 'smiles', or 'smarts' to treat every query as a SMARTS pattern.
         db (AsyncSession): Database session (provided by dependency injection).
 
     Returns:
@@ -357,12 +608,13 @@ async def substructure_search_all(
             condition=condition,
             limit=limit,
             filters=filters,
+            mode=mode,
         )
 
         return results
 
     except ValueError as ve:
-        logger.error(f"Invalid SMILES string: {ve}")
+        logger.error(f"Invalid substructure query: {ve}")
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         logger.error(f"Error in substructure search: {e}")
@@ -374,11 +626,15 @@ async def substructure_search_all(
 
 # Batch
 @router.post("/batch", response_model=List[MoleculeBase])
-async def create_molecules_batch(molecules: List[InputMoleculeDto]):
+async def create_molecules_batch(
+    molecules: List[InputMoleculeDto], dedup_level: str = "exact"
+):
     try:
         logger.info(f"Creating batch of {len(molecules)} molecules")
 
-        result = await batch_registration.register_molecules_batch(molecules)
+        result = await batch_registration.register_molecules_batch(
+            molecules, dedup_level=dedup_level
+        )
 
         logger.debug(f"Batch creation successful for {len(molecules)} molecules")
         return result
@@ -413,3 +669,188 @@ async def batch_create_parents(background_tasks: BackgroundTasks):
         raise HTTPException(
             status_code=500, detail="Failed to start batch parent creation job."
         )
+
+
+@router.get("/scaffolds", response_model=List[ScaffoldCountDto])
+async def scaffold_counts(
+    generic: bool = False,
+    parents: bool = False,
+    min_count: int = 1,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        logger.info(
+            f"Fetching scaffold counts (generic: {generic}, parents: {parents}, limit: {limit})"
+        )
+        return await scaffold_repo.get_scaffold_counts(
+            db, generic=generic, parents=parents, min_count=min_count, limit=limit
+        )
+    except Exception as e:
+        logger.error(f"Error fetching scaffold counts: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/by-scaffold", response_model=List[MoleculeBase])
+async def read_molecules_by_scaffold(
+    scaffold_hash: Optional[str] = None,
+    generic_scaffold: Optional[str] = None,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        logger.info(
+            f"Fetching molecules by scaffold hash: {scaffold_hash}, generic scaffold: {generic_scaffold}"
+        )
+        return await scaffold_repo.get_molecules_by_scaffold(
+            db,
+            scaffold_hash=scaffold_hash,
+            generic_scaffold=generic_scaffold,
+            limit=limit,
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Error fetching molecules by scaffold: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/backfill-scaffolds")
+async def trigger_scaffold_backfill(
+    background_tasks: BackgroundTasks, recompute: bool = False
+):
+    """
+    Endpoint to trigger a background job computing Murcko scaffolds for existing molecules.
+    With `recompute`, the scaffolds of every molecule and parent are computed again.
+    """
+    try:
+        logger.info("Received request to trigger the scaffold backfill job.")
+        background_tasks.add_task(backfill_scaffolds, recompute)
+        return {
+            "message": "Scaffold backfill job started successfully. Check logs for progress."
+        }
+    except Exception as e:
+        logger.error(f"Error starting scaffold backfill job: {e}")
+        raise HTTPException(
+            status_code=500, detail="Failed to start scaffold backfill job."
+        )
+
+
+@router.post("/backfill-registration-hashes")
+async def trigger_registration_hash_backfill(background_tasks: BackgroundTasks):
+    """
+    Endpoint to trigger a background job computing registration hashes for existing molecules.
+    """
+    try:
+        logger.info("Received request to trigger the registration hash backfill job.")
+        background_tasks.add_task(backfill_registration_hashes)
+        return {
+            "message": "Registration hash backfill job started successfully. Check logs for progress."
+        }
+    except Exception as e:
+        logger.error(f"Error starting registration hash backfill job: {e}")
+        raise HTTPException(
+            status_code=500, detail="Failed to start registration hash backfill job."
+        )
+
+
+@router.post("/backfill-descriptors")
+async def trigger_descriptor_backfill(background_tasks: BackgroundTasks):
+    """
+    Endpoint to trigger a background job computing deferred descriptors (e.g. qed, sas).
+    """
+    try:
+        logger.info("Received request to trigger the descriptor backfill job.")
+        background_tasks.add_task(backfill_descriptors)
+        return {
+            "message": "Descriptor backfill job started successfully. Check logs for progress."
+        }
+    except Exception as e:
+        logger.error(f"Error starting descriptor backfill job: {e}")
+        raise HTTPException(
+            status_code=500, detail="Failed to start descriptor backfill job."
+        )
+
+
+@router.post("/backfill-fingerprints")
+async def trigger_fingerprint_backfill(
+    background_tasks: BackgroundTasks, recompute: bool = False
+):
+    """
+    Endpoint to trigger a background job re-encoding legacy bitstring fingerprints as packed binary.
+    With `recompute`, the fingerprints of every molecule and parent are regenerated.
+    """
+    try:
+        logger.info("Received request to trigger the fingerprint backfill job.")
+        background_tasks.add_task(backfill_fingerprints, recompute)
+        return {
+            "message": "Fingerprint backfill job started successfully. Check logs for progress."
+        }
+    except Exception as e:
+        logger.error(f"Error starting fingerprint backfill job: {e}")
+        raise HTTPException(
+            status_code=500, detail="Failed to start fingerprint backfill job."
+        )
+
+
+@router.post("/backfill-fingerprints/{fp_name}")
+async def trigger_named_fingerprint_backfill(
+    fp_name: str, background_tasks: BackgroundTasks, parallelism: int = 4
+):
+    """
+    Endpoint to trigger a background job computing a registered fingerprint for existing
+    molecules. Re-running it resumes the job and covers newly registered molecules.
+    """
+    try:
+        get_fingerprint_config(fp_name)
+        if fp_name in FINGERPRINT_COLUMNS:
+            raise ValueError(
+                f"Fingerprint '{fp_name}' is stored on molecules; use /backfill-fingerprints."
+            )
+        if not (1 <= parallelism <= MAX_BACKFILL_PARALLELISM):
+            raise ValueError(
+                f"parallelism must be between 1 and {MAX_BACKFILL_PARALLELISM}."
+            )
+        logger.info(f"Received request to trigger the {fp_name} fingerprint backfill job.")
+        background_tasks.add_task(backfill_named_fingerprint, fp_name, parallelism)
+        return {
+            "message": f"Fingerprint backfill job for {fp_name} started successfully. Check logs for progress."
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting {fp_name} fingerprint backfill job: {e}")
+        raise HTTPException(
+            status_code=500, detail="Failed to start fingerprint backfill job."
+        )
+
+
+@router.get("/lsh-index/stats")
+async def get_lsh_index_stats():
+    """
+    Size and state of the approximate similarity index of this process.
+    """
+    return lsh_index_stats()
+
+
+@router.post("/lsh-index/rebuild")
+async def trigger_lsh_index_rebuild():
+    """
+    Endpoint to rebuild the approximate similarity index in the background.
+    """
+    try:
+        if not lsh_index_stats()["enabled"]:
+            raise ValueError("The approximate similarity index is disabled (LSH_INDEX_ENABLED).")
+        logger.info("Received request to rebuild the approximate similarity index.")
+        if not start_lsh_index_build():
+            return {"message": "Approximate similarity index build already running."}
+        return {
+            "message": "Approximate similarity index rebuild started successfully. Check logs for progress."
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting approximate similarity index rebuild: {e}")
+        raise HTTPException(
+            status_code=500, detail="Failed to start approximate similarity index rebuild."
+        )
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -7,6 +8,23 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     LOG_LEVEL: str = "DEBUG"
     LOG_JSON: bool = False
+    # Worker processes for CPU-bound chemistry jobs (None: one per core)
+    PROCESS_POOL_WORKERS: Optional[int] = None
+    # Standardization cache: in-process LRU entries and queued persistent writes
+    STANDARDIZATION_CACHE_SIZE: int = 50000
+    STANDARDIZATION_CACHE_MAX_PENDING: int = 100000
+    STANDARDIZATION_CACHE_PERSIST: bool = True
+    # Descriptors computed at registration: none, core (skips qed and sas) or full.
+    # Skipped descriptors are filled in by the descriptor backfill job.
+    REGISTRATION_DESCRIPTOR_PROFILE: str = "full"
+    # Approximate (MinHash LSH) similarity index over Morgan fingerprints, kept on disk
+    LSH_INDEX_ENABLED: bool = False
+    LSH_INDEX_PATH: str = "lsh_index.npz"
+    LSH_BANDS: int = 16
+    LSH_MAX_CANDIDATES: int = 5000
+    # Re-encode fingerprints stored as '0'/'1' bitstrings in the background at startup;
+    # similarity searches skip those rows until they are packed
+    FINGERPRINT_REENCODE_ON_STARTUP: bool = True
 
     # Pydantic will automatically load from the environment
     model_config = ConfigDict(extra="allow")
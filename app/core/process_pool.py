@@ -0,0 +1,33 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from app.core.config import settings
+from app.core.logging_config import logger
+
+# Shared pool for CPU-bound RDKit work (standardization, descriptors, scaffolds).
+# Created lazily so importing the app does not fork worker processes.
+_executor = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        logger.info(
+            f"Starting process pool with {settings.PROCESS_POOL_WORKERS or 'default'} workers"
+        )
+        _executor = ProcessPoolExecutor(max_workers=settings.PROCESS_POOL_WORKERS)
+    return _executor
+
+
+async def run_in_process_pool(fn, *args, **kwargs):
+    """Run a picklable function in the shared process pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), partial(fn, *args, **kwargs))
+
+
+def shutdown_process_pool():
+    global _executor
+    if _executor is not None:
+        logger.info("Shutting down process pool")
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
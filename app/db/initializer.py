@@ -49,6 +49,25 @@ async def initialize_db():
                 )
                 logger.success("uuid-ossp extension activated.")
 
+            # Check if the pg_trgm extension is already active
+            result = await conn.execute(
+                text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            )
+            pg_trgm_extension_active = result.scalar() is not None
+
+            if pg_trgm_extension_active:
+                logger.info("pg_trgm extension is already active.")
+            else:
+                logger.info("pg_trgm extension is not active. Activating now.")
+                await conn.execute(
+                    text(
+                        """
+                        CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+                        """
+                    )
+                )
+                logger.success("pg_trgm extension activated.")
+
             # Commit the changes
             await conn.commit()
         except Exception as e:
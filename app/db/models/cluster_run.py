@@ -0,0 +1,82 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Float,
+    ForeignKey,
+    LargeBinary,
+    UniqueConstraint,
+    Index,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+from app.db.with_metadata import WithMetadata
+from sqlalchemy.orm import relationship
+
+
+class ClusterRun(Base, WithMetadata):
+    __tablename__ = "cluster_runs"
+
+    id = Column(
+        UUID(as_uuid=True), primary_key=True, index=True, unique=True, nullable=False
+    )
+    name = Column(String, index=True, unique=True, nullable=False)
+    cutoff = Column(Float, nullable=False)
+    n_clusters = Column(Integer, default=0)
+    n_members = Column(Integer, default=0)
+
+    centroids = relationship(
+        "ClusterCentroid", back_populates="cluster_run", cascade="all, delete-orphan"
+    )
+
+    def __repr__(self):
+        return f"id: {self.id}, name: {self.name}, cutoff: {self.cutoff}"
+
+
+class ClusterCentroid(Base):
+    __tablename__ = "cluster_centroids"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("cluster_runs.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    cluster = Column(Integer, nullable=False)
+    # Deleting the molecule removes the centroid; the cluster gets a remaining member as
+    # its centroid on the next incremental assignment (restore_missing_centroids)
+    molecule_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("molecules.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    # Packed Morgan fingerprint of the centroid (bfp_to_binary_text layout)
+    fingerprint = Column(LargeBinary, nullable=False)
+
+    cluster_run = relationship("ClusterRun", back_populates="centroids")
+
+    __table_args__ = (UniqueConstraint("run_id", "cluster"),)
+
+    def __repr__(self):
+        return f"run_id: {self.run_id}, cluster: {self.cluster}, molecule_id: {self.molecule_id}"
+
+
+class ClusterMember(Base):
+    __tablename__ = "cluster_members"
+
+    run_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("cluster_runs.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    molecule_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("molecules.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    cluster = Column(Integer, nullable=False)
+
+    __table_args__ = (Index("ix_cluster_members_run_id_cluster", "run_id", "cluster"),)
+
+    def __repr__(self):
+        return f"run_id: {self.run_id}, molecule_id: {self.molecule_id}, cluster: {self.cluster}"
@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
 from sqlalchemy.types import UserDefinedType
 from app.db.with_metadata import WithMetadata
 from sqlalchemy.orm import relationship
+from app.db.models.molecule_synonym import MoleculeSynonym
+from app.utils.molecules.helper import normalize_synonym
 
 
 class MolType(UserDefinedType):
@@ -12,9 +14,19 @@ class MolType(UserDefinedType):
 
 
 class BfpType(UserDefinedType):
+    """Binary fingerprint, exchanged as packed bytes (RDKit BitVectToBinaryText layout)."""
+
+    cache_ok = True
+
     def get_col_spec(self):
         return "bfp"
 
+    def bind_expression(self, bindvalue):
+        return func.bfp_from_binary_text(bindvalue)
+
+    def column_expression(self, col):
+        return func.bfp_to_binary_text(col)
+
 
 class Molecule(Base, WithMetadata):
     __tablename__ = "molecules"
@@ -23,12 +35,11 @@ class Molecule(Base, WithMetadata):
         UUID(as_uuid=True), primary_key=True, index=True, unique=True, nullable=False
     )
     name = Column(String, index=True)
-    synonyms = Column(String, index=True)
     smiles = Column(String)
     smiles_canonical = Column(String, index=True)
     selfies = Column(String)
     inchi = Column(String)
-    inchi_key = Column(String)
+    inchi_key = Column(String, index=True)
     smarts = Column(String)
     mw = Column(Float)
     fsp3 = Column(Float)
@@ -55,15 +66,75 @@ class Molecule(Base, WithMetadata):
     n_saturated_heterocycles = Column(Integer)
     n_saturated_rings = Column(Integer)
     ro5_compliant = Column(Boolean)
+    murcko_scaffold = Column(String)
+    generic_murcko_scaffold = Column(String, index=True)
+    murcko_scaffold_hash = Column(String, index=True)
+    hash_no_stereo = Column(String, index=True)
+    hash_tautomer = Column(String, index=True)
+    hash_connectivity = Column(String, index=True)
     o_molblock = Column(String)
     std_molblock = Column(String)
-    parent_id = Column(UUID(as_uuid=True), ForeignKey('parent_molecules.id'))
-    morgan_fp = Column(BfpType(), index=True)
-    rdkit_fp = Column(BfpType(), index=True)
-    mol = Column(MolType(), index=True)
+    parent_id = Column(UUID(as_uuid=True), ForeignKey('parent_molecules.id'), index=True)
+    # GiST-indexed for the cartridge's % (Tanimoto) and # (Dice) similarity operators
+    morgan_fp = Column(BfpType())
+    rdkit_fp = Column(BfpType())
+    # Set bits of each fingerprint, bounding popcount-limited (Tversky) scans
+    morgan_popcount = Column(Integer, index=True)
+    rdkit_popcount = Column(Integer, index=True)
+    # GiST-indexed for substructure (@>) searches; a btree cannot serve them
+    mol = Column(MolType())
 
     # Establish a relationship to ParentMolecule
     parent_molecule = relationship("ParentMolecule", back_populates="children")
+
+    # Synonyms are stored one per row in molecule_synonyms
+    synonym_entries = relationship(
+        "MoleculeSynonym",
+        lazy="selectin",
+        cascade="all, delete-orphan",
+        order_by="MoleculeSynonym.name",
+    )
     
+    __table_args__ = (
+        Index(
+            "ix_molecules_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index("ix_molecules_mol_gist", "mol", postgresql_using="gist"),
+        Index("ix_molecules_morgan_fp_gist", "morgan_fp", postgresql_using="gist"),
+        Index("ix_molecules_rdkit_fp_gist", "rdkit_fp", postgresql_using="gist"),
+    )
+
+    @property
+    def synonyms(self):
+        """Synonyms as the comma-joined string exposed by the API."""
+        if not self.synonym_entries:
+            return None
+        return ", ".join(entry.name for entry in self.synonym_entries)
+
+    @synonyms.setter
+    def synonyms(self, value):
+        """Replace the synonyms from a comma-separated string, keeping unchanged rows."""
+        names = [n.strip() for n in value.split(",") if n.strip()] if value else []
+        existing = {entry.name_normalized: entry for entry in self.synonym_entries}
+        entries = {}
+        for name in names:
+            key = normalize_synonym(name)
+            if key not in entries:
+                entries[key] = existing.get(key) or MoleculeSynonym(
+                    name=name, name_normalized=key
+                )
+        self.synonym_entries = list(entries.values())
+
+    def add_synonym(self, name: str) -> bool:
+        """Add a synonym unless an equivalent one exists. Returns True if it was added."""
+        key = normalize_synonym(name)
+        if not key or any(e.name_normalized == key for e in self.synonym_entries):
+            return False
+        self.synonym_entries.append(MoleculeSynonym(name=name.strip(), name_normalized=key))
+        return True
+
     def __repr__(self):
         return f"id: {self.id}, name: {self.name}, synonyms: {self.synonyms}"
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+from app.db.models.molecule import BfpType
+from app.utils.molecules.fingerprints import side_table_fingerprints
+
+
+def fingerprint_index_name(name: str) -> str:
+    return f"ix_molecule_fingerprints_{name}"
+
+
+def fingerprint_index(name: str) -> Index:
+    """Partial GiST index serving similarity searches on one fingerprint definition."""
+    return Index(
+        fingerprint_index_name(name),
+        "fp",
+        postgresql_using="gist",
+        postgresql_where=text(f"fp_name = '{name}'"),
+    )
+
+
+class MoleculeFingerprint(Base):
+    __tablename__ = "molecule_fingerprints"
+
+    molecule_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("molecules.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # Name of the definition in the fingerprint registry
+    fp_name = Column(String, primary_key=True)
+    fp = Column(BfpType(), nullable=False)
+    popcount = Column(Integer)
+
+    __table_args__ = (
+        Index("ix_molecule_fingerprints_fp_name_popcount", "fp_name", "popcount"),
+        *(fingerprint_index(name) for name in side_table_fingerprints()),
+    )
+
+    def __repr__(self):
+        return f"molecule_id: {self.molecule_id}, fp_name: {self.fp_name}"
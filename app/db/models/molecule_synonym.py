@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+
+
+class MoleculeSynonym(Base):
+    __tablename__ = "molecule_synonyms"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    molecule_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("molecules.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    name_normalized = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("molecule_id", "name_normalized"),
+        # Equality and prefix (LIKE 'x%') lookups
+        Index(
+            "ix_molecule_synonyms_name_normalized",
+            "name_normalized",
+            postgresql_ops={"name_normalized": "text_pattern_ops"},
+        ),
+        # Substring and similarity lookups
+        Index(
+            "ix_molecule_synonyms_name_normalized_trgm",
+            "name_normalized",
+            postgresql_using="gin",
+            postgresql_ops={"name_normalized": "gin_trgm_ops"},
+        ),
+    )
+
+    def __repr__(self):
+        return f"molecule_id: {self.molecule_id}, name: {self.name}"
@@ -0,0 +1,64 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+from app.db.with_metadata import WithMetadata
+from sqlalchemy.orm import relationship
+
+
+class NearDuplicateRun(Base, WithMetadata):
+    __tablename__ = "near_duplicate_runs"
+
+    id = Column(
+        UUID(as_uuid=True), primary_key=True, index=True, unique=True, nullable=False
+    )
+    threshold = Column(Float, nullable=False)
+    # pending, running, completed or failed
+    state = Column(String, nullable=False, default="pending")
+    n_molecules = Column(Integer, default=0)
+    total_blocks = Column(Integer, default=0)
+    processed_blocks = Column(Integer, default=0)
+    n_pairs = Column(Integer, default=0)
+    error = Column(String, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    pairs = relationship(
+        "NearDuplicate", back_populates="run", cascade="all, delete-orphan"
+    )
+
+    def __repr__(self):
+        return f"id: {self.id}, threshold: {self.threshold}, state: {self.state}"
+
+
+class NearDuplicate(Base):
+    __tablename__ = "near_duplicates"
+
+    run_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("near_duplicate_runs.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    molecule_id_a = Column(
+        UUID(as_uuid=True),
+        ForeignKey("molecules.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    molecule_id_b = Column(
+        UUID(as_uuid=True),
+        ForeignKey("molecules.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    similarity = Column(Float, nullable=False)
+
+    run = relationship("NearDuplicateRun", back_populates="pairs")
+
+    __table_args__ = (
+        Index("ix_near_duplicates_run_id_similarity", "run_id", "similarity"),
+        Index("ix_near_duplicates_molecule_id_b", "molecule_id_b"),
+    )
+
+    def __repr__(self):
+        return (
+            f"run_id: {self.run_id}, molecule_id_a: {self.molecule_id_a}, "
+            f"molecule_id_b: {self.molecule_id_b}, similarity: {self.similarity}"
+        )
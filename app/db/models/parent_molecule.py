@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean
+from sqlalchemy import Column, Integer, String, Float, Boolean, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
 from sqlalchemy.types import UserDefinedType
@@ -11,9 +11,19 @@ class MolType(UserDefinedType):
 
 
 class BfpType(UserDefinedType):
+    """Binary fingerprint, exchanged as packed bytes (RDKit BitVectToBinaryText layout)."""
+
+    cache_ok = True
+
     def get_col_spec(self):
         return "bfp"
 
+    def bind_expression(self, bindvalue):
+        return func.bfp_from_binary_text(bindvalue)
+
+    def column_expression(self, col):
+        return func.bfp_to_binary_text(col)
+
 
 class ParentMolecule(Base, WithMetadata):
     __tablename__ = "parent_molecules"
@@ -26,7 +36,7 @@ class ParentMolecule(Base, WithMetadata):
     smiles_canonical = Column(String, index=True)
     selfies = Column(String)
     inchi = Column(String)
-    inchi_key = Column(String)
+    inchi_key = Column(String, index=True)
     smarts = Column(String)
     
     mw = Column(Float)
@@ -55,13 +65,25 @@ class ParentMolecule(Base, WithMetadata):
     n_saturated_heterocycles = Column(Integer)
     n_saturated_rings = Column(Integer)
     ro5_compliant = Column(Boolean)
+    murcko_scaffold = Column(String)
+    generic_murcko_scaffold = Column(String, index=True)
+    murcko_scaffold_hash = Column(String, index=True)
     
     molblock = Column(String)
-    morgan_fp = Column(BfpType(), index=True)
+    # GiST-indexed for the cartridge's similarity operators (parent similarity search)
+    morgan_fp = Column(BfpType())
     rdkit_fp = Column(BfpType(), index=True)
+    # Set bits of each fingerprint, bounding popcount-limited (Tversky) scans
+    morgan_popcount = Column(Integer, index=True)
+    rdkit_popcount = Column(Integer, index=True)
     mol = Column(MolType(), index=True)
 
     # Establish a relationship to Molecule
     children = relationship("Molecule", back_populates="parent_molecule")
+
+    __table_args__ = (
+        Index("ix_parent_molecules_morgan_fp_gist", "morgan_fp", postgresql_using="gist"),
+    )
+
     def __repr__(self):
         return f"id: {self.id}, name: {self.name}"
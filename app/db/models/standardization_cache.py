@@ -0,0 +1,22 @@
+import datetime
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from app.db.base import Base
+
+
+class StandardizationCacheEntry(Base):
+    __tablename__ = "standardization_cache"
+
+    # sha1 of the cache kind and the raw input (SMILES or molblock)
+    key = Column(String(40), primary_key=True)
+    pipeline_version = Column(String(16), primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    result = Column(JSONB, nullable=False)
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.datetime.now(datetime.timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self):
+        return f"key: {self.key}, kind: {self.kind}, pipeline_version: {self.pipeline_version}"
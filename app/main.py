@@ -5,6 +5,18 @@ from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 from app.db.initializer import initialize_db
 from app.middleware.logs.api_logs import log_requests
+from app.core.process_pool import shutdown_process_pool
+from app.services.molecule.backfill import (
+    start_fingerprint_reencode,
+    stop_fingerprint_reencode,
+)
+from app.services.molecule.name_index import build_name_index
+from app.services.molcal.near_duplicates import fail_interrupted_near_duplicate_runs
+from app.services.molecule.lsh_index import load_lsh_index, stop_lsh_index
+from app.services.molecule.standardization_store import (
+    start_standardization_cache,
+    stop_standardization_cache,
+)
 # Load environment variables from a .env file
 load_dotenv()
 
@@ -15,10 +27,39 @@ async def lifespan(app: FastAPI):
     logger.info("Application startup")
     logger.info("Initializing db")
     await initialize_db()
+    try:
+        await start_standardization_cache()
+    except Exception as e:
+        # Standardization falls back to the in-process cache only
+        logger.error(f"Error starting the persistent standardization cache: {e}")
+    try:
+        await build_name_index()
+    except Exception as e:
+        # Autocomplete stays empty until the next restart; the rest of the API is unaffected
+        logger.error(f"Error building molecule name index: {e}")
+    try:
+        await load_lsh_index()
+    except Exception as e:
+        # Approximate searches fall back to exact search until the index is rebuilt
+        logger.error(f"Error loading approximate similarity index: {e}")
+    try:
+        await fail_interrupted_near_duplicate_runs()
+    except Exception as e:
+        # Interrupted runs stay pending or running and block new ones
+        logger.error(f"Error failing interrupted near-duplicate runs: {e}")
+    try:
+        start_fingerprint_reencode()
+    except Exception as e:
+        # Bitstring fingerprints stay out of similarity searches until backfilled
+        logger.error(f"Error starting fingerprint re-encode: {e}")
     logger.info("Ready to accept requests")
     yield
     # Shutdown code executed when the application is stopping
     logger.info("Application shutdown")
+    await stop_standardization_cache()
+    await stop_lsh_index()
+    await stop_fingerprint_reencode()
+    shutdown_process_pool()
 
 
 # Instantiate the FastAPI application with the custom lifespan context
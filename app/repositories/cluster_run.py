@@ -0,0 +1,223 @@
+from sqlalchemy import UUID, delete, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.exc import IntegrityError
+from app.db.models.cluster_run import ClusterRun, ClusterCentroid, ClusterMember
+from app.db.models.molecule import Molecule
+from app.core.logging_config import logger
+from app.repositories.molecule import packed_fingerprint_condition
+from fastapi import HTTPException
+from typing import List, Dict, Any
+
+
+# Fetch a cluster run by its ID
+async def get_cluster_run(db: AsyncSession, id: UUID):
+    try:
+        logger.debug(f"Fetching cluster run with ID: {id}")
+        result = await db.execute(select(ClusterRun).filter(ClusterRun.id == id))
+        db_cluster_run = result.scalar()
+        if not db_cluster_run:
+            logger.info(f"Cluster run with ID {id} not found")
+            return None
+        return db_cluster_run
+    except Exception as e:
+        logger.error(f"Error fetching cluster run with ID {id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+async def get_cluster_centroids(db: AsyncSession, run_id: UUID) -> List[ClusterCentroid]:
+    """
+    Fetch the centroids of a cluster run ordered by cluster number.
+    """
+    result = await db.execute(
+        select(ClusterCentroid)
+        .filter(ClusterCentroid.run_id == run_id)
+        .order_by(ClusterCentroid.cluster)
+    )
+    return result.scalars().all()
+
+
+async def get_cluster_member_ids(db: AsyncSession, run_id: UUID) -> List[UUID]:
+    """
+    Fetch the molecule IDs assigned to a cluster run.
+    """
+    result = await db.execute(
+        select(ClusterMember.molecule_id).filter(ClusterMember.run_id == run_id)
+    )
+    return result.scalars().all()
+
+
+async def get_cluster_members(db: AsyncSession, run_id: UUID) -> List[Dict[str, Any]]:
+    """
+    Fetch the members of a cluster run with their name, canonical SMILES and centroid flag.
+    """
+    result = await db.execute(
+        select(
+            ClusterMember.molecule_id.label("id"),
+            Molecule.name,
+            Molecule.smiles_canonical.label("smiles"),
+            ClusterMember.cluster,
+            (ClusterCentroid.id.is_not(None)).label("centroid"),
+        )
+        .join(Molecule, Molecule.id == ClusterMember.molecule_id)
+        .outerjoin(
+            ClusterCentroid,
+            (ClusterCentroid.run_id == ClusterMember.run_id)
+            & (ClusterCentroid.cluster == ClusterMember.cluster)
+            & (ClusterCentroid.molecule_id == ClusterMember.molecule_id),
+        )
+        .filter(ClusterMember.run_id == run_id)
+        .order_by(ClusterMember.cluster)
+    )
+    return result.mappings().all()
+
+
+async def create_cluster_run(
+    db: AsyncSession,
+    cluster_run: ClusterRun,
+    centroids: List[Dict[str, Any]],
+    members: List[Dict[str, Any]],
+) -> ClusterRun:
+    """
+    Persist a new cluster run with its centroids and members in one transaction.
+    """
+    try:
+        db.add(cluster_run)
+        await db.flush()
+        await _insert_assignments(db, centroids, members)
+        await db.commit()
+        await db.refresh(cluster_run)
+        logger.info(
+            f"Cluster run {cluster_run.name} created with {len(centroids)} clusters and {len(members)} members."
+        )
+        return cluster_run
+    except IntegrityError as e:
+        logger.error(f"Cluster run name already exists: {cluster_run.name} {e}")
+        await db.rollback()
+        raise HTTPException(
+            status_code=400, detail="Cluster run with this name already exists."
+        )
+    except Exception as e:
+        logger.error(f"Error creating cluster run: {e}")
+        await db.rollback()
+        raise
+
+
+async def add_cluster_assignments(
+    db: AsyncSession,
+    cluster_run: ClusterRun,
+    centroids: List[Dict[str, Any]],
+    members: List[Dict[str, Any]],
+) -> ClusterRun:
+    """
+    Append newly opened centroids and newly assigned members to an existing cluster run.
+
+    The counters are recounted from the tables, since members that are already
+    assigned are skipped and deleted molecules cascade out of the run.
+    """
+    try:
+        await _insert_assignments(db, centroids, members)
+        await _recount_assignments(db, cluster_run)
+        await db.commit()
+        await db.refresh(cluster_run)
+        return cluster_run
+    except Exception as e:
+        logger.error(f"Error adding assignments to cluster run {cluster_run.id}: {e}")
+        await db.rollback()
+        raise
+
+
+async def replace_cluster_assignments(
+    db: AsyncSession,
+    cluster_run: ClusterRun,
+    centroids: List[Dict[str, Any]],
+    members: List[Dict[str, Any]],
+) -> ClusterRun:
+    """
+    Replace all centroids and members of a cluster run, used when reclustering.
+    """
+    try:
+        await db.execute(
+            delete(ClusterMember).where(ClusterMember.run_id == cluster_run.id)
+        )
+        await db.execute(
+            delete(ClusterCentroid).where(ClusterCentroid.run_id == cluster_run.id)
+        )
+        await _insert_assignments(db, centroids, members)
+        cluster_run.n_clusters = len(centroids)
+        cluster_run.n_members = len(members)
+        await db.commit()
+        await db.refresh(cluster_run)
+        return cluster_run
+    except Exception as e:
+        logger.error(f"Error replacing assignments of cluster run {cluster_run.id}: {e}")
+        await db.rollback()
+        raise
+
+
+async def restore_missing_centroids(db: AsyncSession, run_id: UUID) -> List[int]:
+    """
+    Give clusters whose centroid molecule was deleted a new centroid.
+
+    Deleting a molecule cascades to its centroid row and leaves the other members of
+    the cluster without one, so nothing new could join the cluster and its number could
+    be handed out again. The member with the lowest molecule ID and a packed Morgan
+    fingerprint becomes the centroid instead.
+
+    Returns:
+        List[int]: The clusters that got a new centroid.
+    """
+    result = await db.execute(
+        text(
+            f"""
+            INSERT INTO cluster_centroids (run_id, cluster, molecule_id, fingerprint)
+            SELECT DISTINCT ON (cluster_members.cluster)
+                   cluster_members.run_id, cluster_members.cluster, molecules.id,
+                   bfp_to_binary_text(molecules.morgan_fp)
+            FROM cluster_members
+            JOIN molecules ON molecules.id = cluster_members.molecule_id
+            WHERE cluster_members.run_id = :run_id
+              AND {packed_fingerprint_condition("molecules.morgan_fp")}
+              AND NOT EXISTS (
+                  SELECT 1 FROM cluster_centroids
+                  WHERE cluster_centroids.run_id = cluster_members.run_id
+                    AND cluster_centroids.cluster = cluster_members.cluster
+              )
+            ORDER BY cluster_members.cluster, molecules.id
+            RETURNING cluster
+            """
+        ),
+        {"run_id": run_id},
+    )
+    clusters = result.scalars().all()
+    if clusters:
+        logger.info(f"Restored centroids of {len(clusters)} clusters in run {run_id}")
+    return clusters
+
+
+async def _recount_assignments(db: AsyncSession, cluster_run: ClusterRun):
+    cluster_run.n_clusters = await db.scalar(
+        select(func.count())
+        .select_from(ClusterCentroid)
+        .filter(ClusterCentroid.run_id == cluster_run.id)
+    )
+    cluster_run.n_members = await db.scalar(
+        select(func.count())
+        .select_from(ClusterMember)
+        .filter(ClusterMember.run_id == cluster_run.id)
+    )
+
+
+async def _insert_assignments(
+    db: AsyncSession, centroids: List[Dict[str, Any]], members: List[Dict[str, Any]]
+):
+    if centroids:
+        await db.execute(insert(ClusterCentroid), centroids)
+    if members:
+        await db.execute(
+            insert(ClusterMember).on_conflict_do_nothing(
+                index_elements=["run_id", "molecule_id"]
+            ),
+            members,
+        )
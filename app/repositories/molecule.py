@@ -2,16 +2,58 @@ from sqlalchemy import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.db.models.molecule import Molecule
+from app.db.models.molecule_synonym import MoleculeSynonym
 from app.schemas.molecule import MoleculeBase, MoleculeCreate, MoleculeUpdate
 from app.core.logging_config import logger
 from fastapi import HTTPException
 from app.schemas.similar_molecule_dto import SimilarMoleculeDto
-from app.utils.molecules import fp_gen
-from app.utils.molecules.helper import standardize_smiles
+from app.repositories.molecule_fingerprint import upsert_molecule_fingerprints
+from app.utils.molecules import fp_gen, fingerprints
+from app.utils.molecules.fingerprints import FINGERPRINT_COLUMNS
+from app.utils.molecules.fp_similarity import FP_SIZE, popcount, tversky_popcount_bounds
+from app.utils.molecules.helper import standardize_smiles, normalize_synonym
+from app.utils.molecules.substructure import validate_substructure_query
+from app.utils.molecules.registration_hash import (
+    compute_registration_hashes,
+    dedup_column,
+)
 import datamol as dm
+from rdkit import DataStructs
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.sql import text, or_
-from typing import List, Dict, Any, Tuple
+from sqlalchemy.sql import text, or_, func, case, exists, any_, bindparam
+from sqlalchemy import String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Dict, Any, Optional, Tuple
+
+# Lowest Morgan similarity a fused search pulls candidates from
+FUSED_MIN_CANDIDATE_THRESHOLD = 0.3
+
+# Synonyms live in molecule_synonyms; raw SQL searches aggregate them back into
+# the comma-joined form returned by the API
+SYNONYMS_COLUMN = """(
+    SELECT string_agg(s.name, ', ' ORDER BY s.name)
+    FROM molecule_synonyms s
+    WHERE s.molecule_id = molecules.id
+) AS synonyms"""
+
+
+# Filter keys generate_filter_conditions turns into SQL conditions
+FILTER_KEYS = frozenset(
+    f"{name}_{bound}"
+    for name in (
+        "molecular_weight",
+        "clogp",
+        "lipinski_hbd",
+        "lipinski_hba",
+        "tpsa",
+        "rotatable_bonds",
+        "heavy_atoms",
+        "aromatic_rings",
+        "rings",
+    )
+    for bound in ("min", "max")
+)
 
 
 def generate_filter_conditions(filters: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
@@ -137,28 +179,65 @@ async def get_molecules(db: AsyncSession, ids: List[UUID]):
 
 
 # Fetch molecule by name, return similar names and if name is found in synonyms
-async def get_molecule_by_name(db: AsyncSession, name: str, limit: int = 100):
+async def get_molecule_by_name(
+    db: AsyncSession, name: str, limit: int = 100, ranked: bool = False
+):
     try:
         logger.info(
-            f"Fetching molecules with name or matching in synonyms: {name} (limit: {limit})"
+            f"Fetching molecules with name or matching in synonyms: {name} (limit: {limit}, ranked: {ranked})"
         )
 
-        # Query to find molecules with matching name or in synonyms with limit
-        result = await db.execute(
-            select(Molecule)
-            .filter(
-                or_(
-                    Molecule.name.ilike(
-                        f"%{name}%"
-                    ),  # Case-insensitive partial match for name
-                    Molecule.synonyms.ilike(
-                        f"%{name}%"
-                    ),  # Check in synonyms field (case-insensitive)
-                )
+        normalized_name = normalize_synonym(name)
+
+        def synonym_match(condition):
+            return exists().where(
+                MoleculeSynonym.molecule_id == Molecule.id, condition
             )
-            .limit(limit)
+
+        # Case-insensitive partial match on name or synonyms; served by the trigram GIN indexes
+        name_filter = or_(
+            Molecule.name.ilike(f"%{name}%"),
+            synonym_match(MoleculeSynonym.name_normalized.like(f"%{normalized_name}%")),
         )
 
+        if ranked:
+            # Also accept close trigram matches, then rank exact > prefix > similarity
+            name_filter = or_(
+                name_filter,
+                Molecule.name.op("%")(name),
+                synonym_match(MoleculeSynonym.name_normalized.op("%")(normalized_name)),
+            )
+            exact_match = or_(
+                func.lower(Molecule.name) == name.lower(),
+                synonym_match(MoleculeSynonym.name_normalized == normalized_name),
+            )
+            prefix_match = or_(
+                Molecule.name.ilike(f"{name}%"),
+                synonym_match(
+                    MoleculeSynonym.name_normalized.like(f"{normalized_name}%")
+                ),
+            )
+            match_rank = case((exact_match, 0), (prefix_match, 1), else_=2)
+            synonym_score = (
+                select(func.max(func.similarity(MoleculeSynonym.name_normalized, normalized_name)))
+                .where(MoleculeSynonym.molecule_id == Molecule.id)
+                .scalar_subquery()
+            )
+            match_score = func.greatest(
+                func.similarity(Molecule.name, name),
+                func.coalesce(synonym_score, 0),
+            )
+            query = (
+                select(Molecule)
+                .filter(name_filter)
+                .order_by(match_rank, match_score.desc())
+                .limit(limit)
+            )
+        else:
+            query = select(Molecule).filter(name_filter).limit(limit)
+
+        result = await db.execute(query)
+
         # Fetch all matching molecules up to the limit
         db_molecules = result.scalars().all()
 
@@ -176,15 +255,22 @@ async def get_molecule_by_name(db: AsyncSession, name: str, limit: int = 100):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-async def get_molecule_by_smiles(db: AsyncSession, smiles_canonical: str):
+async def get_molecule_by_smiles(
+    db: AsyncSession, smiles_canonical: str, dedup_level: str = "exact"
+):
+    column = dedup_column(dedup_level)
     try:
         logger.debug(f"Fetching molecule with SMILES : {smiles_canonical}")
         # standardize the smiles
         std_smiles_canonical = standardize_smiles(smiles_canonical)
-        result = await db.execute(
-            select(Molecule).filter(Molecule.smiles_canonical == std_smiles_canonical)
+        key = (
+            std_smiles_canonical
+            if dedup_level == "exact"
+            else compute_registration_hashes(std_smiles_canonical)[column]
+        )
+        db_molecule = await get_molecule_by_dedup_key(
+            db, key, dedup_level, std_smiles_canonical
         )
-        db_molecule = result.scalar()
         if not db_molecule:
             logger.debug(f"Molecule with SMILES {smiles_canonical} not found")
             return None
@@ -198,6 +284,161 @@ async def get_molecule_by_smiles(db: AsyncSession, smiles_canonical: str):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+async def get_molecule_by_dedup_key(
+    db: AsyncSession,
+    key: Optional[str],
+    dedup_level: str = "exact",
+    smiles_canonical: Optional[str] = None,
+):
+    """
+    Fetches the earliest registered molecule sharing a dedup key, using the indexed
+    column of the dedup level (canonical SMILES or a registration hash layer).
+
+    At the looser levels a molecule with the same canonical SMILES is always a match
+    too, so rows whose hash layers are NULL (registered before the hashes existed, or
+    where InChI generation failed) are still found. A missing key only matches on SMILES.
+    """
+    column = getattr(Molecule, dedup_column(dedup_level))
+    conditions = []
+    if key is not None:
+        conditions.append(column == key)
+    if dedup_level != "exact" and smiles_canonical is not None:
+        conditions.append(Molecule.smiles_canonical == smiles_canonical)
+    if not conditions:
+        return None
+    result = await db.execute(
+        select(Molecule)
+        .filter(or_(*conditions))
+        .order_by(Molecule._created_at)
+        .limit(1)
+    )
+    return result.scalar()
+
+
+async def get_molecule_fingerprints(
+    db: AsyncSession,
+    ids: List[UUID] = None,
+    filters: Dict[str, Any] = None,
+    limit: int = None,
+):
+    """
+    Fetches stored Morgan fingerprints in bulk, selected by IDs and/or property filters.
+
+    Args:
+        db (AsyncSession): Database session to execute the query.
+        ids (List[UUID], optional): Restrict the result to these molecule IDs.
+        filters (Dict[str, Any], optional): Optional filters for molecular properties.
+        limit (int, optional): Maximum number of rows to return.
+
+    Returns:
+        List[Dict[str, Any]]: Rows with 'id', 'name', 'smiles_canonical' and the raw 'morgan_fp' bytes.
+    """
+    try:
+        sql_query = """
+            SELECT id, name, smiles_canonical,
+                   bfp_to_binary_text(morgan_fp) AS morgan_fp
+            FROM molecules
+            WHERE morgan_fp IS NOT NULL
+        """
+        parameters = {}
+
+        if ids is not None:
+            sql_query += " AND id = ANY(:ids)"
+            parameters["ids"] = list(ids)
+
+        filter_conditions, filter_params = generate_filter_conditions(filters)
+        if filter_conditions:
+            sql_query += " AND " + filter_conditions
+        parameters.update(filter_params)
+
+        sql_query += " ORDER BY id"
+        if limit is not None:
+            sql_query += " LIMIT :limit"
+            parameters["limit"] = limit
+
+        result = await db.execute(text(sql_query), parameters)
+        rows = result.mappings().all()
+
+        logger.info(f"Fetched {len(rows)} stored fingerprints")
+        return rows
+
+    except Exception as e:
+        logger.error(f"Error fetching stored fingerprints: {e}")
+        raise
+
+
+async def get_molecules_by_inchikeys(
+    db: AsyncSession, inchi_keys: List[str]
+) -> Dict[str, List[Molecule]]:
+    """
+    Fetches molecules for many InChIKeys with a single `= ANY(:array)` query on the
+    compact inchi_key index.
+
+    Args:
+        db (AsyncSession): Database session to execute the query.
+        inchi_keys (List[str]): Standard 27-character InChIKeys.
+
+    Returns:
+        Dict[str, List[Molecule]]: Found molecules grouped by InChIKey, earliest
+        registered first. Different canonical SMILES (e.g. some tautomers) can share a key.
+    """
+    if not inchi_keys:
+        return {}
+    try:
+        result = await db.execute(
+            select(Molecule)
+            .filter(
+                Molecule.inchi_key
+                == any_(bindparam("inchi_keys", list(set(inchi_keys)), type_=ARRAY(String)))
+            )
+            .order_by(Molecule._created_at)
+        )
+        found = {}
+        for molecule in result.scalars().all():
+            found.setdefault(molecule.inchi_key, []).append(molecule)
+        logger.info(f"Found molecules for {len(found)} of {len(inchi_keys)} InChIKeys")
+        return found
+    except Exception as e:
+        logger.error(f"Error fetching molecules by InChIKeys: {e}")
+        raise
+
+
+async def get_molecules_by_dedup_keys(
+    db: AsyncSession, keys: List[str], dedup_level: str = "exact"
+) -> Dict[str, Molecule]:
+    """
+    Fetches molecules for many dedup keys with a single `= ANY(:array)` query.
+
+    Args:
+        db (AsyncSession): Database session to execute the query.
+        keys (List[str]): Standardized canonical SMILES, or registration hashes of the dedup level.
+        dedup_level (str): One of 'exact', 'stereo', 'tautomer' or 'connectivity'.
+
+    Returns:
+        Dict[str, Molecule]: Found molecules keyed by dedup key. When several molecules
+        share a key, the earliest registered one is returned.
+    """
+    if not keys:
+        return {}
+    column_name = dedup_column(dedup_level)
+    column = getattr(Molecule, column_name)
+    try:
+        result = await db.execute(
+            select(Molecule)
+            .filter(column == any_(bindparam("keys", list(set(keys)), type_=ARRAY(String))))
+            .order_by(Molecule._created_at)
+        )
+        molecules = result.scalars().all()
+        logger.info(f"Found {len(molecules)} molecules for {len(keys)} {dedup_level} keys")
+        found = {}
+        for molecule in molecules:
+            found.setdefault(getattr(molecule, column_name), molecule)
+        return found
+    except Exception as e:
+        logger.error(f"Error fetching molecules by {dedup_level} keys: {e}")
+        raise
+
+
 # Create a new molecule and commit it to the database
 async def create_molecule(db: AsyncSession, molecule: MoleculeCreate):
     try:
@@ -209,10 +450,21 @@ async def create_molecule(db: AsyncSession, molecule: MoleculeCreate):
         # Fingerprints
         db_molecule.morgan_fp = fp_gen.generate_morgan_fp(db_molecule.mol)
         db_molecule.rdkit_fp = fp_gen.generate_rdkit_fp(db_molecule.mol)
+        db_molecule.morgan_popcount = popcount(db_molecule.morgan_fp)
+        db_molecule.rdkit_popcount = popcount(db_molecule.rdkit_fp)
+        side_table_fps = fp_gen.generate_side_table_fingerprints(db_molecule.mol)
 
         logger.debug(f"Inserting molecule: {db_molecule}")
 
         db.add(db_molecule)
+        await db.flush()
+        await upsert_molecule_fingerprints(
+            db,
+            [
+                {"molecule_id": db_molecule.id, "fp_name": fp_name, **values}
+                for fp_name, values in side_table_fps.items()
+            ],
+        )
         await db.commit()
         await db.refresh(db_molecule)
         logger.debug(f"Molecule created successfully: {db_molecule}")
@@ -282,6 +534,87 @@ async def delete_molecule(db: AsyncSession, id: UUID):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+def similarity_score(metric: str, fp_column: str, query_param: str) -> str:
+    """SQL expression scoring a stored fingerprint against a query fingerprint parameter."""
+    query_fp = f"bfp_from_binary_text(:{query_param})"
+    if metric == "tversky":
+        return f"tversky_sml({fp_column}, {query_fp}, :tversky_alpha, :tversky_beta)"
+    return f"{metric}_sml({fp_column}, {query_fp})"
+
+
+def packed_fingerprint_condition(fp_column: str) -> str:
+    """
+    SQL condition keeping rows whose fingerprint is stored packed (FP_SIZE / 8 bytes).
+
+    Rows registered before fingerprints were packed hold '0'/'1' bitstrings that score
+    meaninglessly against packed query fingerprints; they are left out of similarity
+    searches until the fingerprint backfill re-encodes them.
+    """
+    return f"length(bfp_to_binary_text({fp_column})) = {FP_SIZE // 8}"
+
+
+async def similarity_condition(
+    db: AsyncSession,
+    metric: str,
+    fp_column: str,
+    popcount_column: str,
+    query_param: str,
+    threshold: float,
+    query_popcount: int,
+    tversky_alpha: float = 1.0,
+    tversky_beta: float = 1.0,
+) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Build the score expression of a metric and a condition keeping rows that reach the
+    threshold.
+
+    Tanimoto and Dice use the cartridge's operators (% and #), served by the GiST
+    indexes on morgan_fp and rdkit_fp; their thresholds are set for the current
+    transaction. Tversky has no operator, so its
+    score is only computed for rows whose popcount can reach the threshold.
+
+    Args:
+        db (AsyncSession): Session whose transaction runs the search.
+        metric (str): 'tanimoto', 'dice' or 'tversky'.
+        fp_column (str): SQL expression of the stored fingerprint.
+        popcount_column (str): SQL expression of its popcount.
+        query_param (str): Name of the bind parameter holding the query fingerprint.
+        threshold (float): Minimum score.
+        query_popcount (int): Set bits of the query fingerprint.
+        tversky_alpha (float): Tversky weight of bits only set in the stored fingerprint.
+        tversky_beta (float): Tversky weight of bits only set in the query.
+
+    Returns:
+        Tuple[str, str, Dict[str, Any]]: The score expression, the condition and the
+        bind parameters they use besides the query fingerprint.
+    """
+    score = similarity_score(metric, fp_column, query_param)
+
+    if metric in ("tanimoto", "dice"):
+        operator = "%" if metric == "tanimoto" else "#"
+        await db.execute(
+            text(f"SELECT set_config('rdkit.{metric}_threshold', :threshold, true)"),
+            {"threshold": str(threshold)},
+        )
+        return score, f"{fp_column} {operator} bfp_from_binary_text(:{query_param})", {}
+
+    popcount_min, popcount_max = tversky_popcount_bounds(
+        query_popcount, threshold, tversky_alpha, tversky_beta
+    )
+    condition = f"{popcount_column} >= :{query_param}_popcount_min"
+    params = {
+        "tversky_alpha": tversky_alpha,
+        "tversky_beta": tversky_beta,
+        f"{query_param}_popcount_min": popcount_min,
+        f"{query_param}_threshold": threshold,
+    }
+    if popcount_max is not None:
+        condition += f" AND {popcount_column} <= :{query_param}_popcount_max"
+        params[f"{query_param}_popcount_max"] = popcount_max
+    condition += f" AND {score} >= :{query_param}_threshold"
+    return score, condition, params
+
+
 # Similarity search
 async def search_similar_molecules(
     db: AsyncSession,
@@ -289,9 +622,18 @@ async def search_similar_molecules(
     threshold: float = 0.9,
     limit: int = 100,
     filters: Dict[str, Any] = None,
+    fp_name: str = "morgan",
+    metric: str = "tanimoto",
+    tversky_alpha: float = 1.0,
+    tversky_beta: float = 1.0,
+    candidate_ids: Optional[List[UUID]] = None,
 ) -> List[SimilarMoleculeDto]:
     """
-    Searches for molecules with a Tanimoto similarity score above the given threshold.
+    Searches for molecules with a similarity score above the given threshold.
+
+    Fingerprints other than the ones stored on molecules are read from the
+    molecule_fingerprints table, so molecules not yet covered by their backfill are
+    not found.
 
     Args:
         db (AsyncSession): Database session to execute the query.
@@ -299,20 +641,71 @@ async def search_similar_molecules(
         threshold (float, optional): The similarity score threshold. Defaults to 0.9.
         limit (int, optional): Maximum number of results to return. Defaults to 100.
         filters (Dict[str, Any], optional): Optional filters for molecular properties.
+        fp_name (str, optional): Registered fingerprint to compare. Defaults to 'morgan'.
+        metric (str, optional): 'tanimoto', 'dice' or 'tversky'. Defaults to 'tanimoto'.
+        tversky_alpha (float, optional): Tversky weight of bits only set in the stored
+            molecule; keep it low to find compounds containing a query fragment.
+        tversky_beta (float, optional): Tversky weight of bits only set in the query.
+        candidate_ids (List[UUID], optional): Only score these molecules, e.g. the
+            candidates of the approximate index, by primary key instead of an index scan.
 
     Returns:
         List[Dict[str, Any]]: A list of dictionaries containing the molecule details and similarity score.
     """
     try:
         # Convert SMILES to fingerprint
-        query_fp = fp_gen.generate_morgan_fp(query_smiles)
+        config = fingerprints.get_config(fp_name)
+        query_fp = DataStructs.BitVectToBinaryText(
+            fingerprints.generate(query_smiles, config)
+        )
+
+        # Stored fingerprints come from a molecules column or from the side table. The
+        # validated name is inlined so the planner can match its partial index.
+        if fp_name in FINGERPRINT_COLUMNS:
+            fp_column = FINGERPRINT_COLUMNS[fp_name]
+            popcount_column = f"{fp_name}_popcount"
+            fp_join = ""
+            packed_condition = packed_fingerprint_condition(fp_column)
+        else:
+            fp_column = "mf.fp"
+            popcount_column = "mf.popcount"
+            fp_join = (
+                "JOIN molecule_fingerprints mf ON mf.molecule_id = molecules.id "
+                f"AND mf.fp_name = '{fp_name}'"
+            )
+            # The side table has only ever held packed fingerprints
+            packed_condition = None
+
+        if candidate_ids is not None:
+            score = similarity_score(metric, fp_column, "query_fp")
+            condition = f"molecules.id = ANY(:candidate_ids) AND {score} >= :threshold"
+            metric_params = {"candidate_ids": candidate_ids, "threshold": threshold}
+            if metric == "tversky":
+                metric_params.update(
+                    {"tversky_alpha": tversky_alpha, "tversky_beta": tversky_beta}
+                )
+        else:
+            score, condition, metric_params = await similarity_condition(
+                db,
+                metric,
+                fp_column,
+                popcount_column,
+                "query_fp",
+                threshold,
+                popcount(query_fp),
+                tversky_alpha,
+                tversky_beta,
+            )
+        if packed_condition is not None:
+            condition += f" AND {packed_condition}"
 
         # Base SQL query
-        sql_query = """
-            SELECT *, 
-                   tanimoto_sml(morgan_fp, :query_fp) AS similarity
+        sql_query = f"""
+            SELECT molecules.*, {SYNONYMS_COLUMN},
+                   {score} AS similarity
             FROM molecules
-            WHERE tanimoto_sml(morgan_fp, :query_fp) >= :threshold
+            {fp_join}
+            WHERE {condition}
         """
 
         # Generate filter conditions and parameters
@@ -334,9 +727,9 @@ async def search_similar_molecules(
         # Define the parameters, including the dynamic filters
         parameters = {
             "query_fp": query_fp,
-            "threshold": threshold,
             "limit": limit,
         }
+        parameters.update(metric_params)
         parameters.update(filter_params)
 
         # Execute the query with parameters
@@ -345,7 +738,9 @@ async def search_similar_molecules(
         # Fetch all results and return as a list of dictionaries
         molecules = result.mappings().all()
 
-        logger.info(f"Found {len(molecules)} molecules with similarity > {threshold}")
+        logger.info(
+            f"Found {len(molecules)} molecules with {metric} similarity > {threshold}"
+        )
         return molecules
 
     except Exception as e:
@@ -353,31 +748,166 @@ async def search_similar_molecules(
         raise
 
 
+# Fused similarity search
+async def search_similar_molecules_fused(
+    db: AsyncSession,
+    query_smiles: str,
+    threshold: float = 0.7,
+    limit: int = 100,
+    filters: Dict[str, Any] = None,
+    morgan_weight: float = 0.5,
+    metric: str = "tanimoto",
+    tversky_alpha: float = 1.0,
+    tversky_beta: float = 1.0,
+) -> List[SimilarMoleculeDto]:
+    """
+    Searches for molecules ranked by a weighted combination of Morgan and RDKit scores.
+
+    Candidates come from an index-backed Morgan pass (the cartridge's threshold operators
+    on ix_molecules_morgan_fp_gist, or the morgan_popcount index range for Tversky);
+    only they are scored on both fingerprints, in the same query. The Morgan cutoff is
+    the lowest Morgan score that can still reach the fused threshold, floored at
+    FUSED_MIN_CANDIDATE_THRESHOLD so the pass stays selective.
+
+    Args:
+        db (AsyncSession): Database session to execute the query.
+        query_smiles (str): The SMILES string of the query molecule.
+        threshold (float, optional): The fused score threshold. Defaults to 0.7.
+        limit (int, optional): Maximum number of results to return. Defaults to 100.
+        filters (Dict[str, Any], optional): Optional filters for molecular properties.
+        morgan_weight (float, optional): Weight of the Morgan score; RDKit gets the rest.
+            Defaults to 0.5.
+        metric (str, optional): 'tanimoto', 'dice' or 'tversky'. Defaults to 'tanimoto'.
+        tversky_alpha (float, optional): Tversky weight of bits only set in the stored molecule.
+        tversky_beta (float, optional): Tversky weight of bits only set in the query.
+
+    Returns:
+        List[Dict[str, Any]]: Molecule details with the fused 'similarity' and the
+        'morgan_similarity' and 'rdkit_similarity' it combines.
+    """
+    try:
+        query_morgan_fp = fp_gen.generate_morgan_fp(query_smiles)
+        query_rdkit_fp = fp_gen.generate_rdkit_fp(query_smiles)
+
+        # fused >= t with rdkit <= 1 requires morgan >= (t - (1 - w)) / w
+        candidate_threshold = FUSED_MIN_CANDIDATE_THRESHOLD
+        if morgan_weight > 0:
+            candidate_threshold = max(
+                (threshold - (1 - morgan_weight)) / morgan_weight,
+                FUSED_MIN_CANDIDATE_THRESHOLD,
+            )
+
+        morgan_score, candidate_condition, morgan_params = await similarity_condition(
+            db,
+            metric,
+            "morgan_fp",
+            "morgan_popcount",
+            "morgan_fp",
+            candidate_threshold,
+            popcount(query_morgan_fp),
+            tversky_alpha,
+            tversky_beta,
+        )
+        # The RDKit score is computed for the candidates only, so it needs no bounds
+        rdkit_score = similarity_score(metric, "rdkit_fp", "rdkit_fp")
+
+        sql_query = f"""
+            WITH candidates AS (
+                SELECT id,
+                       {morgan_score} AS morgan_similarity,
+                       {rdkit_score} AS rdkit_similarity
+                FROM molecules
+                WHERE {candidate_condition}
+                  AND {packed_fingerprint_condition("morgan_fp")}
+                  AND {packed_fingerprint_condition("rdkit_fp")}
+        """
+        # Property filters narrow the candidates before they are scored
+        filter_conditions, filter_params = generate_filter_conditions(filters)
+        if filter_conditions:
+            sql_query += " AND " + filter_conditions
+
+        sql_query += f"""
+            ), scored AS (
+                SELECT id, morgan_similarity, rdkit_similarity,
+                       :morgan_weight * morgan_similarity
+                       + (1 - :morgan_weight) * rdkit_similarity AS similarity
+                FROM candidates
+            )
+            SELECT molecules.*, {SYNONYMS_COLUMN},
+                   scored.similarity, scored.morgan_similarity, scored.rdkit_similarity
+            FROM scored
+            JOIN molecules ON molecules.id = scored.id
+            WHERE scored.similarity >= :threshold
+            ORDER BY scored.similarity DESC
+            LIMIT :limit;
+        """
+
+        parameters = {
+            "morgan_fp": query_morgan_fp,
+            "rdkit_fp": query_rdkit_fp,
+            "morgan_weight": morgan_weight,
+            "threshold": threshold,
+            "limit": limit,
+        }
+        parameters.update(morgan_params)
+        parameters.update(filter_params)
+
+        result = await db.execute(text(sql_query), parameters)
+        molecules = result.mappings().all()
+
+        logger.info(
+            f"Found {len(molecules)} molecules with fused {metric} similarity > {threshold} "
+            f"(Morgan candidate cutoff {candidate_threshold:.2f})"
+        )
+        return molecules
+
+    except Exception as e:
+        logger.error(f"Error executing fused similarity search: {e}")
+        raise
+
+
 # Substructure search
+def substructure_query(mode: str, query_param: str) -> str:
+    """
+    SQL expression building the query molecule from a text parameter. It does not depend
+    on the row, so it is evaluated once and `mol @> <query>` can use the GiST index on mol.
+    """
+    query_text = f"CAST(CAST(:{query_param} AS text) AS cstring)"
+    if mode == "smarts":
+        return f"qmol_from_smarts({query_text})"
+    return f"mol_from_smiles({query_text})"
+
+
 async def search_substructure_molecules(
     db: AsyncSession,
     query_smiles: str,
     limit: int = 100,
     filters: Dict[str, Any] = None,
+    mode: str = "smiles",
 ) -> List[MoleculeBase]:
     """
     Searches for molecules containing the query molecule as a substructure with optional filters.
 
     Args:
         db (AsyncSession): Database session to execute the query.
-        query_smiles (str): The SMILES string of the query molecule.
+        query_smiles (str): The SMILES (or SMARTS) string of the query.
         limit (int, optional): Maximum number of results to return. Defaults to 100.
         filters (Dict[str, Any], optional): Optional filters for molecular properties.
+        mode (str, optional): 'smiles' or 'smarts'. Defaults to 'smiles'.
 
     Returns:
         List[Dict[str, Any]]: A list of dictionaries containing the molecule details.
+
+    Raises:
+        ValueError: If the mode is unknown or the query cannot be parsed.
     """
+    validate_substructure_query(query_smiles, mode)
     try:
         # Base SQL query
-        sql_query = """
-            SELECT *
+        sql_query = f"""
+            SELECT molecules.*, {SYNONYMS_COLUMN}
             FROM molecules
-            WHERE mol @> :query_smiles
+            WHERE mol @> {substructure_query(mode, "query_smiles")}
         """
 
         # Generate filter conditions and parameters
@@ -422,40 +952,50 @@ async def search_substructure_multiple(
     condition: str = "OR",
     limit: int = 100,
     filters: Dict[str, Any] = None,
+    mode: str = "smiles",
 ) -> List[MoleculeBase]:
     """
     Performs a substructure search to find molecules containing any of the provided substructures with optional filters.
 
     Args:
         db (AsyncSession): The database session to execute queries.
-        smiles_list (List[str]): A list of SMILES representations of the query substructures.
+        smiles_list (List[str]): A list of SMILES (or SMARTS) representations of the query substructures.
         condition (str, optional): The logical condition to combine the substructure matches ('OR' or 'AND'). Defaults to "OR".
         limit (int, optional): Maximum number of results to return. Defaults to 100.
         filters (Dict[str, Any], optional): Optional filters for molecular properties.
+        mode (str, optional): 'smiles' or 'smarts', applied to every query. Defaults to 'smiles'.
 
     Returns:
         List[Dict[str, Any]]: A list of dictionaries representing the molecules that match the substructures.
+
+    Raises:
+        ValueError: If the condition or mode is invalid or a query cannot be parsed.
     """
-    try:
-        logger.info(
-            f"Starting substructure search with {len(smiles_list)} substructures..."
-        )
+    logger.info(f"Starting substructure search with {len(smiles_list)} substructures...")
 
-        # Ensure condition is valid
-        condition = condition.upper()
-        if condition not in ["OR", "AND"]:
-            raise ValueError("Invalid condition. Must be 'OR' or 'AND'.")
+    # Ensure condition is valid
+    condition = condition.upper()
+    if condition not in ["OR", "AND"]:
+        raise ValueError("Invalid condition. Must be 'OR' or 'AND'.")
+    if not smiles_list:
+        raise ValueError("At least one substructure query must be provided.")
+    for query_smiles in smiles_list:
+        validate_substructure_query(query_smiles, mode)
 
+    try:
         # Construct the substructure conditions dynamically
         substructure_conditions = f" {condition} ".join(
-            [f"mol @> :smiles_{i}" for i in range(len(smiles_list))]
+            [
+                f"mol @> {substructure_query(mode, f'smiles_{i}')}"
+                for i in range(len(smiles_list))
+            ]
         )
 
         # Base SQL query with substructure conditions
         sql_query = f"""
-            SELECT *
+            SELECT molecules.*, {SYNONYMS_COLUMN}
             FROM molecules
-            WHERE {substructure_conditions}
+            WHERE ({substructure_conditions})
         """
 
         # Generate filter conditions and parameters using the helper function
@@ -497,15 +1037,44 @@ async def search_substructure_multiple(
         )
 
 
-async def bulk_create_molecules(new_molecules, db: AsyncSession):
+async def add_molecule_synonyms(db: AsyncSession, synonyms: List[Dict[str, Any]]):
+    """
+    Bulk insert synonyms, skipping names a molecule already has.
+
+    :param synonyms: Rows with 'molecule_id', 'name' and 'name_normalized'.
+    :param db: AsyncSession to interact with the database.
+    """
+    if not synonyms:
+        return
+    try:
+        await db.execute(
+            insert(MoleculeSynonym).on_conflict_do_nothing(
+                index_elements=["molecule_id", "name_normalized"]
+            ),
+            synonyms,
+        )
+        await db.commit()
+        logger.info(f"Inserted up to {len(synonyms)} synonyms.")
+    except Exception as e:
+        logger.error(f"Error inserting synonyms: {e}")
+        await db.rollback()
+        raise e
+
+
+async def bulk_create_molecules(new_molecules, db: AsyncSession, fingerprint_rows=None):
     """
     Bulk create new molecules in the database.
 
     :param new_molecules: List of molecules to be created.
     :param db: AsyncSession to interact with the database.
+    :param fingerprint_rows: Side-table fingerprint rows of the molecules, inserted in
+        the same transaction.
     """
     try:
         db.add_all(new_molecules)
+        if fingerprint_rows:
+            await db.flush()
+            await upsert_molecule_fingerprints(db, fingerprint_rows)
         await db.commit()
         logger.info(f"Successfully created {len(new_molecules)} molecules.")
     except Exception as e:
@@ -0,0 +1,45 @@
+from typing import Any, Dict, List
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.logging_config import logger
+from app.db.models.molecule_fingerprint import MoleculeFingerprint, fingerprint_index_name
+from app.utils.molecules.fingerprints import get_config
+
+
+async def ensure_fingerprint_index(db: AsyncSession, fp_name: str):
+    """
+    Create the partial GiST index of a fingerprint definition if it does not exist yet,
+    so definitions added to the registry are indexed without a migration.
+    """
+    # The name is interpolated into the DDL, so it must be a registered definition
+    get_config(fp_name)
+    index_name = fingerprint_index_name(fp_name)
+    await db.execute(
+        text(
+            f"""
+            CREATE INDEX IF NOT EXISTS {index_name} ON molecule_fingerprints
+            USING gist (fp) WHERE fp_name = '{fp_name}'
+            """
+        )
+    )
+    await db.commit()
+    logger.info(f"Ensured index {index_name} for fingerprint '{fp_name}'.")
+
+
+async def upsert_molecule_fingerprints(db: AsyncSession, rows: List[Dict[str, Any]]):
+    """
+    Upsert fingerprint rows ('molecule_id', 'fp_name', 'fp', 'popcount').
+    """
+    if rows:
+        statement = insert(MoleculeFingerprint)
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["molecule_id", "fp_name"],
+                set_={
+                    "fp": statement.excluded.fp,
+                    "popcount": statement.excluded.popcount,
+                },
+            ),
+            rows,
+        )
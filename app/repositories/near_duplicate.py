@@ -0,0 +1,164 @@
+import datetime
+from sqlalchemy import UUID, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import aliased
+from app.db.models.near_duplicate import NearDuplicateRun, NearDuplicate
+from app.db.models.molecule import Molecule
+from app.core.logging_config import logger
+from fastapi import HTTPException
+from typing import List, Dict, Any
+
+# States of a run that has not finished
+ACTIVE_STATES = ("pending", "running")
+
+
+# Fetch a near-duplicate run by its ID
+async def get_near_duplicate_run(db: AsyncSession, id: UUID):
+    try:
+        logger.debug(f"Fetching near-duplicate run with ID: {id}")
+        result = await db.execute(
+            select(NearDuplicateRun).filter(NearDuplicateRun.id == id)
+        )
+        db_run = result.scalar()
+        if not db_run:
+            logger.info(f"Near-duplicate run with ID {id} not found")
+            return None
+        return db_run
+    except Exception as e:
+        logger.error(f"Error fetching near-duplicate run with ID {id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+async def get_active_near_duplicate_run(db: AsyncSession):
+    """
+    Fetch a pending or running near-duplicate run, if there is one.
+    """
+    result = await db.execute(
+        select(NearDuplicateRun)
+        .filter(NearDuplicateRun.state.in_(ACTIVE_STATES))
+        .limit(1)
+    )
+    return result.scalar()
+
+
+async def fail_active_near_duplicate_runs(db: AsyncSession, error: str) -> int:
+    """
+    Mark every pending or running near-duplicate run as failed, returning how many were.
+    """
+    try:
+        result = await db.execute(
+            update(NearDuplicateRun)
+            .where(NearDuplicateRun.state.in_(ACTIVE_STATES))
+            .values(
+                state="failed",
+                error=error,
+                finished_at=datetime.datetime.now(datetime.timezone.utc),
+            )
+        )
+        await db.commit()
+        return result.rowcount
+    except Exception as e:
+        logger.error(f"Error failing interrupted near-duplicate runs: {e}")
+        await db.rollback()
+        raise
+
+
+async def create_near_duplicate_run(
+    db: AsyncSession, run: NearDuplicateRun
+) -> NearDuplicateRun:
+    try:
+        db.add(run)
+        await db.commit()
+        await db.refresh(run)
+        return run
+    except Exception as e:
+        logger.error(f"Error creating near-duplicate run: {e}")
+        await db.rollback()
+        raise
+
+
+async def update_near_duplicate_run(
+    db: AsyncSession, run: NearDuplicateRun, **values
+) -> NearDuplicateRun:
+    """
+    Set columns of a run (state, progress counters, ...) and commit.
+    """
+    try:
+        for name, value in values.items():
+            setattr(run, name, value)
+        await db.commit()
+        await db.refresh(run)
+        return run
+    except Exception as e:
+        logger.error(f"Error updating near-duplicate run {run.id}: {e}")
+        await db.rollback()
+        raise
+
+
+async def add_near_duplicates(
+    db: AsyncSession,
+    run: NearDuplicateRun,
+    pairs: List[Dict[str, Any]],
+    processed_blocks: int,
+) -> NearDuplicateRun:
+    """
+    Insert the pairs found by a batch of blocks and advance the run's progress in one
+    transaction, so the counters always match the stored pairs.
+    """
+    try:
+        if pairs:
+            await db.execute(
+                insert(NearDuplicate).on_conflict_do_nothing(
+                    index_elements=["run_id", "molecule_id_a", "molecule_id_b"]
+                ),
+                pairs,
+            )
+        run.processed_blocks = (run.processed_blocks or 0) + processed_blocks
+        run.n_pairs = (run.n_pairs or 0) + len(pairs)
+        await db.commit()
+        await db.refresh(run)
+        return run
+    except Exception as e:
+        logger.error(f"Error adding pairs to near-duplicate run {run.id}: {e}")
+        await db.rollback()
+        raise
+
+
+async def get_near_duplicates(
+    db: AsyncSession,
+    run_id: UUID,
+    min_similarity: float = 0.0,
+    limit: int = 100,
+    offset: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch the pairs of a run, most similar first, with the names and canonical SMILES
+    of both molecules.
+    """
+    molecule_a = aliased(Molecule)
+    molecule_b = aliased(Molecule)
+    result = await db.execute(
+        select(
+            NearDuplicate.molecule_id_a,
+            molecule_a.name.label("name_a"),
+            molecule_a.smiles_canonical.label("smiles_a"),
+            NearDuplicate.molecule_id_b,
+            molecule_b.name.label("name_b"),
+            molecule_b.smiles_canonical.label("smiles_b"),
+            NearDuplicate.similarity,
+        )
+        .join(molecule_a, molecule_a.id == NearDuplicate.molecule_id_a)
+        .join(molecule_b, molecule_b.id == NearDuplicate.molecule_id_b)
+        .filter(NearDuplicate.run_id == run_id)
+        .filter(NearDuplicate.similarity >= min_similarity)
+        .order_by(
+            NearDuplicate.similarity.desc(),
+            NearDuplicate.molecule_id_a,
+            NearDuplicate.molecule_id_b,
+        )
+        .limit(limit)
+        .offset(offset)
+    )
+    return result.mappings().all()
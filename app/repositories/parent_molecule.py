@@ -6,7 +6,15 @@ from app.schemas.parent_molecule import ParentMoleculeCreate, ParentMoleculeUpda
 from app.core.logging_config import logger
 from fastapi import HTTPException
 from app.utils.molecules import fp_gen
+from app.utils.molecules.fp_similarity import popcount
 from app.utils.molecules.helper import standardize_smiles
+from app.repositories.molecule import (
+    generate_filter_conditions,
+    packed_fingerprint_condition,
+    similarity_condition,
+)
+from sqlalchemy.sql import text
+from typing import Any, Dict, List
 import datamol as dm
 from chembl_structure_pipeline import standardizer
 
@@ -91,6 +99,8 @@ async def create_parent_molecule(db: AsyncSession, molecule: ParentMoleculeCreat
         # Fingerprints
         db_parent_molecule.morgan_fp = fp_gen.generate_morgan_fp(db_parent_molecule.mol)
         db_parent_molecule.rdkit_fp = fp_gen.generate_rdkit_fp(db_parent_molecule.mol)
+        db_parent_molecule.morgan_popcount = popcount(db_parent_molecule.morgan_fp)
+        db_parent_molecule.rdkit_popcount = popcount(db_parent_molecule.rdkit_fp)
 
         db.add(db_parent_molecule)
         await db.commit()
@@ -171,3 +181,115 @@ async def bulk_create_parent_molecules(new_parent_molecules, db: AsyncSession):
         raise e
 
 
+
+
+# Columns left out of expanded children: binary cartridge types and molblocks
+CHILD_EXCLUDED_COLUMNS = ["morgan_fp", "rdkit_fp", "mol", "o_molblock", "std_molblock"]
+
+
+# Parent-level similarity search
+async def search_similar_parents(
+    db: AsyncSession,
+    query_smiles: str,
+    threshold: float = 0.7,
+    limit: int = 100,
+    filters: Dict[str, Any] = None,
+    metric: str = "tanimoto",
+    tversky_alpha: float = 1.0,
+    tversky_beta: float = 1.0,
+    include_children: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Searches parent molecules by Morgan similarity, so salts and solvates of one parent
+    give a single hit.
+
+    Args:
+        db (AsyncSession): Database session to execute the query.
+        query_smiles (str): The SMILES string of the query molecule.
+        threshold (float, optional): The similarity score threshold. Defaults to 0.7.
+        limit (int, optional): Maximum number of parents to return. Defaults to 100.
+        filters (Dict[str, Any], optional): Optional filters on the parent's properties.
+        metric (str, optional): 'tanimoto', 'dice' or 'tversky'. Defaults to 'tanimoto'.
+        tversky_alpha (float, optional): Tversky weight of bits only set in the stored parent.
+        tversky_beta (float, optional): Tversky weight of bits only set in the query.
+        include_children (bool, optional): Also return the registered molecules of each
+            parent, fetched in the same query. Defaults to False.
+
+    Returns:
+        List[Dict[str, Any]]: Parent details with 'similarity', 'n_children' and, when
+        requested, 'children'.
+    """
+    try:
+        query_fp = fp_gen.generate_morgan_fp(query_smiles)
+        score, condition, metric_params = await similarity_condition(
+            db,
+            metric,
+            "morgan_fp",
+            "morgan_popcount",
+            "query_fp",
+            threshold,
+            popcount(query_fp),
+            tversky_alpha,
+            tversky_beta,
+        )
+
+        sql_query = f"""
+            WITH hits AS (
+                SELECT parent_molecules.*, {score} AS similarity
+                FROM parent_molecules
+                WHERE {condition}
+                  AND {packed_fingerprint_condition("morgan_fp")}
+        """
+
+        filter_conditions, filter_params = generate_filter_conditions(filters)
+        if filter_conditions:
+            sql_query += " AND " + filter_conditions
+
+        if include_children:
+            excluded = ", ".join(f"'{column}'" for column in CHILD_EXCLUDED_COLUMNS)
+            children_column = f"""
+                COALESCE(
+                    jsonb_agg(
+                        (to_jsonb(m) - ARRAY[{excluded}])
+                        || jsonb_build_object('synonyms', (
+                            SELECT string_agg(s.name, ', ' ORDER BY s.name)
+                            FROM molecule_synonyms s
+                            WHERE s.molecule_id = m.id
+                        ))
+                        ORDER BY m.name
+                    ),
+                    '[]'::jsonb
+                )"""
+        else:
+            children_column = "NULL::jsonb"
+
+        # Children are counted (and optionally collected) per hit in the same query
+        sql_query += f"""
+                ORDER BY similarity DESC
+                LIMIT :limit
+            )
+            SELECT hits.*, expansion.n_children, expansion.children
+            FROM hits
+            LEFT JOIN LATERAL (
+                SELECT COUNT(*) AS n_children, {children_column} AS children
+                FROM molecules m
+                WHERE m.parent_id = hits.id
+            ) expansion ON true
+            ORDER BY hits.similarity DESC;
+        """
+
+        parameters = {"query_fp": query_fp, "limit": limit}
+        parameters.update(metric_params)
+        parameters.update(filter_params)
+
+        result = await db.execute(text(sql_query), parameters)
+        parents = result.mappings().all()
+
+        logger.info(
+            f"Found {len(parents)} parent molecules with {metric} similarity > {threshold}"
+        )
+        return parents
+
+    except Exception as e:
+        logger.error(f"Error executing parent similarity search: {e}")
+        raise
@@ -0,0 +1,79 @@
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.db.models.molecule import Molecule
+from app.db.models.parent_molecule import ParentMolecule
+from app.core.logging_config import logger
+from typing import List, Dict, Any
+
+
+async def get_scaffold_counts(
+    db: AsyncSession,
+    generic: bool = False,
+    parents: bool = False,
+    min_count: int = 1,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """
+    Counts molecules per Murcko scaffold with an indexed GROUP BY on the precomputed columns.
+
+    Args:
+        db (AsyncSession): Database session to execute the query.
+        generic (bool): Group by the generic scaffold instead of the exact one.
+        parents (bool): Group parent molecules instead of molecules.
+        min_count (int): Only return scaffolds with at least this many molecules.
+        limit (int): Maximum number of scaffolds to return, largest groups first.
+
+    Returns:
+        List[Dict[str, Any]]: Rows with 'scaffold', 'scaffold_hash' (exact scaffolds only) and 'count'.
+    """
+    model = ParentMolecule if parents else Molecule
+    count = func.count().label("count")
+
+    if generic:
+        query = select(
+            model.generic_murcko_scaffold.label("scaffold"),
+            count,
+        ).group_by(model.generic_murcko_scaffold)
+        key = model.generic_murcko_scaffold
+    else:
+        query = select(
+            func.min(model.murcko_scaffold).label("scaffold"),
+            model.murcko_scaffold_hash.label("scaffold_hash"),
+            count,
+        ).group_by(model.murcko_scaffold_hash)
+        key = model.murcko_scaffold_hash
+
+    query = (
+        query.where(key.is_not(None))
+        .having(func.count() >= min_count)
+        .order_by(count.desc())
+        .limit(limit)
+    )
+
+    result = await db.execute(query)
+    rows = result.mappings().all()
+    logger.info(f"Fetched {len(rows)} scaffold groups from {model.__tablename__}")
+    return rows
+
+
+async def get_molecules_by_scaffold(
+    db: AsyncSession,
+    scaffold_hash: str = None,
+    generic_scaffold: str = None,
+    limit: int = 100,
+) -> List[Molecule]:
+    """
+    Fetches molecules sharing an exact scaffold (by hash) or a generic scaffold (by SMILES).
+    """
+    if scaffold_hash is None and generic_scaffold is None:
+        raise ValueError("Either scaffold_hash or generic_scaffold must be provided.")
+
+    query = select(Molecule)
+    if scaffold_hash is not None:
+        query = query.where(Molecule.murcko_scaffold_hash == scaffold_hash)
+    if generic_scaffold is not None:
+        query = query.where(Molecule.generic_murcko_scaffold == generic_scaffold)
+
+    result = await db.execute(query.limit(limit))
+    return result.scalars().all()
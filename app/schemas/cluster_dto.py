@@ -1,5 +1,5 @@
 from pydantic import UUID4, BaseModel, ConfigDict
-from typing import Optional
+from typing import Dict, List, Optional
 
 class ClusterInputDto(BaseModel):
     id: UUID4
@@ -11,4 +11,10 @@ class ClusterOutputDto(BaseModel):
     name: Optional[str] = None
     smiles: str
     cluster: int
-    centroid: bool
\ No newline at end of file
+    centroid: bool
+
+class ClusterStoredInputDto(BaseModel):
+    ids: Optional[List[UUID4]] = None
+    filters: Optional[Dict[str, float]] = None
+    limit: Optional[int] = None
+    cutoff: float = 0.7
@@ -0,0 +1,20 @@
+from pydantic import UUID4, BaseModel
+from typing import List, Optional
+
+from app.schemas.cluster_dto import ClusterStoredInputDto
+
+
+class ClusterRunCreateDto(ClusterStoredInputDto):
+    name: str
+
+
+class ClusterRunDto(BaseModel):
+    id: UUID4
+    name: str
+    cutoff: float
+    n_clusters: Optional[int] = 0
+    n_members: Optional[int] = 0
+
+
+class ClusterAssignInputDto(BaseModel):
+    ids: List[UUID4]
@@ -0,0 +1,22 @@
+from pydantic import UUID4, BaseModel
+from typing import Dict, List, Optional
+
+from app.schemas.cluster_dto import ClusterInputDto
+
+
+class DiversityPickInputDto(BaseModel):
+    npick: int
+    ids: Optional[List[UUID4]] = None
+    filters: Optional[Dict[str, float]] = None
+    limit: Optional[int] = None
+    molecules: Optional[List[ClusterInputDto]] = None
+    seed_ids: Optional[List[UUID4]] = None
+    random_seed: int = 42
+
+
+class DiversityPickOutputDto(BaseModel):
+    id: UUID4
+    name: Optional[str] = None
+    smiles: str
+    pick_order: int
+    min_distance: Optional[float] = None
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import Optional
+
+from app.schemas.molecule import MoleculeBase
+
+
+class BulkLookupResultDto(BaseModel):
+    input: str
+    smiles_canonical: Optional[str] = None
+    found: bool = False
+    molecule: Optional[MoleculeBase] = None
+    error: Optional[str] = None
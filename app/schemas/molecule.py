@@ -41,6 +41,12 @@ class MoleculeBase(BaseModel):
     n_saturated_heterocycles: Optional[int] = Field(default=0)
     n_saturated_rings: Optional[int] = Field(default=0)
     ro5_compliant: Optional[bool] = Field(default=False)
+    murcko_scaffold: Optional[str] = None
+    generic_murcko_scaffold: Optional[str] = None
+    murcko_scaffold_hash: Optional[str] = None
+    hash_no_stereo: Optional[str] = None
+    hash_tautomer: Optional[str] = None
+    hash_connectivity: Optional[str] = None
 
 
 # Schema for creating a new molecule; inherits from MoleculeBase
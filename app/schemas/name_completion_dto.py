@@ -0,0 +1,7 @@
+from pydantic import UUID4, BaseModel
+
+
+class NameCompletionDto(BaseModel):
+    name: str
+    molecule_id: UUID4
+    synonym: bool = False
@@ -0,0 +1,33 @@
+from datetime import datetime
+from pydantic import UUID4, BaseModel
+from typing import Optional
+
+
+class NearDuplicateRunCreateDto(BaseModel):
+    # Morgan Tanimoto similarity at or above which two molecules are reported
+    threshold: float = 0.95
+    # Blocks computed concurrently by the process pool
+    parallelism: int = 4
+
+
+class NearDuplicateRunDto(BaseModel):
+    id: UUID4
+    threshold: float
+    state: str
+    n_molecules: Optional[int] = 0
+    total_blocks: Optional[int] = 0
+    processed_blocks: Optional[int] = 0
+    n_pairs: Optional[int] = 0
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class NearDuplicatePairDto(BaseModel):
+    molecule_id_a: UUID4
+    name_a: Optional[str] = None
+    smiles_a: Optional[str] = None
+    molecule_id_b: UUID4
+    name_b: Optional[str] = None
+    smiles_b: Optional[str] = None
+    similarity: float
@@ -38,6 +38,9 @@ class ParentMoleculeBase(BaseModel):
     n_saturated_heterocycles: Optional[int] = Field(default=0)
     n_saturated_rings: Optional[int] = Field(default=0)
     ro5_compliant: Optional[bool] = Field(default=False)
+    murcko_scaffold: Optional[str] = None
+    generic_murcko_scaffold: Optional[str] = None
+    murcko_scaffold_hash: Optional[str] = None
     
     molblock: Optional[str] = None
 
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import Optional
+
+from app.schemas.molecule import MoleculeBase
+
+
+class PropertiesInputDto(BaseModel):
+    id: Optional[str] = None
+    name: Optional[str] = None
+    smiles: str
+
+
+class MoleculePropertiesDto(MoleculeBase):
+    # Caller supplied reference, echoed back as is
+    id: Optional[str] = None
+    index: int
+    error: Optional[str] = None
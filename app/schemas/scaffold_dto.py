@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class ScaffoldCountDto(BaseModel):
+    scaffold: Optional[str] = None
+    scaffold_hash: Optional[str] = None
+    count: int
@@ -1,11 +1,15 @@
 from pydantic import BaseModel, Field, UUID4
-from typing import Optional
+from typing import List, Optional
 
 from app.schemas.molecule import MoleculeBase
+from app.schemas.parent_molecule import ParentMoleculeBase
 
 
 class SimilarMoleculeDto(MoleculeBase):
     similarity: float
+    # Component scores of a fused search
+    morgan_similarity: Optional[float] = None
+    rdkit_similarity: Optional[float] = None
 
     class Config:
         orm_mode = True
@@ -13,3 +17,10 @@ class SimilarMoleculeDto(MoleculeBase):
         json_encoders = {
             UUID4: lambda v: str(v),
         }
+
+
+class SimilarParentMoleculeDto(ParentMoleculeBase):
+    similarity: float
+    # Registered molecules (salts, solvates, ...) of the parent
+    n_children: int = 0
+    children: Optional[List[MoleculeBase]] = None
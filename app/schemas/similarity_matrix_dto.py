@@ -0,0 +1,13 @@
+from pydantic import UUID4, BaseModel
+from typing import List, Optional
+
+
+class SimilarityMatrixInputDto(BaseModel):
+    # Either stored molecules or SMILES; rows and columns follow the input order
+    ids: Optional[List[UUID4]] = None
+    smiles: Optional[List[str]] = None
+    # 'float16', or 'uint8' for similarities quantized to round(similarity * 255)
+    dtype: str = "float16"
+    # Return only the pairs i < j at or above `cutoff` instead of the dense matrix
+    sparse: bool = False
+    cutoff: float = 0.0
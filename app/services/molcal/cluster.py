@@ -1,11 +1,39 @@
-from typing import List
+import asyncio
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple
 import datamol as dm
+import numpy as np
 from pydantic import UUID4
-from app.schemas.cluster_dto import ClusterInputDto, ClusterOutputDto
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.cluster_dto import (
+    ClusterInputDto,
+    ClusterOutputDto,
+    ClusterStoredInputDto,
+)
 from app.core.logging_config import logger
+from app.core.process_pool import run_in_process_pool
+from app.repositories.molecule import FILTER_KEYS, get_molecule_fingerprints
+from app.utils.molecules import fingerprints
+from app.utils.molecules.fp_similarity import (
+    popcounts,
+    tanimoto_block,
+    tanimoto_to_many,
+    unpack_stored_fingerprints,
+)
 
-def cluster_molecules_with_centroids(
-    molecule_list: List[ClusterInputDto], cutoff=0.7
+CLUSTER_METHODS = ["butina", "sparse"]
+
+# Most stored molecules one clustering or diversity request may select
+MAX_STORED_CLUSTER_SIZE = 100000
+
+# Rows per task and columns per step of the sparse engine's similarity blocks
+NEIGHBOUR_BLOCK_SIZE = 256
+NEIGHBOUR_TILE_SIZE = 2048
+
+
+async def cluster_molecules_with_centroids(
+    molecule_list: List[ClusterInputDto], cutoff=0.7, method: str = "butina"
 ) -> List[ClusterOutputDto]:
     """
     Cluster molecules based on structural similarity and mark centroid molecules in the result.
@@ -14,6 +42,8 @@ def cluster_molecules_with_centroids(
         molecule_list (List[ClusterInputDto]): A list of ClusterInputDto objects, each containing 'id' (UUID4), 
                                                'name' (optional), and 'smiles' (SMILES representation of the molecule).
         cutoff (float): The similarity cutoff for clustering (default is 0.7).
+        method (str): The clustering engine, 'butina' (datamol, full distance matrix) or
+                      'sparse' (Butina over a thresholded neighbour list, for large sets).
 
     Returns:
         List[ClusterOutputDto]: A list of ClusterOutputDto objects with 'id' (UUID4), 'name', 'smiles', 'cluster', and 'centroid'.
@@ -23,6 +53,11 @@ def cluster_molecules_with_centroids(
     if not (0 < cutoff <= 1):
         raise ValueError("Invalid cutoff: Cutoff must be a float between 0 and 1.")
 
+    if method not in CLUSTER_METHODS:
+        raise ValueError(
+            f"Invalid method: {method}. Must be one of {', '.join(CLUSTER_METHODS)}."
+        )
+
     # Initialize lists to store canonical SMILES and RDKit Mol objects
     canonical_smiles_list = []
     mols = []
@@ -43,6 +78,11 @@ def cluster_molecules_with_centroids(
         except Exception as e:
             raise ValueError(f"Error processing molecule with ID {mol_data.id}: {e}")
 
+    if method == "sparse":
+        return await cluster_packed_fingerprints(
+            canonical_smiles_list, fingerprints.generate_batch(mols, packed=True), cutoff=cutoff
+        )
+
     # Cluster the molecules based on similarity
     try:
         clusters, mol_clusters = dm.cluster_mols(mols, cutoff=cutoff)
@@ -81,3 +121,282 @@ def cluster_molecules_with_centroids(
                 raise RuntimeError(f"Failed to find molecule data for SMILES: {mol_smiles}")
 
     return molecule_clusters
+
+
+async def cluster_stored_molecules(
+    db: AsyncSession, cluster_input: ClusterStoredInputDto
+) -> List[ClusterOutputDto]:
+    """
+    Cluster vault molecules selected by ID and/or property filters using their stored fingerprints.
+
+    No SMILES are parsed: the Morgan fingerprints are read from `molecules` in one
+    query and clustered with the sparse Butina engine.
+
+    Args:
+        db (AsyncSession): The database session to execute queries.
+        cluster_input (ClusterStoredInputDto): IDs and/or filters selecting the molecules, and the cutoff.
+
+    Returns:
+        List[ClusterOutputDto]: Clustered molecules with their canonical SMILES.
+    """
+    if not (0 < cluster_input.cutoff <= 1):
+        raise ValueError("Invalid cutoff: Cutoff must be a float between 0 and 1.")
+
+    rows = await load_stored_cluster_rows(
+        db, cluster_input.ids, cluster_input.filters, cluster_input.limit
+    )
+    if not rows:
+        return []
+
+    molecule_data = [
+        {"id": row["id"], "name": row["name"], "smiles": row["smiles_canonical"]}
+        for row in rows
+    ]
+    fps = unpack_stored_fingerprints([row["morgan_fp"] for row in rows])
+
+    return await cluster_packed_fingerprints(molecule_data, fps, cutoff=cluster_input.cutoff)
+
+
+async def load_stored_cluster_rows(
+    db: AsyncSession,
+    ids: Optional[List[UUID4]] = None,
+    filters: Optional[Dict[str, float]] = None,
+    limit: Optional[int] = None,
+) -> List[dict]:
+    """
+    Read the stored fingerprints of vault molecules selected by IDs and/or filters, as
+    for stored clustering, cluster runs and diversity picks.
+
+    The selection needs IDs or at least one filter, so an empty request never reads the
+    whole vault, and may not exceed MAX_STORED_CLUSTER_SIZE molecules.
+
+    Raises:
+        ValueError: If the selection is empty, unbounded or too large, or a filter key
+            is not one generate_filter_conditions recognizes.
+    """
+    if not ids and not filters:
+        raise ValueError("Either ids or filters must be provided.")
+    # Unknown keys would be ignored and silently widen the selection
+    unknown_filters = set(filters or ()) - FILTER_KEYS
+    if unknown_filters:
+        raise ValueError(f"Unknown filters: {', '.join(sorted(unknown_filters))}.")
+    if limit is not None and limit < 1:
+        raise ValueError("Invalid limit: Limit must be at least 1.")
+    if ids is not None and len(ids) > MAX_STORED_CLUSTER_SIZE:
+        raise ValueError(
+            f"Too many molecules: {len(ids)}. "
+            f"Stored selections are limited to {MAX_STORED_CLUSTER_SIZE}."
+        )
+
+    # One extra row tells an oversized selection apart from one that fits exactly
+    read_limit = MAX_STORED_CLUSTER_SIZE + 1
+    if limit is not None:
+        read_limit = min(limit, read_limit)
+    rows = await get_molecule_fingerprints(db, ids=ids, filters=filters, limit=read_limit)
+    if len(rows) > MAX_STORED_CLUSTER_SIZE:
+        raise ValueError(
+            f"Too many molecules: the selection matches more than {MAX_STORED_CLUSTER_SIZE}. "
+            "Narrow the filters or set a limit."
+        )
+    return rows
+
+
+async def cluster_packed_fingerprints(
+    molecule_data: List[dict], fps: np.ndarray, cutoff: float = 0.7
+) -> List[ClusterOutputDto]:
+    """
+    Cluster molecules from a packed fingerprint matrix using the sparse Butina engine.
+
+    Args:
+        molecule_data (List[dict]): One dict per fingerprint row with 'id', 'name' and 'smiles'.
+        fps (np.ndarray): Packed fingerprint matrix, rows aligned with molecule_data.
+        cutoff (float): The distance cutoff for clustering, as for the 'butina' method.
+
+    Returns:
+        List[ClusterOutputDto]: Clustered molecules; the first member of each cluster is its centroid.
+    """
+    try:
+        clusters = await butina_sparse(fps, cutoff=cutoff)
+    except Exception as e:
+        raise RuntimeError(f"Error during clustering: {e}")
+
+    molecule_clusters = []
+    for i, members in enumerate(clusters):
+        for position, index in enumerate(members):
+            mol_data = molecule_data[index]
+            molecule_clusters.append(
+                ClusterOutputDto(
+                    id=mol_data["id"],
+                    name=mol_data["name"],
+                    smiles=mol_data["smiles"],
+                    cluster=i + 1,  # Cluster number starts from 1 for readability
+                    centroid=position == 0,
+                )
+            )
+
+    return molecule_clusters
+
+
+async def butina_sparse(fps: np.ndarray, cutoff: float = 0.7) -> List[List[int]]:
+    """
+    Butina clustering over a thresholded neighbour list instead of a full distance matrix.
+
+    Only pairs within the distance cutoff are kept, and the similarity matrix is
+    computed block by block in the shared process pool, so memory grows with the number
+    of neighbours rather than with N^2. The matrix is written to a temporary file that
+    the workers memory-map together with its popcounts, so blocks are dispatched without
+    pickling it and the counts are computed only once. Results follow RDKit's Butina
+    ordering: points with the most neighbours become centroids first.
+
+    Args:
+        fps (np.ndarray): Packed fingerprint matrix.
+        cutoff (float): Distance cutoff (1 - Tanimoto similarity).
+
+    Returns:
+        List[List[int]]: Row indices per cluster, centroid first.
+    """
+    n = len(fps)
+    if n == 0:
+        return []
+    threshold = 1.0 - cutoff
+    blocks = [
+        (start, min(start + NEIGHBOUR_BLOCK_SIZE, n))
+        for start in range(0, n, NEIGHBOUR_BLOCK_SIZE)
+    ]
+
+    logger.debug(f"Computing neighbour lists for {n} molecules in {len(blocks)} blocks")
+    counts = popcounts(fps)
+    if len(blocks) == 1:
+        neighbours = await run_in_process_pool(
+            neighbours_in_block, fps, counts, threshold, 0, n
+        )
+    else:
+        with tempfile.NamedTemporaryFile(suffix=".fps", delete=False) as file:
+            path = file.name
+            np.ascontiguousarray(fps).tofile(file)
+            counts.astype(np.int32).tofile(file)
+        try:
+            results = await asyncio.gather(
+                *[
+                    run_in_process_pool(
+                        neighbours_in_file_block, path, *fps.shape, threshold, start, stop
+                    )
+                    for start, stop in blocks
+                ]
+            )
+        finally:
+            os.remove(path)
+        neighbours = [row for block in results for row in block]
+
+    # Points with more neighbours are considered first, ties broken by the higher index
+    order = sorted(range(n), key=lambda i: (len(neighbours[i]), i), reverse=True)
+    seen = np.zeros(n, dtype=bool)
+    clusters = []
+    for index in order:
+        if seen[index]:
+            continue
+        candidates = neighbours[index]
+        members = [index] + candidates[~seen[candidates]].tolist()
+        seen[members] = True
+        clusters.append(members)
+
+    logger.debug(f"Sparse Butina produced {len(clusters)} clusters")
+    return clusters
+
+
+def assign_to_centroids(
+    fps: np.ndarray, centroid_fps: np.ndarray, cutoff: float = 0.7
+) -> Tuple[np.ndarray, List[int]]:
+    """
+    Place molecules into the nearest existing centroid, opening new clusters where none is close enough.
+
+    Each molecule joins the most similar centroid within the distance cutoff. Molecules
+    left over are processed in order leader-style: a molecule opens a new cluster and
+    becomes its centroid unless a cluster opened earlier in the same call is within the
+    cutoff. The cost is O(len(fps) x centroids).
+
+    Args:
+        fps (np.ndarray): Packed fingerprints of the molecules to place.
+        centroid_fps (np.ndarray): Packed fingerprints of the existing centroids.
+        cutoff (float): Distance cutoff (1 - Tanimoto similarity).
+
+    Returns:
+        Tuple[np.ndarray, List[int]]: The centroid index of every molecule (existing centroids
+        are 0..k-1, newly opened ones follow in order) and the rows that became new centroids.
+    """
+    threshold = 1.0 - cutoff
+    labels = np.full(len(fps), -1, dtype=np.int64)
+    counts = popcounts(fps)
+
+    if len(centroid_fps):
+        centroid_counts = popcounts(centroid_fps)
+        for start in range(0, len(fps), NEIGHBOUR_BLOCK_SIZE):
+            stop = min(start + NEIGHBOUR_BLOCK_SIZE, len(fps))
+            similarities = tanimoto_block(
+                fps[start:stop], centroid_fps, counts[start:stop], centroid_counts
+            )
+            best = similarities.argmax(axis=1)
+            close = similarities[np.arange(stop - start), best] >= threshold
+            labels[start:stop][close] = best[close]
+
+    new_centroids = []
+    for index in np.flatnonzero(labels < 0).tolist():
+        if new_centroids:
+            similarities = tanimoto_to_many(
+                fps[index], fps[new_centroids], counts[index], counts[new_centroids]
+            )
+            best = int(similarities.argmax())
+            if similarities[best] >= threshold:
+                labels[index] = len(centroid_fps) + best
+                continue
+        labels[index] = len(centroid_fps) + len(new_centroids)
+        new_centroids.append(index)
+
+    return labels, new_centroids
+
+
+def neighbours_in_block(
+    fps: np.ndarray, counts: np.ndarray, threshold: float, start: int, stop: int
+) -> List[np.ndarray]:
+    """Return, for rows start..stop, the indices of all other rows with similarity >= threshold."""
+    rows = fps[start:stop]
+    row_counts = counts[start:stop]
+    hit_rows, hit_cols = [], []
+
+    # Walk the columns tile by tile so only a (block x tile) matrix is ever held
+    for col_start in range(0, len(fps), NEIGHBOUR_TILE_SIZE):
+        col_stop = min(col_start + NEIGHBOUR_TILE_SIZE, len(fps))
+        similarities = tanimoto_block(
+            rows, fps[col_start:col_stop], row_counts, counts[col_start:col_stop]
+        )
+        row_idx, col_idx = np.nonzero(similarities >= threshold)
+        hit_rows.append(row_idx)
+        hit_cols.append(col_idx + col_start)
+
+    hit_rows = np.concatenate(hit_rows)
+    hit_cols = np.concatenate(hit_cols).astype(np.int32)
+
+    # Exclude the molecule itself, then split the hits per row
+    keep = hit_cols != hit_rows + start
+    hit_rows, hit_cols = hit_rows[keep], hit_cols[keep]
+    order = np.argsort(hit_rows, kind="stable")
+    splits = np.cumsum(np.bincount(hit_rows, minlength=stop - start))[:-1]
+    return np.split(hit_cols[order], splits)
+
+
+def neighbours_in_file_block(
+    path: str, n_fps: int, n_words: int, threshold: float, start: int, stop: int
+) -> List[np.ndarray]:
+    """
+    `neighbours_in_block` over a packed matrix memory-mapped from a file, for a pool worker.
+
+    The file holds the matrix followed by its int32 popcounts, so no worker recounts it.
+    """
+    fps = np.memmap(path, dtype=np.uint64, mode="r", shape=(n_fps, n_words))
+    counts = np.memmap(
+        path, dtype=np.int32, mode="r", offset=fps.nbytes, shape=(n_fps,)
+    )
+    try:
+        return neighbours_in_block(fps, counts, threshold, start, stop)
+    finally:
+        del fps, counts
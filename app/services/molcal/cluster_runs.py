@@ -0,0 +1,178 @@
+import uuid
+from typing import List
+from sqlalchemy import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.logging_config import logger
+from app.db.models.cluster_run import ClusterRun
+from app.repositories import cluster_run as cluster_run_repo
+from app.repositories.molecule import get_molecule_fingerprints
+from app.schemas.cluster_dto import ClusterOutputDto
+from app.schemas.cluster_run_dto import ClusterRunCreateDto
+from app.services.molcal.cluster import (
+    assign_to_centroids,
+    butina_sparse,
+    load_stored_cluster_rows,
+)
+from app.utils.molecules.fp_similarity import unpack_stored_fingerprints
+
+
+async def create_cluster_run(
+    db: AsyncSession, run_input: ClusterRunCreateDto
+) -> ClusterRun:
+    """
+    Cluster stored vault molecules and persist the result as a named cluster run.
+
+    Args:
+        db (AsyncSession): The database session to execute queries.
+        run_input (ClusterRunCreateDto): The run name, the molecules to cluster (IDs and/or filters) and the cutoff.
+
+    Returns:
+        ClusterRun: The persisted cluster run.
+    """
+    if not (0 < run_input.cutoff <= 1):
+        raise ValueError("Invalid cutoff: Cutoff must be a float between 0 and 1.")
+
+    rows = await load_stored_cluster_rows(
+        db, run_input.ids, run_input.filters, run_input.limit
+    )
+    if not rows:
+        raise ValueError("No molecules with stored fingerprints matched the request.")
+
+    cluster_run = ClusterRun(id=uuid.uuid4(), name=run_input.name, cutoff=run_input.cutoff)
+    centroids, members = await _cluster_rows(cluster_run.id, rows, cluster_run.cutoff)
+    cluster_run.n_clusters = len(centroids)
+    cluster_run.n_members = len(members)
+
+    logger.info(
+        f"Cluster run {run_input.name}: {len(members)} molecules in {len(centroids)} clusters."
+    )
+    return await cluster_run_repo.create_cluster_run(db, cluster_run, centroids, members)
+
+
+async def recluster_run(db: AsyncSession, run_id: UUID) -> ClusterRun:
+    """
+    Recluster all current members of a cluster run from scratch and replace its assignments.
+
+    Args:
+        db (AsyncSession): The database session to execute queries.
+        run_id (UUID): The cluster run to recluster.
+
+    Returns:
+        ClusterRun: The updated cluster run.
+    """
+    cluster_run = await cluster_run_repo.get_cluster_run(db, run_id)
+    if cluster_run is None:
+        return None
+
+    member_ids = await cluster_run_repo.get_cluster_member_ids(db, run_id)
+    rows = await get_molecule_fingerprints(db, ids=member_ids) if member_ids else []
+    centroids, members = await _cluster_rows(cluster_run.id, rows, cluster_run.cutoff)
+
+    logger.info(
+        f"Reclustered run {cluster_run.name}: {len(members)} molecules in {len(centroids)} clusters."
+    )
+    return await cluster_run_repo.replace_cluster_assignments(
+        db, cluster_run, centroids, members
+    )
+
+
+async def assign_to_cluster_run(
+    db: AsyncSession, run_id: UUID, ids: List[UUID]
+) -> List[ClusterOutputDto]:
+    """
+    Incrementally place vault molecules into an existing cluster run.
+
+    Each molecule joins the nearest stored centroid within the run's cutoff, or opens a
+    new cluster. Existing assignments are not touched; molecules that are already members
+    of the run are skipped. Clusters whose centroid molecule was deleted get a remaining
+    member as their new centroid first.
+
+    Args:
+        db (AsyncSession): The database session to execute queries.
+        run_id (UUID): The cluster run to assign to.
+        ids (List[UUID]): The molecules to assign.
+
+    Returns:
+        List[ClusterOutputDto]: The assignments made, with 'centroid' set for newly opened clusters.
+    """
+    cluster_run = await cluster_run_repo.get_cluster_run(db, run_id)
+    if cluster_run is None:
+        return None
+
+    existing_members = set(await cluster_run_repo.get_cluster_member_ids(db, run_id))
+    new_ids = [id for id in dict.fromkeys(ids) if id not in existing_members]
+    rows = await get_molecule_fingerprints(db, ids=new_ids) if new_ids else []
+    if not rows:
+        return []
+
+    # Clusters that lost their centroid to a molecule delete get a new one first
+    await cluster_run_repo.restore_missing_centroids(db, run_id)
+    centroids = await cluster_run_repo.get_cluster_centroids(db, run_id)
+    centroid_fps = unpack_stored_fingerprints([c.fingerprint for c in centroids])
+    fps = unpack_stored_fingerprints([row["morgan_fp"] for row in rows])
+
+    labels, new_centroid_rows = assign_to_centroids(fps, centroid_fps, cluster_run.cutoff)
+
+    # Cluster numbers continue after the highest existing one
+    cluster_numbers = [c.cluster for c in centroids]
+    next_cluster = max(cluster_numbers, default=0) + 1
+    cluster_numbers += list(range(next_cluster, next_cluster + len(new_centroid_rows)))
+
+    new_centroids = [
+        {
+            "run_id": cluster_run.id,
+            "cluster": cluster_numbers[labels[index]],
+            "molecule_id": rows[index]["id"],
+            "fingerprint": fps[index].tobytes(),
+        }
+        for index in new_centroid_rows
+    ]
+    new_members = [
+        {"run_id": cluster_run.id, "molecule_id": row["id"], "cluster": cluster_numbers[label]}
+        for row, label in zip(rows, labels.tolist())
+    ]
+    await cluster_run_repo.add_cluster_assignments(
+        db, cluster_run, new_centroids, new_members
+    )
+
+    logger.info(
+        f"Assigned {len(new_members)} molecules to run {cluster_run.name}, "
+        f"opening {len(new_centroids)} new clusters."
+    )
+    new_centroid_set = set(new_centroid_rows)
+    return [
+        ClusterOutputDto(
+            id=row["id"],
+            name=row["name"],
+            smiles=row["smiles_canonical"],
+            cluster=cluster_numbers[label],
+            centroid=index in new_centroid_set,
+        )
+        for index, (row, label) in enumerate(zip(rows, labels.tolist()))
+    ]
+
+
+async def _cluster_rows(run_id, rows, cutoff: float):
+    """Cluster fingerprint rows and build the centroid and member records of a run."""
+    if not rows:
+        return [], []
+
+    fps = unpack_stored_fingerprints([row["morgan_fp"] for row in rows])
+    clusters = await butina_sparse(fps, cutoff=cutoff)
+
+    centroids, members = [], []
+    for i, cluster_rows in enumerate(clusters):
+        head = cluster_rows[0]
+        centroids.append(
+            {
+                "run_id": run_id,
+                "cluster": i + 1,
+                "molecule_id": rows[head]["id"],
+                "fingerprint": fps[head].tobytes(),
+            }
+        )
+        members.extend(
+            {"run_id": run_id, "molecule_id": rows[index]["id"], "cluster": i + 1}
+            for index in cluster_rows
+        )
+    return centroids, members
@@ -0,0 +1,174 @@
+from typing import List, Optional, Tuple
+import datamol as dm
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.logging_config import logger
+from app.core.process_pool import run_in_process_pool
+from app.repositories.molecule import get_molecule_fingerprints
+from app.utils.molecules import fingerprints
+from app.schemas.cluster_dto import ClusterInputDto
+from app.schemas.diversity_dto import DiversityPickInputDto, DiversityPickOutputDto
+from app.services.molcal.cluster import load_stored_cluster_rows
+from app.utils.molecules.fp_similarity import (
+    popcounts,
+    tanimoto_to_many,
+    unpack_stored_fingerprints,
+)
+
+# Rows per chunk when distances to a new pick are computed
+PICK_CHUNK_SIZE = 16384
+
+
+async def pick_diverse_molecules(
+    db: AsyncSession, pick_input: DiversityPickInputDto
+) -> List[DiversityPickOutputDto]:
+    """
+    Pick the most diverse molecules from a pool with the MaxMin algorithm.
+
+    The pool is either stored vault molecules (IDs and/or filters, using their stored
+    fingerprints) or molecules given as SMILES. Seed IDs are treated as already picked:
+    seeds in the pool are excluded from the result, seeds outside of it are fetched from
+    the vault and only push the picks away from them.
+
+    Args:
+        db (AsyncSession): The database session to execute queries.
+        pick_input (DiversityPickInputDto): The pool, the number of molecules to pick and the seeds.
+
+    Returns:
+        List[DiversityPickOutputDto]: The picked molecules in pick order.
+    """
+    if pick_input.npick <= 0:
+        raise ValueError("Invalid npick: npick must be a positive integer.")
+
+    if pick_input.molecules is not None:
+        molecule_data, fps = await run_in_process_pool(
+            fingerprint_input_molecules, pick_input.molecules
+        )
+    elif pick_input.ids is not None or pick_input.filters is not None:
+        rows = await load_stored_cluster_rows(
+            db, pick_input.ids, pick_input.filters, pick_input.limit
+        )
+        molecule_data = [
+            {"id": row["id"], "name": row["name"], "smiles": row["smiles_canonical"]}
+            for row in rows
+        ]
+        fps = unpack_stored_fingerprints([row["morgan_fp"] for row in rows])
+    else:
+        raise ValueError("Either molecules, ids or filters must be provided.")
+
+    if not molecule_data:
+        return []
+
+    # Split the seeds into pool rows and external fingerprints fetched from the vault
+    row_by_id = {str(m["id"]): i for i, m in enumerate(molecule_data)}
+    seed_ids = pick_input.seed_ids or []
+    seed_rows = [row_by_id[str(id)] for id in seed_ids if str(id) in row_by_id]
+    external_ids = [id for id in seed_ids if str(id) not in row_by_id]
+    seed_fps = None
+    if external_ids:
+        seed_rows_db = await get_molecule_fingerprints(db, ids=external_ids)
+        seed_fps = unpack_stored_fingerprints([row["morgan_fp"] for row in seed_rows_db])
+
+    picks = await run_in_process_pool(
+        maxmin_pick,
+        fps,
+        pick_input.npick,
+        seed_rows=seed_rows,
+        seed_fps=seed_fps,
+        random_seed=pick_input.random_seed,
+    )
+
+    return [
+        DiversityPickOutputDto(
+            id=molecule_data[index]["id"],
+            name=molecule_data[index]["name"],
+            smiles=molecule_data[index]["smiles"],
+            pick_order=order + 1,
+            min_distance=distance,
+        )
+        for order, (index, distance) in enumerate(picks)
+    ]
+
+
+def maxmin_pick(
+    fps: np.ndarray,
+    npick: int,
+    seed_rows: Optional[List[int]] = None,
+    seed_fps: Optional[np.ndarray] = None,
+    random_seed: int = 42,
+) -> List[Tuple[int, Optional[float]]]:
+    """
+    MaxMin diversity picking over a packed fingerprint matrix, run in a pool worker.
+
+    Distances are evaluated lazily: only the distances from the latest pick to the pool
+    are computed, and each molecule keeps its distance to the nearest pick so far. Memory
+    stays O(N) and each pick costs one vectorized pass over the pool, done in chunks to
+    bound the temporary arrays.
+
+    Args:
+        fps (np.ndarray): Packed fingerprints of the pool.
+        npick (int): Number of molecules to pick, seeds excluded.
+        seed_rows (List[int], optional): Pool rows that are already picked.
+        seed_fps (np.ndarray, optional): Packed fingerprints of already picked molecules outside the pool.
+        random_seed (int): Seed for choosing the first pick when there are no seeds.
+
+    Returns:
+        List[Tuple[int, Optional[float]]]: Picked rows with their distance to the nearest earlier pick.
+    """
+    n = len(fps)
+    counts = popcounts(fps)
+    min_distance = np.ones(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+
+    def update_distances(query: np.ndarray):
+        query_count = int(np.bitwise_count(query).sum())
+        for start in range(0, n, PICK_CHUNK_SIZE):
+            stop = min(start + PICK_CHUNK_SIZE, n)
+            similarities = tanimoto_to_many(
+                query, fps[start:stop], query_count, counts[start:stop]
+            )
+            np.minimum(
+                min_distance[start:stop], 1.0 - similarities, out=min_distance[start:stop]
+            )
+
+    if seed_fps is not None:
+        for query in seed_fps:
+            update_distances(query)
+    for row in seed_rows or []:
+        available[row] = False
+        update_distances(fps[row])
+
+    # Without seeds the first pick is random, as in RDKit's MaxMinPicker
+    picks = []
+    if available.all() and (seed_fps is None or len(seed_fps) == 0):
+        first = int(np.random.default_rng(random_seed).integers(n))
+        picks.append((first, None))
+        available[first] = False
+        update_distances(fps[first])
+
+    while len(picks) < npick and available.any():
+        candidate = int(np.argmax(np.where(available, min_distance, -1.0)))
+        picks.append((candidate, float(min_distance[candidate])))
+        available[candidate] = False
+        update_distances(fps[candidate])
+
+    logger.debug(f"MaxMin picked {len(picks)} of {n} molecules")
+    return picks
+
+
+def fingerprint_input_molecules(molecules: List[ClusterInputDto]):
+    """Parse input molecules and compute their packed Morgan fingerprints, for a pool worker."""
+    molecule_data, mols = [], []
+    for mol_data in molecules:
+        mol = dm.to_mol(mol_data.smiles)
+        if mol is None:
+            raise ValueError(f"Could not parse SMILES: {mol_data.smiles}")
+        molecule_data.append(
+            {
+                "id": mol_data.id,
+                "name": mol_data.name,
+                "smiles": dm.to_smiles(mol, canonical=True),
+            }
+        )
+        mols.append(mol)
+    return molecule_data, fingerprints.generate_batch(mols, packed=True)
@@ -0,0 +1,218 @@
+import asyncio
+import datetime
+import os
+import tempfile
+import uuid
+from typing import List, Tuple
+from uuid import UUID
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.logging_config import logger
+from app.core.process_pool import run_in_process_pool
+from app.db.base import SessionLocal
+from app.db.models.molecule import Molecule
+from app.db.models.near_duplicate import NearDuplicateRun
+from app.repositories import near_duplicate as near_duplicate_repo
+from app.schemas.near_duplicate_dto import NearDuplicateRunCreateDto
+from app.utils.molecules.fp_similarity import popcounts, unpack_stored_fingerprints
+from app.utils.molecules.near_duplicates import near_duplicate_pairs, popcount_blocks
+
+# Below this cutoff the popcount bands get too wide (and the pair lists too long) for
+# an all-pairs job; use similarity search or clustering instead
+MIN_THRESHOLD = 0.7
+
+# Molecules read per query when loading the fingerprints
+LOAD_BATCH_SIZE = 10000
+
+# Run started by this process and not finished yet
+_active_run_id = None
+
+
+async def create_near_duplicate_run(
+    db: AsyncSession, run_input: NearDuplicateRunCreateDto
+) -> NearDuplicateRun:
+    """
+    Record a pending vault-wide near-duplicate run; `run_near_duplicate_job` computes it.
+
+    Args:
+        db (AsyncSession): The database session to execute queries.
+        run_input (NearDuplicateRunCreateDto): The similarity threshold and parallelism.
+
+    Returns:
+        NearDuplicateRun: The pending run.
+
+    Raises:
+        ValueError: If the input is invalid or another run is pending or running.
+    """
+    global _active_run_id
+    if not (MIN_THRESHOLD <= run_input.threshold <= 1):
+        raise ValueError(
+            f"Invalid threshold: Threshold must be between {MIN_THRESHOLD} and 1."
+        )
+    if run_input.parallelism < 1:
+        raise ValueError("Invalid parallelism: Parallelism must be at least 1.")
+    if _active_run_id is not None:
+        raise ValueError(f"Near-duplicate run {_active_run_id} is still in progress.")
+
+    # Claimed before the first await, so concurrent requests see the run at once
+    run = NearDuplicateRun(id=uuid.uuid4(), threshold=run_input.threshold)
+    _active_run_id = run.id
+    try:
+        active_run = await near_duplicate_repo.get_active_near_duplicate_run(db)
+        if active_run is not None:
+            raise ValueError(f"Near-duplicate run {active_run.id} is still in progress.")
+        return await near_duplicate_repo.create_near_duplicate_run(db, run)
+    except Exception:
+        _active_run_id = None
+        raise
+
+
+async def fail_interrupted_near_duplicate_runs():
+    """
+    Mark runs left pending or running by a previous process as failed, e.g. at startup;
+    their job died with that process and would otherwise block new runs forever.
+    """
+    async with SessionLocal() as db:
+        count = await near_duplicate_repo.fail_active_near_duplicate_runs(
+            db, "Interrupted by an application restart."
+        )
+    if count:
+        logger.warning(f"Marked {count} interrupted near-duplicate runs as failed")
+
+
+async def run_near_duplicate_job(run_id: UUID, parallelism: int = 4):
+    """
+    Find every pair of molecules whose Morgan fingerprints reach the run's Tanimoto
+    threshold and store them in the near_duplicates table.
+
+    The fingerprints are sorted by popcount and split into blocks of rows, each compared
+    only with the popcount band it can reach (see `popcount_blocks`), so most of the
+    N² pairs are never computed. The matrix is written to a temporary file that the pool
+    workers memory-map; `parallelism` blocks are computed at a time and their pairs are
+    stored together with the progress of the run.
+    """
+    global _active_run_id
+    _active_run_id = run_id
+    path = None
+
+    async with SessionLocal() as db:
+        run = await near_duplicate_repo.get_near_duplicate_run(db, run_id)
+        if run is None:
+            logger.error(f"Near-duplicate run {run_id} not found")
+            _active_run_id = None
+            return
+
+        try:
+            run = await near_duplicate_repo.update_near_duplicate_run(
+                db,
+                run,
+                state="running",
+                started_at=datetime.datetime.now(datetime.timezone.utc),
+            )
+            ids, fps = await _load_fingerprints()
+            counts = popcounts(fps)
+            order = np.argsort(counts, kind="stable")
+            ids, fps, counts = ids[order], np.ascontiguousarray(fps[order]), counts[order]
+            blocks = popcount_blocks(counts, run.threshold)
+
+            with tempfile.NamedTemporaryFile(suffix=".fps", delete=False) as file:
+                path = file.name
+                fps.tofile(file)
+            n_fps, n_words = fps.shape
+            del fps
+
+            run = await near_duplicate_repo.update_near_duplicate_run(
+                db, run, n_molecules=n_fps, total_blocks=len(blocks)
+            )
+            logger.info(
+                f"Near-duplicate run {run_id}: {n_fps} molecules in {len(blocks)} blocks "
+                f"at threshold {run.threshold}"
+            )
+
+            for start in range(0, len(blocks), parallelism):
+                batch = blocks[start : start + parallelism]
+                results = await asyncio.gather(
+                    *[
+                        run_in_process_pool(
+                            near_duplicate_pairs, path, n_fps, n_words, *block, run.threshold
+                        )
+                        for block in batch
+                    ]
+                )
+                pairs = [
+                    {
+                        "run_id": run_id,
+                        "molecule_id_a": ids[i],
+                        "molecule_id_b": ids[j],
+                        "similarity": float(similarity),
+                    }
+                    for rows, cols, similarities in results
+                    for i, j, similarity in zip(
+                        rows.tolist(), cols.tolist(), similarities.tolist()
+                    )
+                ]
+                run = await near_duplicate_repo.add_near_duplicates(
+                    db, run, pairs, len(batch)
+                )
+                logger.debug(
+                    f"Near-duplicate run {run_id}: {run.processed_blocks}/{run.total_blocks} "
+                    f"blocks, {run.n_pairs} pairs"
+                )
+
+            await near_duplicate_repo.update_near_duplicate_run(
+                db,
+                run,
+                state="completed",
+                finished_at=datetime.datetime.now(datetime.timezone.utc),
+            )
+            logger.info(f"Near-duplicate run {run_id} completed with {run.n_pairs} pairs")
+        except Exception as e:
+            logger.error(f"Near-duplicate run {run_id} failed: {e}")
+            await near_duplicate_repo.update_near_duplicate_run(
+                db,
+                run,
+                state="failed",
+                error=str(e),
+                finished_at=datetime.datetime.now(datetime.timezone.utc),
+            )
+        finally:
+            _active_run_id = None
+            if path is not None:
+                os.remove(path)
+
+
+async def _load_fingerprints() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read the IDs and packed Morgan fingerprints of all molecules in keyset-paginated
+    batches, leaving out empty fingerprints (their similarity is undefined).
+    """
+    ids: List[np.ndarray] = []
+    fps: List[np.ndarray] = []
+    last_id = None
+
+    while True:
+        async with SessionLocal() as db:
+            query = (
+                select(Molecule.id, Molecule.morgan_fp)
+                .where(Molecule.morgan_fp.is_not(None))
+                .order_by(Molecule.id)
+                .limit(LOAD_BATCH_SIZE)
+            )
+            if last_id is not None:
+                query = query.where(Molecule.id > last_id)
+            rows = (await db.execute(query)).all()
+        if not rows:
+            break
+
+        batch_fps = unpack_stored_fingerprints([row[1] for row in rows])
+        batch_ids = np.empty(len(rows), dtype=object)
+        batch_ids[:] = [row[0] for row in rows]
+        non_empty = popcounts(batch_fps) > 0
+        ids.append(batch_ids[non_empty])
+        fps.append(batch_fps[non_empty])
+        last_id = rows[-1][0]
+
+    if not fps:
+        return np.empty(0, dtype=object), unpack_stored_fingerprints([])
+    return np.concatenate(ids), np.concatenate(fps)
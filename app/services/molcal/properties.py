@@ -0,0 +1,85 @@
+import asyncio
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, List
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.core.process_pool import run_in_process_pool
+from app.schemas.properties_dto import MoleculePropertiesDto, PropertiesInputDto
+from app.services.molecule.standardization import standardize_batch
+from app.utils.molecules.descriptors import descriptor_names
+
+# Molecules per worker task
+PROPERTIES_CHUNK_SIZE = 100
+
+# Fields left out of the streamed records
+PROPERTIES_EXCLUDED_FIELDS = {"parent_id", "o_molblock"}
+# Fields of the record of a molecule that failed
+PROPERTIES_ERROR_FIELDS = {"index", "id", "name", "smiles", "error"}
+
+
+async def stream_properties(
+    molecules: List[PropertiesInputDto], profile: str = "full"
+) -> AsyncIterator[str]:
+    """
+    Standardize and describe molecules without touching the database, yielding one
+    JSON line per molecule in input order.
+
+    Chunks run on the shared process pool through the same `standardize()` used for
+    registration, so the values match the vault. Only a bounded number of chunks is in
+    flight, and results are yielded as soon as the next chunk in order is done.
+
+    Args:
+        molecules (List[PropertiesInputDto]): The structures to describe.
+        profile (str): Descriptor profile, 'none', 'core' or 'full'.
+
+    Yields:
+        str: A MoleculePropertiesDto serialized as JSON, newline terminated.
+    """
+    logger.info(f"Computing properties for {len(molecules)} molecules ({profile}).")
+    starts = range(0, len(molecules), PROPERTIES_CHUNK_SIZE)
+    max_in_flight = 2 * (settings.PROCESS_POOL_WORKERS or 4)
+
+    def submit(start: int):
+        chunk = molecules[start : start + PROPERTIES_CHUNK_SIZE]
+        return asyncio.ensure_future(
+            run_in_process_pool(
+                standardize_batch, [molecule.smiles for molecule in chunk], profile
+            )
+        )
+
+    next_starts = iter(starts)
+    pending = deque(
+        (start, submit(start)) for start in islice(next_starts, max_in_flight)
+    )
+    try:
+        while pending:
+            start, future = pending.popleft()
+            results = await future
+            start_next = next(next_starts, None)
+            if start_next is not None:
+                pending.append((start_next, submit(start_next)))
+
+            for offset, (fields, error) in enumerate(results):
+                molecule = molecules[start + offset]
+                record = MoleculePropertiesDto(
+                    **(fields or {}),
+                    id=molecule.id,
+                    name=molecule.name,
+                    smiles=molecule.smiles,
+                    index=start + offset,
+                    error=error,
+                )
+                if error is None:
+                    yield record.model_dump_json(exclude=PROPERTIES_EXCLUDED_FIELDS) + "\n"
+                else:
+                    yield record.model_dump_json(include=PROPERTIES_ERROR_FIELDS) + "\n"
+    finally:
+        # Client disconnected or failed: drop the chunks nobody will read
+        for _, future in pending:
+            future.cancel()
+
+
+def validate_profile(profile: str):
+    """Raise ValueError for an unknown descriptor profile before streaming starts."""
+    descriptor_names(profile)
@@ -0,0 +1,179 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.process_pool import run_in_process_pool
+from app.repositories.molecule import get_molecule_fingerprints
+from app.schemas.similarity_matrix_dto import SimilarityMatrixInputDto
+from app.utils.molecules import fingerprints
+from app.utils.molecules.fp_similarity import (
+    popcounts,
+    tanimoto_block,
+    unpack_stored_fingerprints,
+)
+from app.utils.molecules.helper import standardize_smiles
+
+# Largest set accepted; the dense float16 matrix is then 800 MB
+MAX_MATRIX_SIZE = 20000
+
+# Rows computed and encoded per block, and the column tile of the AND/popcount buffer
+# (ROW_BLOCK_SIZE * COL_TILE_SIZE * 256 bytes)
+ROW_BLOCK_SIZE = 256
+COL_TILE_SIZE = 1024
+
+# SMILES standardized and fingerprinted per process pool task
+STANDARDIZE_CHUNK_SIZE = 500
+
+MATRIX_DTYPES = {"float16": np.dtype("<f2"), "uint8": np.dtype("u1")}
+
+# Threads encoding matrix blocks, shared by all requests so concurrent matrices do not
+# multiply the thread count; each request keeps one window of blocks in flight
+_BLOCK_WINDOW = os.cpu_count() or 1
+_matrix_executor = ThreadPoolExecutor(
+    max_workers=_BLOCK_WINDOW, thread_name_prefix="similarity-matrix"
+)
+
+
+async def load_matrix_fingerprints(
+    db: AsyncSession, matrix_input: SimilarityMatrixInputDto
+) -> np.ndarray:
+    """
+    Validate a similarity matrix request and return the packed Morgan fingerprints of
+    its molecules in input order: stored fingerprints for IDs, computed ones for SMILES.
+    SMILES are standardized first, as at registration, so both modes give the same
+    similarities for the same compounds.
+
+    Raises:
+        ValueError: If the request is invalid, a stored molecule is missing or a SMILES
+        cannot be parsed.
+    """
+    if (matrix_input.ids is None) == (matrix_input.smiles is None):
+        raise ValueError("Exactly one of ids or smiles must be provided.")
+    if matrix_input.dtype not in MATRIX_DTYPES:
+        raise ValueError(
+            f"Unknown dtype '{matrix_input.dtype}'. Choose one of: {', '.join(MATRIX_DTYPES)}"
+        )
+    if not (0 <= matrix_input.cutoff <= 1):
+        raise ValueError("Invalid cutoff: Cutoff must be a float between 0 and 1.")
+
+    n = len(matrix_input.ids if matrix_input.ids is not None else matrix_input.smiles)
+    if n == 0:
+        raise ValueError("At least one molecule must be provided.")
+    if n > MAX_MATRIX_SIZE:
+        raise ValueError(
+            f"Too many molecules: {n}. The similarity matrix is limited to {MAX_MATRIX_SIZE}."
+        )
+
+    if matrix_input.smiles is not None:
+        chunks = await asyncio.gather(
+            *[
+                run_in_process_pool(
+                    standardized_fingerprints,
+                    matrix_input.smiles[start : start + STANDARDIZE_CHUNK_SIZE],
+                    start,
+                )
+                for start in range(0, n, STANDARDIZE_CHUNK_SIZE)
+            ]
+        )
+        return np.concatenate(chunks)
+
+    rows = await get_molecule_fingerprints(db, ids=list(set(matrix_input.ids)))
+    row_by_id = {row["id"]: row for row in rows}
+    missing = [str(id) for id in matrix_input.ids if id not in row_by_id]
+    if missing:
+        raise ValueError(
+            f"No stored fingerprints for {len(missing)} molecules, e.g. {', '.join(missing[:5])}"
+        )
+    return unpack_stored_fingerprints(
+        [row_by_id[id]["morgan_fp"] for id in matrix_input.ids]
+    )
+
+
+def standardized_fingerprints(smiles_list: List[str], offset: int = 0) -> np.ndarray:
+    """Packed Morgan fingerprints of standardized SMILES, for a pool worker.
+
+    Raises:
+        ValueError: If a SMILES cannot be standardized; `offset` gives its input position.
+    """
+    standardized = []
+    for i, smiles in enumerate(smiles_list):
+        try:
+            standardized.append(standardize_smiles(smiles))
+        except Exception as e:
+            raise ValueError(f"Could not standardize SMILES at position {offset + i}: {e}")
+    return fingerprints.generate_batch(standardized, fingerprints.MORGAN, True)
+
+
+def matrix_headers(n: int, dtype: str, sparse: bool, cutoff: float) -> Dict[str, str]:
+    """Response headers describing the binary layout written by `stream_similarity_matrix`."""
+    headers = {
+        "X-Matrix-Shape": f"{n},{n}",
+        "X-Matrix-Dtype": dtype,
+        "X-Matrix-Layout": "coo" if sparse else "dense",
+    }
+    if dtype == "uint8":
+        headers["X-Matrix-Scale"] = str(1 / 255)
+    if sparse:
+        headers["X-Matrix-Cutoff"] = str(cutoff)
+    return headers
+
+
+def stream_similarity_matrix(
+    fps: np.ndarray,
+    dtype: str = "float16",
+    sparse: bool = False,
+    cutoff: float = 0.0,
+) -> Iterator[bytes]:
+    """
+    Tanimoto similarity matrix of packed fingerprints, as little-endian binary chunks.
+
+    Blocks of ROW_BLOCK_SIZE rows are computed on the shared matrix thread pool, a
+    window of blocks at a time, and yielded in row order, so memory stays bounded by the
+    window whatever the matrix size.
+
+    Dense layout: the N x N matrix in row-major order. Sparse ('coo') layout: one record
+    (row uint32, col uint32, value) per pair i < j at or above `cutoff`; the matrix is
+    symmetric with a unit diagonal. uint8 values are round(similarity * 255).
+    """
+    counts = popcounts(fps)
+    blocks = [
+        (start, min(start + ROW_BLOCK_SIZE, len(fps)))
+        for start in range(0, len(fps), ROW_BLOCK_SIZE)
+    ]
+
+    def encode_block(block: Tuple[int, int]) -> bytes:
+        start, stop = block
+        sims = tanimoto_block(
+            fps[start:stop], fps, counts[start:stop], counts, tile_size=COL_TILE_SIZE
+        )
+        if sparse:
+            return _encode_sparse(sims, start, dtype, cutoff)
+        return _encode_values(sims, dtype).tobytes()
+
+    for window in range(0, len(blocks), _BLOCK_WINDOW):
+        yield from _matrix_executor.map(
+            encode_block, blocks[window : window + _BLOCK_WINDOW]
+        )
+
+
+def _encode_values(sims: np.ndarray, dtype: str) -> np.ndarray:
+    if dtype == "uint8":
+        return np.rint(sims * 255).astype(MATRIX_DTYPES["uint8"])
+    return sims.astype(MATRIX_DTYPES[dtype])
+
+
+def _encode_sparse(sims: np.ndarray, row_start: int, dtype: str, cutoff: float) -> bytes:
+    rows, cols = np.nonzero(sims >= cutoff)
+    upper = cols > rows + row_start
+    rows, cols = rows[upper], cols[upper]
+
+    records = np.empty(
+        len(rows),
+        dtype=[("row", "<u4"), ("col", "<u4"), ("value", MATRIX_DTYPES[dtype])],
+    )
+    records["row"] = rows + row_start
+    records["col"] = cols
+    records["value"] = _encode_values(sims[rows, cols], dtype)
+    return records.tobytes()
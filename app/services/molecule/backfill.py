@@ -0,0 +1,274 @@
+import asyncio
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Any, Optional
+from sqlalchemy import exists, func, or_, select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.core.process_pool import run_in_process_pool
+from app.db.base import SessionLocal
+from app.db.models.molecule import Molecule
+from app.db.models.parent_molecule import ParentMolecule
+from app.db.models.molecule_fingerprint import MoleculeFingerprint
+from app.repositories.molecule_fingerprint import (
+    ensure_fingerprint_index,
+    upsert_molecule_fingerprints,
+)
+from app.utils.molecules.scaffold import compute_scaffolds_batch
+from app.utils.molecules.registration_hash import compute_registration_hashes_batch
+from app.utils.molecules.descriptors import compute_descriptors_batch
+from app.utils.molecules.fp_gen import (
+    generate_fingerprints_batch,
+    generate_named_fingerprints_batch,
+)
+from app.utils.molecules.fp_similarity import FP_SIZE
+from app.utils.molecules.fingerprints import FINGERPRINT_COLUMNS, get_config
+
+# Configurable batch size for backfill jobs
+BATCH_SIZE = 1000
+# Upper bound on batches read and computed at once (each read fetches
+# BATCH_SIZE * parallelism rows)
+MAX_PARALLELISM = 16
+
+_reencode_task = None
+
+
+async def backfill_in_batches(
+    model,
+    pending_condition,
+    compute_batch: Callable[[List[str]], List[Dict[str, Any]]],
+    source_column: str = "smiles_canonical",
+    batch_size: int = BATCH_SIZE,
+    parallelism: int = 1,
+    write_batch: Optional[
+        Callable[[AsyncSession, List[Dict[str, Any]]], Awaitable[None]]
+    ] = None,
+) -> int:
+    """
+    Fill derived columns for existing rows in keyset-paginated batches.
+
+    Rows matching `pending_condition` are read in primary key order, the values are
+    computed in the shared process pool by `compute_batch` (which receives the source
+    column values and returns one dict of column values per row) and written back with
+    a single bulk UPDATE per batch. Rows that fail to compute are skipped, so a job can
+    be re-run to resume where it stopped.
+
+    With `parallelism` > 1, each read fetches that many batches, which are computed
+    concurrently by separate pool workers and written in one transaction.
+
+    Args:
+        model: The ORM model to backfill (Molecule or ParentMolecule).
+        pending_condition: SQLAlchemy condition selecting rows that still need values.
+        compute_batch (Callable): Picklable function computing the new column values.
+        source_column (str): Column passed to `compute_batch`. Defaults to 'smiles_canonical'.
+        batch_size (int): Rows per batch.
+        parallelism (int): Batches computed concurrently. Defaults to 1.
+        write_batch (Callable, optional): Coroutine writing the computed rows, which carry
+            the primary key as 'id'. Defaults to a bulk UPDATE of `model`.
+
+    Returns:
+        int: Number of rows processed.
+    """
+    table = model.__tablename__
+    logger.info(f"Starting backfill on {table}.")
+    last_id = None
+    processed = 0
+
+    while True:
+        async with SessionLocal() as db:
+            query = (
+                select(model.id, getattr(model, source_column))
+                .where(pending_condition)
+                .order_by(model.id)
+                .limit(batch_size * parallelism)
+            )
+            if last_id is not None:
+                query = query.where(model.id > last_id)
+
+            rows = (await db.execute(query)).all()
+            if not rows:
+                break
+
+            sources = [row[1] for row in rows]
+            chunk_results = await asyncio.gather(
+                *[
+                    run_in_process_pool(compute_batch, sources[i : i + batch_size])
+                    for i in range(0, len(sources), batch_size)
+                ]
+            )
+            results = [values for chunk in chunk_results for values in chunk]
+            mappings = [
+                {"id": row[0], **values}
+                for row, values in zip(rows, results)
+                if values is not None
+            ]
+            if mappings:
+                if write_batch is None:
+                    await db.execute(update(model), mappings)
+                else:
+                    await write_batch(db, mappings)
+                await db.commit()
+
+        last_id = rows[-1][0]
+        processed += len(rows)
+        logger.info(f"Backfill on {table}: processed {processed} rows.")
+
+    logger.info(f"Backfill on {table} completed, {processed} rows processed.")
+    return processed
+
+
+async def backfill_scaffolds(recompute: bool = False):
+    """
+    Compute Murcko scaffolds for molecules and parent molecules registered without them.
+
+    With `recompute`, the scaffolds of every row are computed again, e.g. to replace
+    generic scaffolds stored with aromatic bonds.
+    """
+    for model in (Molecule, ParentMolecule):
+        await backfill_in_batches(
+            model,
+            true() if recompute else model.murcko_scaffold.is_(None),
+            compute_scaffolds_batch,
+        )
+
+
+async def backfill_registration_hashes():
+    """
+    Compute registration hash layers for molecules registered without them.
+    """
+    await backfill_in_batches(
+        Molecule, Molecule.hash_tautomer.is_(None), compute_registration_hashes_batch
+    )
+
+
+async def backfill_descriptors():
+    """
+    Compute the full descriptor profile for molecules and parent molecules registered
+    with a lighter profile (qed and sas are only computed by the full profile).
+    """
+    for model in (Molecule, ParentMolecule):
+        await backfill_in_batches(model, model.sas.is_(None), compute_descriptors_batch)
+
+
+async def backfill_fingerprints(recompute: bool = False):
+    """
+    Re-encode fingerprints stored from '0'/'1' bitstrings (one byte per bit) as packed
+    binary fingerprints, and fill missing ones along with their popcounts.
+
+    With `recompute`, every row is fingerprinted again, e.g. to repair packed RDKit
+    fingerprints written with other generator settings.
+    """
+    for model in (Molecule, ParentMolecule):
+        pending_condition = or_(
+            model.morgan_fp.is_(None),
+            model.rdkit_fp.is_(None),
+            model.morgan_popcount.is_(None),
+            model.rdkit_popcount.is_(None),
+            legacy_fingerprint_condition(model),
+        )
+        await backfill_in_batches(
+            model,
+            true() if recompute else pending_condition,
+            generate_fingerprints_batch,
+        )
+
+
+def legacy_fingerprint_condition(model):
+    """Rows whose fingerprints are still stored as '0'/'1' bitstrings."""
+    return or_(
+        func.length(func.bfp_to_binary_text(model.morgan_fp)) != FP_SIZE // 8,
+        func.length(func.bfp_to_binary_text(model.rdkit_fp)) != FP_SIZE // 8,
+    )
+
+
+def start_fingerprint_reencode() -> bool:
+    """
+    Start re-encoding bitstring fingerprints in the background unless it is disabled or
+    already running. Returns True if it was started.
+    """
+    global _reencode_task
+    if not settings.FINGERPRINT_REENCODE_ON_STARTUP:
+        return False
+    if _reencode_task is not None and not _reencode_task.done():
+        return False
+    _reencode_task = asyncio.create_task(_reencode_fingerprints())
+    return True
+
+
+async def _reencode_fingerprints():
+    """
+    Fingerprint the molecules and parents that have no popcounts yet.
+
+    Popcounts are only ever written together with packed fingerprints, so every row
+    still holding bitstring fingerprints has NULL popcounts. The indexed popcount
+    columns find those rows without decoding the fingerprint of every row; once all
+    rows are packed the probe is an index lookup. Similarity searches skip bitstring
+    rows until they are re-encoded.
+    """
+    try:
+        for model in (Molecule, ParentMolecule):
+            pending_condition = or_(
+                model.morgan_popcount.is_(None), model.rdkit_popcount.is_(None)
+            )
+            async with SessionLocal() as db:
+                pending = await db.scalar(
+                    select(model.id).where(pending_condition).limit(1)
+                )
+            if pending is None:
+                continue
+            logger.info(f"Re-encoding fingerprints of {model.__tablename__} in the background")
+            await backfill_in_batches(model, pending_condition, generate_fingerprints_batch)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Error re-encoding bitstring fingerprints: {e}")
+
+
+async def stop_fingerprint_reencode():
+    """Cancel a running re-encode; the next startup resumes it."""
+    if _reencode_task is not None and not _reencode_task.done():
+        _reencode_task.cancel()
+
+
+async def backfill_named_fingerprint(fp_name: str, parallelism: int = 4):
+    """
+    Compute a registered side-table fingerprint for every molecule that does not have it.
+
+    The partial index of the definition is created first. The job only selects molecules
+    without a complete row (fingerprint and popcount) for the definition, so it resumes
+    where it stopped and can be re-run to cover molecules registered since.
+    """
+    if fp_name in FINGERPRINT_COLUMNS:
+        raise ValueError(
+            f"Fingerprint '{fp_name}' is stored on molecules; use the fingerprint backfill."
+        )
+    get_config(fp_name)
+
+    async with SessionLocal() as db:
+        await ensure_fingerprint_index(db, fp_name)
+
+    async def write_fingerprints(db: AsyncSession, mappings: List[Dict[str, Any]]):
+        await upsert_molecule_fingerprints(
+            db,
+            [
+                {
+                    "molecule_id": mapping["id"],
+                    "fp_name": fp_name,
+                    "fp": mapping["fp"],
+                    "popcount": mapping["popcount"],
+                }
+                for mapping in mappings
+            ],
+        )
+
+    await backfill_in_batches(
+        Molecule,
+        ~exists().where(
+            MoleculeFingerprint.molecule_id == Molecule.id,
+            MoleculeFingerprint.fp_name == fp_name,
+            MoleculeFingerprint.popcount.is_not(None),
+        ),
+        partial(generate_named_fingerprints_batch, fp_name),
+        parallelism=parallelism,
+        write_batch=write_fingerprints,
+    )
@@ -1,5 +1,5 @@
 import asyncio
-from typing import List, Dict, AsyncGenerator
+from typing import List, Dict, AsyncGenerator, Tuple
 import uuid
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -7,16 +7,32 @@ from app.core.logging_config import logger
 from app.db.models.molecule import Molecule
 from app.db.models.parent_molecule import ParentMolecule
 from app.repositories.molecule import (
+    add_molecule_synonyms,
     bulk_create_molecules,
-    get_molecule_by_smiles,
+    get_molecules_by_dedup_keys,
+    get_molecules_by_inchikeys,
 )
 from app.repositories.parent_molecule import (
     bulk_create_parent_molecules,
     get_parent_molecule,
 )
 from app.schemas.molecule_dto import InputMoleculeDto
-from app.services.molecule.standardization import standardize, standardize_parent
+from app.services.molecule.standardization import (
+    compute_descriptors_columnar,
+    standardize,
+    standardize_parent,
+)
+from app.utils.molecules.descriptors import row_values
+from app.services.molecule.name_index import name_index
+from app.services.molecule.lsh_index import add_molecules_to_lsh_index
+from app.services.molecule.standardization_store import (
+    prefetch_standardizations,
+    schedule_flush,
+)
 from app.utils.molecules import fp_gen
+from app.core.process_pool import run_in_process_pool
+from app.utils.molecules.helper import normalize_synonym
+from app.utils.molecules.registration_hash import dedup_column
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine
@@ -27,6 +43,9 @@ import re
 
 semaphore = asyncio.Semaphore(30)
 
+# Molecules per worker task when generating fingerprints
+FINGERPRINT_CHUNK_SIZE = 1000
+
 # Async engine creation
 engine = create_async_engine(settings.DATABASE_URL, pool_size=100, max_overflow=150)
 
@@ -76,15 +95,21 @@ def validate_input_molecules(
     return valid_molecules
 
 
-async def register_molecules_batch(input_molecules: List[InputMoleculeDto]):
+async def register_molecules_batch(
+    input_molecules: List[InputMoleculeDto], dedup_level: str = "exact"
+):
     """
-    Register a batch of molecules after standardizing them. Avoids duplicate registrations by:
+    Register a batch of molecules after standardizing them. Molecules are considered
+    duplicates when they share the key of `dedup_level` ('exact', 'stereo', 'tautomer'
+    or 'connectivity'). Avoids duplicate registrations by:
     - Parallel standardization of molecules.
     - Parallel parent molecule existence checks.
     - Bulk creation of new parent molecules.
     - Bulk creation of new molecules.
     """
     logger.info(f"Received batch of {len(input_molecules)} molecules")
+    # Fail fast on an unknown dedup level
+    dedup_column(dedup_level)
 
     validated_molecules = validate_input_molecules(input_molecules)
 
@@ -97,19 +122,34 @@ async def register_molecules_batch(input_molecules: List[InputMoleculeDto]):
     standardized_molecules = await standardize_molecules(validated_molecules)
 
     # Step 2: Consolidate duplicates within the standardized molecules list
-    consolidated_molecules = consolidate_duplicates(standardized_molecules)
+    consolidated_molecules = consolidate_duplicates(standardized_molecules, dedup_level)
 
-    # Step 3: Filter out existing molecules and update their synonyms
-    molecules_to_update, molecules_to_register = await filter_existing_molecules(
-        consolidated_molecules
+    # Step 3: Filter out existing molecules and collect their new synonyms
+    synonyms_to_add, molecules_to_update, molecules_to_register = (
+        await filter_existing_molecules(consolidated_molecules, dedup_level)
     )
 
-    # Step 4: Insert new molecules and update existing molecules
+    # Step 4: Compute descriptors and fingerprints for new molecules only, then insert
+    # them and add synonyms to existing molecules
     if molecules_to_register:
-        await bulk_insert_molecules(molecules_to_register)
-
-    if molecules_to_update:
-        await bulk_update_molecules(molecules_to_update)
+        molecules_to_register = await compute_registration_descriptors(
+            molecules_to_register
+        )
+        molecules_to_register, fingerprint_rows = await compute_registration_fingerprints(
+            molecules_to_register
+        )
+        await bulk_insert_molecules(molecules_to_register, fingerprint_rows)
+        for molecule in molecules_to_register:
+            name_index.add_molecule(molecule)
+        await add_molecules_to_lsh_index(molecules_to_register)
+
+    if synonyms_to_add:
+        await bulk_insert_synonyms(synonyms_to_add)
+        for synonym in synonyms_to_add:
+            name_index.add(synonym["molecule_id"], synonym["name"], is_synonym=True)
+        molecules_to_update = await fetch_molecules_by_ids(
+            [molecule.id for molecule in molecules_to_update]
+        )
 
     logger.info(
         f"Successfully registered {len(molecules_to_register)} molecules, updated {len(molecules_to_update)} molecules."
@@ -121,17 +161,24 @@ async def register_molecules_batch(input_molecules: List[InputMoleculeDto]):
 # Step 1: Standardize molecules (without checking the DB yet)
 async def standardize_molecules(input_molecules: List[InputMoleculeDto]):
     logger.debug(f"Standardizing {len(input_molecules)} molecules.")
+    # Load cached results of re-submitted SMILES in one query
+    await prefetch_standardizations(
+        "molecule/none", [molecule.smiles for molecule in input_molecules]
+    )
     tasks = [standardize_molecule(molecule) for molecule in input_molecules]
-    return await asyncio.gather(*tasks)
+    standardized_molecules = await asyncio.gather(*tasks)
+    schedule_flush()
+    return standardized_molecules
 
 
 # Standardize individual molecule
 async def standardize_molecule(input_molecule: InputMoleculeDto):
     """
-    Standardize a molecule and generate fingerprints.
+    Standardize a molecule. Descriptors and fingerprints are computed later, once the
+    molecule is known to be new.
     """
     try:
-        standardized_molecule = standardize(input_molecule)
+        standardized_molecule = standardize(input_molecule, profile="none")
         standardized_molecule_db = Molecule(**standardized_molecule.model_dump())
 
         try:
@@ -145,12 +192,6 @@ async def standardize_molecule(input_molecule: InputMoleculeDto):
             molecule_id = uuid.uuid4()
 
         standardized_molecule_db.id = molecule_id
-        standardized_molecule_db.morgan_fp = fp_gen.generate_morgan_fp(
-            standardized_molecule.smiles_canonical
-        )
-        standardized_molecule_db.rdkit_fp = fp_gen.generate_rdkit_fp(
-            standardized_molecule.smiles_canonical
-        )
         standardized_molecule_db.mol = standardized_molecule.smiles_canonical
         return standardized_molecule_db
 
@@ -159,42 +200,122 @@ async def standardize_molecule(input_molecule: InputMoleculeDto):
         return None
 
 
-def consolidate_duplicates(standardized_molecules: List[Molecule]) -> List[Molecule]:
+async def compute_registration_descriptors(molecules: List[Molecule]) -> List[Molecule]:
+    """
+    Compute the registration descriptor profile for new molecules as columns across the
+    process pool, dropping the molecules that fail.
+    """
+    columns = await compute_descriptors_columnar(
+        [molecule.smiles_canonical for molecule in molecules],
+        profile=settings.REGISTRATION_DESCRIPTOR_PROFILE,
+    )
+
+    described_molecules = []
+    for i, molecule in enumerate(molecules):
+        if not columns["valid"][i]:
+            logger.error(
+                f"Error computing descriptors for {molecule.smiles_canonical}. Skipping this molecule."
+            )
+            continue
+        for name, value in row_values(columns, i).items():
+            setattr(molecule, name, value)
+        described_molecules.append(molecule)
+    return described_molecules
+
+
+async def compute_registration_fingerprints(
+    molecules: List[Molecule],
+) -> Tuple[List[Molecule], List[Dict]]:
     """
-    Consolidate molecules with the same canonical SMILES by combining their names into synonyms.
+    Generate the Morgan and RDKit fingerprints and the side-table fingerprints of new
+    molecules in chunks across the process pool, dropping the molecules that fail.
+
+    Returns the fingerprinted molecules and their molecule_fingerprints rows.
     """
+    smiles_list = [molecule.smiles_canonical for molecule in molecules]
+    chunk_results = await asyncio.gather(
+        *[
+            run_in_process_pool(
+                fp_gen.generate_registration_fingerprints_batch,
+                smiles_list[i : i + FINGERPRINT_CHUNK_SIZE],
+            )
+            for i in range(0, len(smiles_list), FINGERPRINT_CHUNK_SIZE)
+        ]
+    )
+    results = [result for chunk in chunk_results for result in chunk]
+
+    fingerprinted_molecules = []
+    fingerprint_rows = []
+    for molecule, fps in zip(molecules, results):
+        if fps is None:
+            logger.error(
+                f"Error generating fingerprints for {molecule.smiles_canonical}. Skipping this molecule."
+            )
+            continue
+        molecule.morgan_fp = fps["morgan_fp"]
+        molecule.rdkit_fp = fps["rdkit_fp"]
+        molecule.morgan_popcount = fps["morgan_popcount"]
+        molecule.rdkit_popcount = fps["rdkit_popcount"]
+        fingerprinted_molecules.append(molecule)
+        fingerprint_rows.extend(
+            {"molecule_id": molecule.id, "fp_name": fp_name, **values}
+            for fp_name, values in fps["side_table"].items()
+        )
+    return fingerprinted_molecules, fingerprint_rows
+
+
+def consolidate_duplicates(
+    standardized_molecules: List[Molecule], dedup_level: str = "exact"
+) -> List[Molecule]:
+    """
+    Consolidate molecules with the same dedup key (canonical SMILES by default) by
+    combining their names into synonyms.
+    """
+    column = dedup_column(dedup_level)
     consolidated_molecule_dict = {}
+    # Molecules without a key (no hash layers when InChI generation fails) are only
+    # consolidated with identical structures
+    unkeyed_molecule_dict = {}
 
     for molecule in standardized_molecules:
-        if molecule.smiles_canonical in consolidated_molecule_dict:
-            # If canonical SMILES already exists, combine names into synonyms
-            existing_molecule = consolidated_molecule_dict[molecule.smiles_canonical]
-            existing_molecule.synonyms = (
-                existing_molecule.synonyms + ", " + molecule.name
-                if existing_molecule.synonyms
-                else molecule.name
-            )
+        key = getattr(molecule, column)
+        molecules_by_key = consolidated_molecule_dict
+        if key is None:
+            key, molecules_by_key = molecule.smiles_canonical, unkeyed_molecule_dict
+
+        if key in molecules_by_key:
+            # If the key already exists, combine names into synonyms
+            existing_molecule = molecules_by_key[key]
+            existing_molecule.add_synonym(molecule.name)
         else:
-            # If it's a new canonical SMILES, add the molecule to the dictionary
-            molecule.synonyms = molecule.name  # Set the initial synonym as the name
-            consolidated_molecule_dict[molecule.smiles_canonical] = molecule
+            # If it's a new key, add the molecule to the dictionary
+            molecule.add_synonym(molecule.name)  # Set the initial synonym as the name
+            molecules_by_key[key] = molecule
 
     # Return the list of consolidated molecules
-    return list(consolidated_molecule_dict.values())
+    return list(consolidated_molecule_dict.values()) + list(
+        unkeyed_molecule_dict.values()
+    )
 
 
 async def filter_existing_molecules(
-    standardized_molecules: List[Molecule],
-) -> List[Molecule]:
-    logger.debug(f"Checking {len(standardized_molecules)} molecules in the database.")
+    standardized_molecules: List[Molecule], dedup_level: str = "exact"
+) -> Tuple[List[Dict], List[Molecule], List[Molecule]]:
+    """
+    Split molecules into new ones and ones already in the vault.
 
-    # Step 1: Extract all canonical SMILES from the standardized molecules
-    smiles_list = [molecule.smiles_canonical for molecule in standardized_molecules]
+    Returns the synonym rows to insert for existing molecules, the existing molecules
+    that gain synonyms, and the new molecules to register.
+    """
+    logger.debug(f"Checking {len(standardized_molecules)} molecules in the database.")
 
-    # Step 2: Perform a bulk query to find which SMILES already exist in the database
-    existing_molecules = await get_existing_molecules_by_smiles(smiles_list)
+    # Step 1: Perform a bulk query to find which molecules already exist in the database
+    existing_molecules = await get_existing_molecules_by_key(
+        standardized_molecules, dedup_level
+    )
 
-    # Step 3: Update or create molecules
+    # Step 2: Collect new synonyms or create molecules
+    synonyms_to_add = []
     updated_molecules = []
     new_molecules = []
 
@@ -202,74 +323,126 @@ async def filter_existing_molecules(
         existing_molecule = existing_molecules.get(molecule.smiles_canonical)
 
         if existing_molecule:
-            # | is the union operator for sets
-            existing_molecule.synonyms = existing_molecule.synonyms or ""
-            molecule.synonyms = molecule.synonyms or ""
-            existing_names_set = set(existing_molecule.synonyms.split(", ")) | {
-                existing_molecule.name
-            }
-            new_names_set = set(molecule.synonyms.split(", ")) | {molecule.name}
-
-            # Check
-            if new_names_set.issubset(existing_names_set):
+            known_names = {
+                entry.name_normalized for entry in existing_molecule.synonym_entries
+            } | {normalize_synonym(existing_molecule.name or "")}
+
+            new_synonyms = [
+                {
+                    "molecule_id": existing_molecule.id,
+                    "name": entry.name,
+                    "name_normalized": entry.name_normalized,
+                }
+                for entry in molecule.synonym_entries
+                if entry.name_normalized not in known_names
+            ]
+            if not new_synonyms:
                 continue
 
-            existing_names_set.update(new_names_set)
-            existing_names_set.discard(existing_molecule.name)
-
-            # Sort and update the molecule's synonyms
-            existing_molecule.synonyms = ", ".join(sorted(existing_names_set))
-
+            synonyms_to_add.extend(new_synonyms)
             updated_molecules.append(existing_molecule)
         else:
             # New molecule
             new_molecules.append(molecule)
 
-    return updated_molecules, new_molecules
+    return synonyms_to_add, updated_molecules, new_molecules
 
 
-# Perform a bulk query to find which SMILES already exist in the database
-async def get_existing_molecules_by_smiles(smiles_list: List[str]):
+# Perform a bulk query to find which keys already exist in the database
+async def get_existing_molecules_by_key(
+    molecules: List[Molecule], dedup_level: str = "exact"
+) -> Dict[str, Molecule]:
     """
-    Query the database to find which canonical SMILES already exist in bulk.
+    Query the database in bulk for the registered molecule of each input molecule,
+    keyed by the input's canonical SMILES.
+
+    Exact matches are narrowed with the compact 27-char InChIKey index and confirmed
+    on canonical SMILES; molecules without an InChIKey fall back to the SMILES index.
+    At the looser levels a molecule matches on its registration hash or on its
+    canonical SMILES, so rows without hash layers are still found; the earliest
+    registered match wins.
     """
+    column = dedup_column(dedup_level)
     async with semaphore:
         async for db in get_db():
-            result = await db.execute(
-                select(Molecule).where(Molecule.smiles_canonical.in_(smiles_list))
+            if dedup_level != "exact":
+                keys = [
+                    getattr(molecule, column)
+                    for molecule in molecules
+                    if getattr(molecule, column) is not None
+                ]
+                by_key = await get_molecules_by_dedup_keys(db, keys, dedup_level)
+                by_smiles = await get_molecules_by_dedup_keys(
+                    db, [molecule.smiles_canonical for molecule in molecules]
+                )
+                existing_molecules = {}
+                for molecule in molecules:
+                    key = getattr(molecule, column)
+                    matches = [
+                        match
+                        for match in (
+                            by_key.get(key) if key is not None else None,
+                            by_smiles.get(molecule.smiles_canonical),
+                        )
+                        if match is not None
+                    ]
+                    if matches:
+                        existing_molecules[molecule.smiles_canonical] = min(
+                            matches, key=lambda match: match._created_at
+                        )
+                return existing_molecules
+
+            smiles_list = {molecule.smiles_canonical for molecule in molecules}
+            candidates = await get_molecules_by_inchikeys(
+                db, [molecule.inchi_key for molecule in molecules if molecule.inchi_key]
             )
-            existing_molecules = result.scalars().all()
-            return {
-                molecule.smiles_canonical: molecule for molecule in existing_molecules
-            }
+            # Groups are ordered earliest registered first; keep the first per SMILES
+            # like get_molecules_by_dedup_keys does
+            existing_molecules = {}
+            for group in candidates.values():
+                for candidate in group:
+                    if candidate.smiles_canonical in smiles_list:
+                        existing_molecules.setdefault(
+                            candidate.smiles_canonical, candidate
+                        )
+
+            without_inchi_key = [
+                molecule.smiles_canonical
+                for molecule in molecules
+                if not molecule.inchi_key
+            ]
+            if without_inchi_key:
+                found = await get_molecules_by_dedup_keys(db, without_inchi_key)
+                for key, candidate in found.items():
+                    existing_molecules.setdefault(key, candidate)
+            return existing_molecules
 
 
 # Step 5: Bulk insert new molecules
-async def bulk_insert_molecules(new_molecules: List[Molecule]):
+async def bulk_insert_molecules(
+    new_molecules: List[Molecule], fingerprint_rows: List[Dict] = None
+):
     async with semaphore:
         async for db in get_db():
-            await bulk_create_molecules(new_molecules, db)
+            await bulk_create_molecules(new_molecules, db, fingerprint_rows)
 
 
-# Step 6 Bulk update existing molecules
+# Step 6: Bulk insert synonyms of existing molecules
 BATCH_SIZE = 1000
 
 
-async def bulk_update_molecules(updated_molecules: List[Molecule]):
+async def bulk_insert_synonyms(synonyms: List[Dict]):
+    async with semaphore:
+        async for db in get_db():
+            for i in range(0, len(synonyms), BATCH_SIZE):
+                batch = synonyms[i : i + BATCH_SIZE]
+                logger.info(f"Inserting batch of {len(batch)} synonyms")
+                await add_molecule_synonyms(db, batch)
 
+
+async def fetch_molecules_by_ids(ids: List[uuid.UUID]) -> List[Molecule]:
     async with semaphore:
         async for db in get_db():
-            try:
-                for i in range(0, len(updated_molecules), BATCH_SIZE):
-                    batch = updated_molecules[i : i + BATCH_SIZE]
-                    logger.info(f"Updating batch of {len(batch)} molecules")
-
-                    for molecule in batch:
-                        # Use merge to reattach the object to the current session
-                        logger.debug(f"Updating molecule {molecule}")
-                        await db.merge(molecule)
-
-                    await db.commit()
-            except Exception as e:
-                logger.error(f"Error updating molecules: {str(e)}")
-                await db.rollback()
+            result = await db.execute(select(Molecule).where(Molecule.id.in_(ids)))
+            return list(result.scalars().all())
+
@@ -11,6 +11,10 @@ from chembl_structure_pipeline import standardizer
 from sqlalchemy.ext.asyncio import create_async_engine
 from app.db.models.parent_molecule import ParentMolecule
 from app.services.molecule.standardization import standardize_parent
+from app.services.molecule.standardization_store import (
+    prefetch_standardizations,
+    schedule_flush,
+)
 from dotenv import load_dotenv
 from sqlalchemy import update, case
 
@@ -53,13 +57,19 @@ async def insert_new_parents(parents_to_create: List[ParentMolecule], db: AsyncS
     if parents_to_create:
         logger.info(f"Preparing to insert {len(parents_to_create)} new parent molecules.")
         try:
+            # Generate fingerprints for the whole batch with the cached generators
+            fingerprints = fp_gen.generate_fingerprints_batch(
+                [parent.smiles_canonical for parent in parents_to_create]
+            )
             parent_molecules = []
-            for parent in parents_to_create:
+            for parent, fps in zip(parents_to_create, fingerprints):
                 db_parent_molecule = ParentMolecule(**parent.model_dump())
                 db_parent_molecule.mol = db_parent_molecule.smiles_canonical
-                # Generate Fingerprints
-                db_parent_molecule.morgan_fp = fp_gen.generate_morgan_fp(db_parent_molecule.mol)
-                db_parent_molecule.rdkit_fp = fp_gen.generate_rdkit_fp(db_parent_molecule.mol)
+                if fps is not None:
+                    db_parent_molecule.morgan_fp = fps["morgan_fp"]
+                    db_parent_molecule.rdkit_fp = fps["rdkit_fp"]
+                    db_parent_molecule.morgan_popcount = fps["morgan_popcount"]
+                    db_parent_molecule.rdkit_popcount = fps["rdkit_popcount"]
                 parent_molecules.append(db_parent_molecule)
 
             db.add_all(parent_molecules)
@@ -104,7 +114,15 @@ async def process_molecule_parents(molecules: List[Molecule], db: AsyncSession):
     logger.info(f"Processing {len(molecules)} molecules for parent assignment.")
     try:
         # Standardize parents for all molecules and create a mapping (id -> standardized parent)
-        parent_map = {mol.id: standardize_parent(mol.o_molblock) for mol in molecules}
+        profile = settings.REGISTRATION_DESCRIPTOR_PROFILE
+        await prefetch_standardizations(
+            f"parent/{profile}", [mol.o_molblock for mol in molecules]
+        )
+        parent_map = {
+            mol.id: standardize_parent(mol.o_molblock, profile=profile)
+            for mol in molecules
+        }
+        schedule_flush()
         parent_smiles = [parent.smiles_canonical for parent in parent_map.values()]
 
         # Fetch existing parents from the database using their canonical SMILES
@@ -0,0 +1,188 @@
+import asyncio
+from typing import List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.logging_config import logger
+from app.core.process_pool import run_in_process_pool
+from app.repositories.molecule import (
+    get_molecules_by_dedup_keys,
+    get_molecules_by_inchikeys,
+)
+from app.schemas.lookup_dto import BulkLookupResultDto
+from app.schemas.molecule import MoleculeBase
+from app.services.molecule.standardization_store import (
+    prefetch_standardizations,
+    schedule_flush,
+)
+from app.utils.molecules.helper import normalize_inchikey, standardize_smiles
+from app.utils.molecules.standardization_cache import standardization_cache
+from app.utils.molecules.registration_hash import (
+    compute_registration_hashes,
+    dedup_column,
+)
+
+# SMILES standardized per worker task
+LOOKUP_CHUNK_SIZE = 250
+
+
+def dedup_keys_batch(
+    smiles_list: List[str],
+    dedup_level: str,
+    standardized: Optional[List[Optional[str]]] = None,
+) -> List[Tuple[Optional[str], Optional[str], Optional[str]]]:
+    """
+    Standardize a chunk of SMILES and derive the dedup key of each.
+
+    Runs in a worker process. Inputs whose canonical SMILES is already known (from the
+    standardization cache of the calling process) are only hashed.
+    Returns (canonical SMILES, dedup key, error) per input.
+    """
+    column = dedup_column(dedup_level)
+    if standardized is None:
+        standardized = [None] * len(smiles_list)
+
+    results = []
+    for smiles, smiles_canonical in zip(smiles_list, standardized):
+        key, error = None, None
+        try:
+            if smiles_canonical is None:
+                smiles_canonical = standardize_smiles(smiles)
+            key = (
+                smiles_canonical
+                if dedup_level == "exact"
+                else compute_registration_hashes(smiles_canonical)[column]
+            )
+        except Exception as e:
+            error = str(e)
+        results.append((smiles_canonical, key, error))
+    return results
+
+
+async def lookup_molecules_by_smiles(
+    db: AsyncSession, smiles_list: List[str], dedup_level: str = "exact"
+) -> List[BulkLookupResultDto]:
+    """
+    Resolve many SMILES against the vault by structure.
+
+    The inputs are standardized (and hashed for the looser dedup levels) in chunks
+    across the shared process pool, then all keys are resolved with one query.
+    Standardized SMILES are cached, so re-submitted inputs are not standardized again.
+
+    Args:
+        db (AsyncSession): The database session to execute queries.
+        smiles_list (List[str]): The SMILES to look up.
+        dedup_level (str): How loosely a stored molecule may match: 'exact', 'stereo',
+            'tautomer' or 'connectivity'.
+
+    Returns:
+        List[BulkLookupResultDto]: One result per input, in input order.
+    """
+    logger.info(f"Bulk lookup of {len(smiles_list)} SMILES at dedup level {dedup_level}")
+    # Fail fast on an unknown dedup level
+    dedup_column(dedup_level)
+
+    # Inputs seen before are resolved from the standardization cache; exact lookups
+    # of cached inputs skip the process pool entirely
+    await prefetch_standardizations("smiles", smiles_list)
+    cached = [standardization_cache.get("smiles", smiles) for smiles in smiles_list]
+
+    standardized = [None] * len(smiles_list)
+    pending = []
+    for i, smiles_canonical in enumerate(cached):
+        if smiles_canonical is not None and dedup_level == "exact":
+            standardized[i] = (smiles_canonical, smiles_canonical, None)
+        else:
+            pending.append(i)
+
+    chunks = [
+        pending[i : i + LOOKUP_CHUNK_SIZE]
+        for i in range(0, len(pending), LOOKUP_CHUNK_SIZE)
+    ]
+    chunk_results = await asyncio.gather(
+        *[
+            run_in_process_pool(
+                dedup_keys_batch,
+                [smiles_list[j] for j in chunk],
+                dedup_level,
+                [cached[j] for j in chunk],
+            )
+            for chunk in chunks
+        ]
+    )
+    for chunk, chunk_result in zip(chunks, chunk_results):
+        for j, result in zip(chunk, chunk_result):
+            standardized[j] = result
+            if cached[j] is None and result[0] is not None:
+                standardization_cache.put("smiles", smiles_list[j], result[0])
+    schedule_flush()
+
+    found = await get_molecules_by_dedup_keys(
+        db, [key for _, key, _ in standardized if key is not None], dedup_level
+    )
+
+    results = []
+    for input_smiles, (smiles_canonical, key, error) in zip(smiles_list, standardized):
+        molecule = found.get(key) if key else None
+        results.append(
+            BulkLookupResultDto(
+                input=input_smiles,
+                smiles_canonical=smiles_canonical,
+                found=molecule is not None,
+                molecule=_molecule_dto(molecule),
+                error=error,
+            )
+        )
+
+    logger.info(
+        f"Bulk lookup matched {sum(r.found for r in results)} of {len(results)} SMILES"
+    )
+    return results
+
+
+async def lookup_molecules_by_inchikeys(
+    db: AsyncSession, inchi_keys: List[str]
+) -> List[BulkLookupResultDto]:
+    """
+    Resolve many InChIKeys against the vault with one indexed query.
+
+    Args:
+        db (AsyncSession): The database session to execute queries.
+        inchi_keys (List[str]): The InChIKeys to look up.
+
+    Returns:
+        List[BulkLookupResultDto]: One result per input, in input order. When several
+        molecules share a key the earliest registered one is returned.
+    """
+    logger.info(f"Bulk lookup of {len(inchi_keys)} InChIKeys")
+
+    normalized = []
+    for inchi_key in inchi_keys:
+        try:
+            normalized.append((normalize_inchikey(inchi_key), None))
+        except ValueError as ve:
+            normalized.append((None, str(ve)))
+
+    found = await get_molecules_by_inchikeys(
+        db, [key for key, _ in normalized if key is not None]
+    )
+
+    results = []
+    for inchi_key, (key, error) in zip(inchi_keys, normalized):
+        molecules = found.get(key) if key else None
+        molecule = molecules[0] if molecules else None
+        results.append(
+            BulkLookupResultDto(
+                input=inchi_key,
+                smiles_canonical=molecule.smiles_canonical if molecule else None,
+                found=molecule is not None,
+                molecule=_molecule_dto(molecule),
+                error=error,
+            )
+        )
+    return results
+
+
+def _molecule_dto(molecule) -> Optional[MoleculeBase]:
+    """Convert a found Molecule row for the result DTO."""
+    if molecule is None:
+        return None
+    return MoleculeBase.model_validate(molecule, from_attributes=True)
@@ -0,0 +1,186 @@
+import asyncio
+import datetime
+import os
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.core.process_pool import run_in_process_pool
+from app.db.base import SessionLocal
+from app.db.models.molecule import Molecule
+from app.utils.molecules import fp_gen
+from app.utils.molecules.fp_similarity import unpack_stored_fingerprints
+from app.utils.molecules.lsh import MinHashLSH, band_keys
+
+# Molecules read per query when building or catching up the index
+INDEX_BATCH_SIZE = 10000
+
+lsh_index = MinHashLSH(n_bands=settings.LSH_BANDS)
+
+_build_task = None
+# Set once the index holds every molecule up to its watermark; only then is it saved
+_ready = False
+
+
+async def load_lsh_index():
+    """
+    Load the approximate similarity index from disk and add the molecules registered
+    since it was saved. Without a usable file a full build is started in the background.
+    """
+    global _ready
+    if not settings.LSH_INDEX_ENABLED:
+        logger.info("Approximate similarity index disabled.")
+        return
+
+    path = settings.LSH_INDEX_PATH
+    if not os.path.exists(path):
+        logger.info(f"No approximate similarity index at {path}; building it.")
+        start_lsh_index_build()
+        return
+
+    try:
+        metadata = lsh_index.read(path)
+    except ValueError as e:
+        logger.warning(f"Rebuilding approximate similarity index: {e}")
+        start_lsh_index_build()
+        return
+
+    logger.info(f"Loaded approximate similarity index with {len(lsh_index)} molecules")
+    watermark = datetime.datetime.fromisoformat(metadata["watermark"])
+    await index_molecules(Molecule._created_at > watermark)
+    _ready = True
+
+
+def start_lsh_index_build() -> bool:
+    """Start a background rebuild unless one is running. Returns True if it was started."""
+    global _build_task
+    if _build_task is not None and not _build_task.done():
+        return False
+    _build_task = asyncio.create_task(build_lsh_index())
+    return True
+
+
+async def build_lsh_index():
+    """
+    Rebuild the approximate similarity index from the Morgan fingerprints of all
+    molecules and save it.
+    """
+    global _ready
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    logger.info("Building approximate similarity index")
+    # Until the build completes, the file on disk stays the one to resume from
+    _ready = False
+
+    fresh_index = MinHashLSH(n_bands=settings.LSH_BANDS)
+    await index_molecules(None, fresh_index)
+    ids, keys = fresh_index.snapshot()
+    lsh_index.load(ids, keys)
+
+    # Molecules registered during the build went to the replaced index
+    await index_molecules(Molecule._created_at > started_at)
+    _ready = True
+    save_lsh_index()
+    logger.info(f"Approximate similarity index built with {len(lsh_index)} molecules")
+
+
+async def index_molecules(condition, index: Optional[MinHashLSH] = None) -> int:
+    """
+    Add the molecules matching `condition` (all molecules if None) to an index, reading
+    them in keyset-paginated batches and computing band keys in the process pool.
+    """
+    if index is None:
+        index = lsh_index
+    last_id = None
+    indexed = 0
+
+    while True:
+        async with SessionLocal() as db:
+            query = (
+                select(Molecule.id, Molecule.morgan_fp)
+                .where(Molecule.morgan_fp.is_not(None))
+                .order_by(Molecule.id)
+                .limit(INDEX_BATCH_SIZE)
+            )
+            if condition is not None:
+                query = query.where(condition)
+            if last_id is not None:
+                query = query.where(Molecule.id > last_id)
+            rows = (await db.execute(query)).all()
+        if not rows:
+            break
+
+        fps = unpack_stored_fingerprints([row[1] for row in rows])
+        keys = await run_in_process_pool(
+            band_keys, fps, index.n_bands, index.fp_size, index.seed
+        )
+        index.add([row[0] for row in rows], keys)
+
+        last_id = rows[-1][0]
+        indexed += len(rows)
+        logger.debug(f"Approximate similarity index: added {indexed} molecules")
+
+    index.merge()
+    return indexed
+
+
+async def add_molecules_to_lsh_index(molecules: List[Molecule]):
+    """Add newly registered molecules (with their Morgan fingerprints set) to the index."""
+    if not settings.LSH_INDEX_ENABLED:
+        return
+    molecules = [molecule for molecule in molecules if molecule.morgan_fp is not None]
+    if not molecules:
+        return
+    fps = unpack_stored_fingerprints([molecule.morgan_fp for molecule in molecules])
+    keys = await run_in_process_pool(
+        band_keys, fps, lsh_index.n_bands, lsh_index.fp_size, lsh_index.seed
+    )
+    lsh_index.add([molecule.id for molecule in molecules], keys)
+
+
+def remove_from_lsh_index(molecule_id: UUID):
+    if settings.LSH_INDEX_ENABLED:
+        lsh_index.remove(molecule_id)
+
+
+def approximate_candidates(query_smiles: str) -> Optional[List[UUID]]:
+    """
+    Molecule IDs likely to be similar to a standardized query, best first; None when
+    the index is disabled or not built yet.
+    """
+    if not settings.LSH_INDEX_ENABLED or len(lsh_index) == 0:
+        return None
+    query_fp = unpack_stored_fingerprints([fp_gen.generate_morgan_fp(query_smiles)])[0]
+    return lsh_index.query(query_fp, settings.LSH_MAX_CANDIDATES)
+
+
+def save_lsh_index():
+    """Write the index to disk, replacing the previous file atomically."""
+    if not settings.LSH_INDEX_ENABLED or not _ready:
+        return
+    path = settings.LSH_INDEX_PATH
+    watermark = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        lsh_index.save(file, watermark=watermark)
+    os.replace(temporary_path, path)
+    logger.info(f"Saved approximate similarity index to {path}")
+
+
+async def stop_lsh_index():
+    """Stop a running build and save the index."""
+    if _build_task is not None and not _build_task.done():
+        _build_task.cancel()
+    save_lsh_index()
+
+
+def lsh_index_stats() -> Dict[str, Any]:
+    return {
+        "enabled": settings.LSH_INDEX_ENABLED,
+        "molecules": len(lsh_index),
+        "bands": lsh_index.n_bands,
+        "max_candidates": settings.LSH_MAX_CANDIDATES,
+        "ready": _ready,
+        "building": _build_task is not None and not _build_task.done(),
+        "path": settings.LSH_INDEX_PATH,
+    }
@@ -0,0 +1,115 @@
+import threading
+from bisect import bisect_left, insort
+from typing import List, Tuple
+from uuid import UUID
+from sqlalchemy import select
+from app.core.logging_config import logger
+from app.db.base import SessionLocal
+from app.db.models.molecule import Molecule
+from app.db.models.molecule_synonym import MoleculeSynonym
+from app.utils.molecules.helper import normalize_synonym
+
+
+class NameIndex:
+    """
+    In-process prefix index over molecule names and synonyms.
+
+    Entries are kept in a list sorted by normalized name, so a prefix lookup is a
+    binary search followed by a short scan and never touches Postgres.
+    """
+
+    def __init__(self):
+        # (normalized name, is_synonym, display name, molecule id)
+        self._entries: List[Tuple[str, bool, str, UUID]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self, entries: List[Tuple[str, bool, str, UUID]]):
+        """Replace the index content with (name, is_synonym, molecule id) entries."""
+        built = sorted(
+            (normalize_synonym(name), is_synonym, name, molecule_id)
+            for name, is_synonym, molecule_id in entries
+            if name and name.strip()
+        )
+        with self._lock:
+            self._entries = built
+
+    def add(self, molecule_id: UUID, name: str, is_synonym: bool = False):
+        """Add a name or synonym of a molecule."""
+        if not name or not name.strip():
+            return
+        entry = (normalize_synonym(name), is_synonym, name, molecule_id)
+        with self._lock:
+            position = bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                return
+            insort(self._entries, entry)
+
+    def add_molecule(self, molecule):
+        """Add the name and all synonyms of a Molecule."""
+        self.add(molecule.id, molecule.name)
+        for entry in molecule.synonym_entries:
+            self.add(molecule.id, entry.name, is_synonym=True)
+
+    def remove_molecule(self, molecule_id: UUID):
+        """Drop all entries of a molecule."""
+        with self._lock:
+            self._entries = [e for e in self._entries if e[3] != molecule_id]
+
+    def complete(self, prefix: str, limit: int = 10) -> List[dict]:
+        """
+        Return up to `limit` completions for a prefix.
+
+        Primary names rank before synonyms and shorter names before longer ones; each
+        molecule appears once, under its best-ranked matching name.
+        """
+        key = normalize_synonym(prefix)
+        if not key:
+            return []
+
+        # Scan a bounded window of matches so very short prefixes stay cheap
+        candidates = []
+        with self._lock:
+            position = bisect_left(self._entries, (key,))
+            while (
+                position < len(self._entries)
+                and self._entries[position][0].startswith(key)
+                and len(candidates) < limit * 20
+            ):
+                candidates.append(self._entries[position])
+                position += 1
+
+        candidates.sort(key=lambda e: (e[1], len(e[0]), e[0]))
+        completions, seen = [], set()
+        for normalized, is_synonym, name, molecule_id in candidates:
+            if molecule_id in seen:
+                continue
+            seen.add(molecule_id)
+            completions.append(
+                {"name": name, "molecule_id": molecule_id, "synonym": is_synonym}
+            )
+            if len(completions) >= limit:
+                break
+        return completions
+
+
+name_index = NameIndex()
+
+
+async def build_name_index():
+    """
+    Load all molecule names and synonyms from the vault into the in-process index.
+    """
+    logger.info("Building molecule name index")
+    async with SessionLocal() as db:
+        names = await db.execute(select(Molecule.name, Molecule.id))
+        entries = [(name, False, molecule_id) for name, molecule_id in names]
+        synonyms = await db.execute(
+            select(MoleculeSynonym.name, MoleculeSynonym.molecule_id)
+        )
+        entries.extend((name, True, molecule_id) for name, molecule_id in synonyms)
+
+    name_index.load(entries)
+    logger.info(f"Molecule name index built with {len(name_index)} entries")
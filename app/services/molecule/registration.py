@@ -2,24 +2,47 @@ import uuid
 from app.repositories import molecule as molecule_repo
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.repositories.parent_molecule import get_parent_molecule
-from app.schemas.molecule import MoleculeUpdate
 from app.schemas.molecule_dto import InputMoleculeDto
 from app.core.logging_config import logger
-from app.services.molecule.standardization import standardize, standardize_parent
-from app.repositories.molecule import get_molecule_by_smiles
+from app.services.molecule.standardization import (
+    set_descriptors,
+    standardize,
+    standardize_parent,
+)
+from app.core.config import settings
+from app.repositories.molecule import get_molecule_by_dedup_key
 from app.repositories import parent_molecule as parent_molecule_repo
+from app.utils.molecules.helper import normalize_synonym
+from app.services.molecule.name_index import name_index
+from app.services.molecule.lsh_index import add_molecules_to_lsh_index
+from app.services.molecule.standardization_store import (
+    prefetch_standardizations,
+    schedule_flush,
+)
+from app.utils.molecules.registration_hash import dedup_column
+
+
+async def register(
+    input_molecule: InputMoleculeDto, db: AsyncSession, dedup_level: str = "exact"
+):
+    """Handle standardization and creation of a molecule.
 
-
-async def register(input_molecule: InputMoleculeDto, db: AsyncSession):
-    """Handle standardization and creation of a molecule."""
+    `dedup_level` selects which registered molecules count as the same compound:
+    'exact' (canonical SMILES), 'stereo', 'tautomer' or 'connectivity'.
+    """
     try:
         logger.info(f"Registering molecule: {input_molecule.model_dump()}")
 
-        # Step 1: Standardize the molecule
-        standardized_molecule = standardize(input_molecule)
+        # Step 1: Standardize the molecule; descriptors are only needed for new molecules
+        await prefetch_standardizations("molecule/none", [input_molecule.smiles])
+        standardized_molecule = standardize(input_molecule, profile="none")
+        schedule_flush()
 
-        existing_molecule = await get_molecule_by_smiles(
-            db, standardized_molecule.smiles_canonical
+        existing_molecule = await get_molecule_by_dedup_key(
+            db,
+            getattr(standardized_molecule, dedup_column(dedup_level)),
+            dedup_level,
+            standardized_molecule.smiles_canonical,
         )
         # Check if the molecule already exists in the database
         if existing_molecule:
@@ -51,6 +74,9 @@ async def register(input_molecule: InputMoleculeDto, db: AsyncSession):
             molecule_id = uuid.uuid4()
 
         standardized_molecule.id = molecule_id
+        set_descriptors(
+            standardized_molecule, profile=settings.REGISTRATION_DESCRIPTOR_PROFILE
+        )
 
         # Check for parent molecule
         parent_molecule = await get_parent_molecule(
@@ -64,9 +90,14 @@ async def register(input_molecule: InputMoleculeDto, db: AsyncSession):
             # Register parent molecule
             logger.info("Parent molecule not found. Registering parent molecule.")
             parent_molecule_id = str(uuid.uuid4())
+            profile = settings.REGISTRATION_DESCRIPTOR_PROFILE
+            await prefetch_standardizations(
+                f"parent/{profile}", [standardized_molecule.o_molblock]
+            )
             standardized_parent_molecule = standardize_parent(
-                standardized_molecule.o_molblock
+                standardized_molecule.o_molblock, profile=profile
             )
+            schedule_flush()
             standardized_parent_molecule.id = parent_molecule_id
             standardized_parent_molecule.name = input_molecule.name
             new_parent_molecule = await parent_molecule_repo.create_parent_molecule(
@@ -75,6 +106,8 @@ async def register(input_molecule: InputMoleculeDto, db: AsyncSession):
             standardized_molecule.parent_id = new_parent_molecule.id
 
         new_molecule = await molecule_repo.create_molecule(db, standardized_molecule)
+        name_index.add_molecule(new_molecule)
+        await add_molecules_to_lsh_index([new_molecule])
 
         return standardized_molecule
 
@@ -91,27 +124,26 @@ async def handle_molecule_name(
     """Handle molecule name and synonyms if the name doesn't match or is not in synonyms."""
     if existing_molecule.name != input_molecule_name:
 
-        # Ensure that the synonyms are split into a list
-        existing_synonyms = (
-            existing_molecule.synonyms.split(",") if existing_molecule.synonyms else []
-        )
+        normalized_name = normalize_synonym(input_molecule_name)
+        existing_synonyms = {
+            entry.name_normalized for entry in existing_molecule.synonym_entries
+        }
 
         # Add the input molecule name to the synonyms if it is not already present
-        if input_molecule_name not in existing_synonyms:
+        if normalized_name and normalized_name not in existing_synonyms:
             logger.info(
                 f"Input name '{input_molecule_name}' not found in synonyms. Adding it."
             )
-            existing_synonyms.append(input_molecule_name)
-            # sort the synonyms
-            existing_synonyms.sort()
-            unique_synonyms = sorted(set(existing_synonyms))
-            existing_molecule.synonyms = ",".join(unique_synonyms)
-
-            # Update the molecule with the new synonyms
-            update_molecule = MoleculeUpdate(
-                id=existing_molecule.id,
-                name=existing_molecule.name,
-                synonyms=existing_molecule.synonyms
+            await molecule_repo.add_molecule_synonyms(
+                db,
+                [
+                    {
+                        "molecule_id": existing_molecule.id,
+                        "name": input_molecule_name.strip(),
+                        "name_normalized": normalized_name,
+                    }
+                ],
             )
-            await molecule_repo.update_molecule(db, update_molecule.id, update_molecule)
+            await db.refresh(existing_molecule, attribute_names=["synonym_entries"])
+            name_index.add(existing_molecule.id, input_molecule_name, is_synonym=True)
     return existing_molecule
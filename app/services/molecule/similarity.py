@@ -1,12 +1,22 @@
-from app.repositories.molecule import search_similar_molecules
+from app.repositories.molecule import (
+    search_similar_molecules,
+    search_similar_molecules_fused,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from app.core.logging_config import logger
+import time
 from typing import List, Dict, Any
 
-from app.schemas.similar_molecule_dto import SimilarMoleculeDto
+from app.repositories.parent_molecule import search_similar_parents
+from app.schemas.similar_molecule_dto import SimilarMoleculeDto, SimilarParentMoleculeDto
 from app.utils.molecules import fp_gen
 from app.utils.molecules.helper import standardize_smiles
+from app.services.molecule.lsh_index import approximate_candidates
+from app.services.molecule.standardization_store import (
+    prefetch_standardizations,
+    schedule_flush,
+)
 
 
 async def find_similar_molecules(
@@ -15,6 +25,13 @@ async def find_similar_molecules(
     threshold: float = 0.7,
     limit: int = 100,
     filters: Dict[str, Any] = None,
+    fp_name: str = "morgan",
+    fused: bool = False,
+    morgan_weight: float = 0.5,
+    metric: str = "tanimoto",
+    tversky_alpha: float = 1.0,
+    tversky_beta: float = 1.0,
+    approximate: bool = False,
 ) -> List[SimilarMoleculeDto]:
     """
     Fetches molecules from the database with a similarity score above the threshold.
@@ -23,6 +40,16 @@ async def find_similar_molecules(
         db (AsyncSession): The database session to execute queries.
         query_fp (str): The fingerprint of the query molecule.
         threshold (float, optional): The similarity threshold. Defaults to 0.7.
+        fp_name (str, optional): Registered fingerprint to compare. Defaults to 'morgan'.
+        fused (bool, optional): Rank Morgan candidates by a weighted Morgan and RDKit
+            score instead; `fp_name` is ignored. Defaults to False.
+        morgan_weight (float, optional): Weight of the Morgan score in a fused search.
+        metric (str, optional): 'tanimoto', 'dice' or 'tversky'. Defaults to 'tanimoto'.
+        tversky_alpha (float, optional): Tversky weight of bits only set in the stored molecule.
+        tversky_beta (float, optional): Tversky weight of bits only set in the query.
+        approximate (bool, optional): Only score the candidates of the approximate
+            (LSH) index on Morgan fingerprints; falls back to the exact search when the
+            index is not available. Defaults to False.
 
     Returns:
         List[Dict[str, Any]]: A list of dictionaries representing the similar molecules.
@@ -31,29 +58,178 @@ async def find_similar_molecules(
         HTTPException: If an error occurs during the similarity search.
     """
     try:
-        logger.info(f"Initiating similarity search with threshold: {threshold}")
+        logger.info(
+            f"Initiating {'fused' if fused else fp_name} {metric} similarity search with threshold: {threshold}"
+        )
+        await prefetch_standardizations("smiles", [query_molecule])
         standard_query_smiles = standardize_smiles(query_molecule)
+        schedule_flush()
 
         # Call the repository function to execute the similarity search
-        results = await search_similar_molecules(
+        if fused:
+            results = await search_similar_molecules_fused(
+                db=db,
+                query_smiles=standard_query_smiles,
+                threshold=threshold,
+                limit=limit,
+                filters=filters,
+                morgan_weight=morgan_weight,
+                metric=metric,
+                tversky_alpha=tversky_alpha,
+                tversky_beta=tversky_beta,
+            )
+        else:
+            candidate_ids = None
+            if approximate:
+                candidate_ids = approximate_candidates(standard_query_smiles)
+                if candidate_ids is None:
+                    logger.warning(
+                        "Approximate similarity index not available, using exact search"
+                    )
+                else:
+                    logger.info(f"Approximate index returned {len(candidate_ids)} candidates")
+            results = await search_similar_molecules(
+                db=db,
+                query_smiles=standard_query_smiles,
+                threshold=threshold,
+                limit=limit,
+                filters=filters,
+                fp_name=fp_name,
+                metric=metric,
+                tversky_alpha=tversky_alpha,
+                tversky_beta=tversky_beta,
+                candidate_ids=candidate_ids,
+            )
+
+        if not results:
+            logger.warning(f"No molecules found with similarity above {threshold}")
+        else:
+            logger.info(f"Similarity search completed with {len(results)} results")
+
+        return results
+
+    except Exception as e:
+        logger.error(f"Error performing similarity search: {e}")
+        # Raise a detailed HTTP exception with a 500 status code
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while performing the similarity search",
+        )
+
+
+async def find_similar_parents(
+    db: AsyncSession,
+    query_molecule: str,
+    threshold: float = 0.7,
+    limit: int = 100,
+    filters: Dict[str, Any] = None,
+    metric: str = "tanimoto",
+    tversky_alpha: float = 1.0,
+    tversky_beta: float = 1.0,
+    include_children: bool = False,
+) -> List[SimilarParentMoleculeDto]:
+    """
+    Fetches parent molecules with a similarity score above the threshold, optionally
+    with their registered child molecules.
+
+    Raises:
+        HTTPException: If an error occurs during the similarity search.
+    """
+    try:
+        logger.info(
+            f"Initiating parent {metric} similarity search with threshold: {threshold}"
+        )
+        await prefetch_standardizations("smiles", [query_molecule])
+        standard_query_smiles = standardize_smiles(query_molecule)
+        schedule_flush()
+
+        results = await search_similar_parents(
             db=db,
             query_smiles=standard_query_smiles,
             threshold=threshold,
             limit=limit,
             filters=filters,
+            metric=metric,
+            tversky_alpha=tversky_alpha,
+            tversky_beta=tversky_beta,
+            include_children=include_children,
         )
 
         if not results:
-            logger.warning(f"No molecules found with similarity above {threshold}")
+            logger.warning(f"No parent molecules found with similarity above {threshold}")
         else:
-            logger.info(f"Similarity search completed with {len(results)} results")
+            logger.info(f"Parent similarity search completed with {len(results)} results")
 
         return results
 
     except Exception as e:
-        logger.error(f"Error performing similarity search: {e}")
-        # Raise a detailed HTTP exception with a 500 status code
+        logger.error(f"Error performing parent similarity search: {e}")
         raise HTTPException(
             status_code=500,
             detail="An error occurred while performing the similarity search",
         )
+
+
+async def benchmark_approximate_search(
+    db: AsyncSession,
+    query_molecules: List[str],
+    threshold: float = 0.7,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """
+    Run each query with the exact and the approximate Morgan Tanimoto search and report
+    the recall of the approximate results against the exact ones, with timings.
+
+    Raises:
+        ValueError: If the approximate index is not available.
+    """
+    queries = []
+    for query_molecule in query_molecules:
+        await prefetch_standardizations("smiles", [query_molecule])
+        standard_query_smiles = standardize_smiles(query_molecule)
+
+        started = time.perf_counter()
+        exact = await search_similar_molecules(
+            db=db, query_smiles=standard_query_smiles, threshold=threshold, limit=limit
+        )
+        exact_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        candidate_ids = approximate_candidates(standard_query_smiles)
+        if candidate_ids is None:
+            raise ValueError("Approximate similarity index is not available.")
+        approximate = await search_similar_molecules(
+            db=db,
+            query_smiles=standard_query_smiles,
+            threshold=threshold,
+            limit=limit,
+            candidate_ids=candidate_ids,
+        )
+        approximate_ms = (time.perf_counter() - started) * 1000
+
+        exact_ids = {row["id"] for row in exact}
+        found = len(exact_ids & {row["id"] for row in approximate})
+        queries.append(
+            {
+                "smiles": query_molecule,
+                "exact_hits": len(exact_ids),
+                "approximate_hits": len(approximate),
+                "candidates": len(candidate_ids),
+                "recall": found / len(exact_ids) if exact_ids else 1.0,
+                "exact_ms": round(exact_ms, 2),
+                "approximate_ms": round(approximate_ms, 2),
+            }
+        )
+    schedule_flush()
+
+    count = len(queries)
+    return {
+        "threshold": threshold,
+        "limit": limit,
+        "mean_recall": sum(q["recall"] for q in queries) / count if count else None,
+        "mean_exact_ms": sum(q["exact_ms"] for q in queries) / count if count else None,
+        "mean_approximate_ms": (
+            sum(q["approximate_ms"] for q in queries) / count if count else None
+        ),
+        "queries": queries,
+    }
@@ -1,3 +1,6 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
 from app.schemas.molecule_dto import InputMoleculeDto
 from app.schemas.molecule import MoleculeBase
 import datamol as dm
@@ -6,13 +9,58 @@ from chembl_structure_pipeline import standardizer
 from app.core.logging_config import logger
 from app.schemas.parent_molecule import ParentMoleculeBase
 from app.utils.molecules.compliance import Ro5
+from app.utils.molecules.scaffold import compute_scaffolds
+from app.utils.molecules.registration_hash import compute_registration_hashes
+from app.utils.molecules.standardization_cache import standardization_cache
+from app.utils.molecules.descriptors import (
+    add_ro5_column,
+    compute_descriptor_columns,
+    compute_descriptors,
+    descriptor_names,
+)
+from app.core.process_pool import run_in_process_pool
 
 
-def standardize(input_molecule: InputMoleculeDto) -> MoleculeBase:
+# Molecules per worker task when computing descriptor columns
+DESCRIPTOR_CHUNK_SIZE = 500
+
+# Fields of a standardized molecule taken from the input rather than the cache
+MOLECULE_INPUT_FIELDS = {"id", "name", "smiles", "synonyms"}
+PARENT_INPUT_FIELDS = {"id", "name", "synonyms"}
+
+
+def standardize(
+    input_molecule: InputMoleculeDto, profile: str = "full"
+) -> MoleculeBase:
+    """Standardizes a molecule, serving repeated input SMILES from the standardization cache.
+
+    Args:
+        input_molecule (InputMoleculeDto): Input molecule data.
+        profile (str): Descriptor profile, 'none', 'core' or 'full'. Defaults to 'full'.
+
+    Returns:
+        MoleculeBase: Standardized molecule with computed descriptors and RO5 compliance.
+    """
+    kind = f"molecule/{profile}"
+    cached = standardization_cache.get(kind, input_molecule.smiles)
+    if cached is not None:
+        return MoleculeBase(**input_molecule.model_dump(), **cached)
+
+    molecule = _standardize(input_molecule, profile)
+    standardization_cache.put(
+        kind,
+        input_molecule.smiles,
+        molecule.model_dump(mode="json", exclude=MOLECULE_INPUT_FIELDS),
+    )
+    return molecule
+
+
+def _standardize(input_molecule: InputMoleculeDto, profile: str = "full") -> MoleculeBase:
     """Standardizes a molecule and computes molecular descriptors.
 
     Args:
         input_molecule (InputMoleculeDto): Input molecule data.
+        profile (str): Descriptor profile, 'none', 'core' or 'full'.
 
     Returns:
         MoleculeBase: Standardized molecule with computed descriptors and RO5 compliance.
@@ -47,13 +95,22 @@ def standardize(input_molecule: InputMoleculeDto) -> MoleculeBase:
         molecule.inchi_key = dm.to_inchikey(std_mol)
         molecule.smarts = dm.to_smarts(std_mol)
 
-        # Compute descriptors and update molecule
-        descriptors = dm.descriptors.compute_many_descriptors(std_mol)
-        molecule = molecule.model_copy(update=descriptors)
-        
-        molecule.formula = rdMolDescriptors.CalcMolFormula(std_mol)        
-        # Check RO5 compliance
-        molecule.ro5_compliant = Ro5(molecule)
+        # Compute descriptors of the profile and RO5 compliance
+        set_descriptors(molecule, std_mol, profile)
+
+        molecule.formula = rdMolDescriptors.CalcMolFormula(std_mol)
+
+        # Compute Bemis-Murcko scaffolds
+        scaffolds = compute_scaffolds(std_mol)
+        molecule.murcko_scaffold = scaffolds["murcko_scaffold"]
+        molecule.generic_murcko_scaffold = scaffolds["generic_murcko_scaffold"]
+        molecule.murcko_scaffold_hash = scaffolds["murcko_scaffold_hash"]
+
+        # Compute registration hash layers used for dedup and lookup
+        hashes = compute_registration_hashes(std_mol)
+        molecule.hash_no_stereo = hashes["hash_no_stereo"]
+        molecule.hash_tautomer = hashes["hash_tautomer"]
+        molecule.hash_connectivity = hashes["hash_connectivity"]
 
         logger.debug(f"Standardized molecule: {molecule.model_dump()}")
         return molecule
@@ -67,11 +124,36 @@ def standardize(input_molecule: InputMoleculeDto) -> MoleculeBase:
         raise Exception("Internal error")
 
 
-def standardize_parent(ChildMolBlock: str) -> ParentMoleculeBase:
+def standardize_parent(ChildMolBlock: str, profile: str = "full") -> ParentMoleculeBase:
+    """Standardizes a ParentMolecule, serving repeated molblocks from the standardization cache.
+
+    Args:
+        ChildMolBlock (str): Input molecule data.
+        profile (str): Descriptor profile, 'none', 'core' or 'full'. Defaults to 'full'.
+
+    Returns:
+        ParentMoleculeBase: Standardized parent molecule with computed descriptors and RO5 compliance.
+    """
+    kind = f"parent/{profile}"
+    cached = standardization_cache.get(kind, ChildMolBlock)
+    if cached is not None:
+        return ParentMoleculeBase(**cached)
+
+    parent_molecule = _standardize_parent(ChildMolBlock, profile)
+    standardization_cache.put(
+        kind,
+        ChildMolBlock,
+        parent_molecule.model_dump(mode="json", exclude=PARENT_INPUT_FIELDS),
+    )
+    return parent_molecule
+
+
+def _standardize_parent(ChildMolBlock: str, profile: str = "full") -> ParentMoleculeBase:
     """Standardizes a ParentMolecule and computes molecular descriptors.
 
     Args:
         ChildMolBlock (str): Input molecule data.
+        profile (str): Descriptor profile, 'none', 'core' or 'full'.
 
     Returns:
         ParentMoleculeBase: Standardized parent molecule with computed descriptors and RO5 compliance.
@@ -102,14 +184,16 @@ def standardize_parent(ChildMolBlock: str) -> ParentMoleculeBase:
         parent_molecule.inchi_key = dm.to_inchikey(mol)
         parent_molecule.smarts = dm.to_smarts(mol)
 
-        # Compute descriptors and update molecule
-        descriptors = dm.descriptors.compute_many_descriptors(mol)
-        parent_molecule = parent_molecule.model_copy(update=descriptors)
+        # Compute descriptors of the profile and RO5 compliance
+        set_descriptors(parent_molecule, mol, profile)
 
-        # Check RO5 compliance
-        parent_molecule.ro5_compliant = Ro5(parent_molecule)
-        
         parent_molecule.formula = rdMolDescriptors.CalcMolFormula(mol)
+
+        # Compute Bemis-Murcko scaffolds
+        scaffolds = compute_scaffolds(mol)
+        parent_molecule.murcko_scaffold = scaffolds["murcko_scaffold"]
+        parent_molecule.generic_murcko_scaffold = scaffolds["generic_murcko_scaffold"]
+        parent_molecule.murcko_scaffold_hash = scaffolds["murcko_scaffold_hash"]
         
         logger.debug(f"Standardized ParentMolecule: {parent_molecule.model_dump()}")
         return parent_molecule
@@ -121,3 +205,81 @@ def standardize_parent(ChildMolBlock: str) -> ParentMoleculeBase:
     except Exception as e:
         logger.error(f"Error processing ParentMolecule: {e}")
         raise Exception("Internal error")
+
+
+def set_descriptors(molecule, mol=None, profile: str = "full"):
+    """Compute the descriptors of a profile and RO5 compliance onto a molecule in place.
+
+    Works on the pydantic schemas as well as the ORM models. Descriptors outside the
+    profile are set to None so a background job can fill them in later; RO5 compliance
+    is left unset when the profile does not cover its descriptors.
+
+    Args:
+        molecule: MoleculeBase, ParentMoleculeBase or a Molecule/ParentMolecule row.
+        mol: The RDKit molecule; parsed from `molecule.smiles_canonical` if omitted.
+        profile (str): Descriptor profile, 'none', 'core' or 'full'.
+
+    Raises:
+        ValueError: If the profile is unknown or the molecule cannot be parsed.
+    """
+    names = descriptor_names(profile)
+    if mol is None:
+        mol = dm.to_mol(molecule.smiles_canonical)
+        if mol is None:
+            raise ValueError(f"Unable to convert SMILES to mol: {molecule.smiles_canonical}")
+
+    for name, value in compute_descriptors(mol, profile).items():
+        setattr(molecule, name, value)
+    molecule.ro5_compliant = Ro5(molecule) if names else None
+
+
+async def compute_descriptors_columnar(
+    mols: List, profile: str = "full"
+) -> Dict[str, np.ndarray]:
+    """Compute descriptors for many molecules across the shared process pool.
+
+    Args:
+        mols (List): RDKit molecules or canonical SMILES (cheaper to send to workers).
+        profile (str): Descriptor profile, 'none', 'core' or 'full'. Defaults to 'full'.
+
+    Returns:
+        Dict[str, np.ndarray]: One float64 column per descriptor of the profile (NaN
+        where a molecule failed), a boolean 'valid' mask and, when the profile covers
+        it, a vectorized 'ro5_compliant' column. Rows follow the input order.
+    """
+    descriptor_names(profile)
+    chunks = [
+        mols[i : i + DESCRIPTOR_CHUNK_SIZE]
+        for i in range(0, len(mols), DESCRIPTOR_CHUNK_SIZE)
+    ]
+    if not chunks:
+        return add_ro5_column(compute_descriptor_columns([], profile))
+
+    chunk_columns = await asyncio.gather(
+        *[run_in_process_pool(compute_descriptor_columns, chunk, profile) for chunk in chunks]
+    )
+    columns = {
+        name: np.concatenate([chunk[name] for chunk in chunk_columns])
+        for name in chunk_columns[0]
+    }
+    return add_ro5_column(columns)
+
+
+def standardize_batch(
+    smiles_list: List[str], profile: str = "full"
+) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """Standardize and describe a list of SMILES with `standardize()`, collecting errors.
+
+    Meant to run in a worker process. Returns (standardized fields, error) per input;
+    the fields exclude the ones taken from the input (id, name, smiles, synonyms).
+    """
+    results = []
+    for smiles in smiles_list:
+        try:
+            molecule = standardize(InputMoleculeDto(name="", smiles=smiles), profile)
+            results.append(
+                (molecule.model_dump(mode="json", exclude=MOLECULE_INPUT_FIELDS), None)
+            )
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
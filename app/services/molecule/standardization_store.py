@@ -0,0 +1,106 @@
+import asyncio
+from typing import List
+from sqlalchemy import String, delete, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.sql import any_, bindparam
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.db.base import SessionLocal
+from app.db.models.standardization_cache import StandardizationCacheEntry
+from app.utils.molecules.standardization_cache import (
+    PIPELINE_VERSION,
+    standardization_cache,
+)
+
+# Rows per INSERT when flushing queued cache entries
+FLUSH_BATCH_SIZE = 1000
+
+_flush_task = None
+
+
+async def start_standardization_cache():
+    """
+    Enable the persistent standardization cache level for this process and purge
+    entries written by another pipeline version.
+    """
+    if not settings.STANDARDIZATION_CACHE_PERSIST:
+        logger.info("Persistent standardization cache disabled.")
+        return
+
+    async with SessionLocal() as db:
+        result = await db.execute(
+            delete(StandardizationCacheEntry).where(
+                StandardizationCacheEntry.pipeline_version != PIPELINE_VERSION
+            )
+        )
+        await db.commit()
+    logger.info(
+        f"Standardization cache pipeline version {PIPELINE_VERSION}, "
+        f"purged {result.rowcount} stale entries."
+    )
+    standardization_cache.enable_persistence()
+
+
+async def prefetch_standardizations(kind: str, raw_inputs: List[str]):
+    """
+    Load persisted results for the inputs missing from the in-process LRU with one query,
+    so the following standardize calls are served from memory.
+    """
+    if not standardization_cache.persisting:
+        return
+    keys = standardization_cache.missing_keys(kind, raw_inputs)
+    if not keys:
+        return
+    try:
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(StandardizationCacheEntry.key, StandardizationCacheEntry.result).where(
+                    StandardizationCacheEntry.pipeline_version == PIPELINE_VERSION,
+                    StandardizationCacheEntry.key
+                    == any_(bindparam("keys", keys, type_=ARRAY(String))),
+                )
+            )
+            standardization_cache.load({row.key: row.result for row in result})
+    except Exception as e:
+        # A cache read failure only means recomputing
+        logger.error(f"Error reading the standardization cache: {e}")
+
+
+def schedule_flush():
+    """Write queued cache entries in the background, one flush at a time."""
+    global _flush_task
+    if not standardization_cache.pending_count:
+        return
+    if _flush_task is not None and not _flush_task.done():
+        return
+    _flush_task = asyncio.create_task(flush_standardizations())
+
+
+async def flush_standardizations():
+    """Persist the queued standardization results."""
+    pending = standardization_cache.take_pending()
+    if not pending:
+        return
+    try:
+        async with SessionLocal() as db:
+            for i in range(0, len(pending), FLUSH_BATCH_SIZE):
+                batch = [
+                    {**entry, "pipeline_version": PIPELINE_VERSION}
+                    for entry in pending[i : i + FLUSH_BATCH_SIZE]
+                ]
+                await db.execute(
+                    insert(StandardizationCacheEntry)
+                    .values(batch)
+                    .on_conflict_do_nothing()
+                )
+            await db.commit()
+        logger.debug(f"Persisted {len(pending)} standardization cache entries.")
+    except Exception as e:
+        logger.error(f"Error writing the standardization cache: {e}")
+
+
+async def stop_standardization_cache():
+    """Flush the remaining queued entries on shutdown."""
+    if _flush_task is not None:
+        await _flush_task
+    await flush_standardizations()
@@ -1,3 +1,5 @@
+from typing import Dict
+import numpy as np
 from app.schemas.molecule import MoleculeBase
 
 def Ro5(molecule: MoleculeBase) -> bool:
@@ -12,3 +14,17 @@ def Ro5(molecule: MoleculeBase) -> bool:
     if mw > 500 or clogp > 5 or n_lipinski_hbd > 5 or n_lipinski_hba > 10:
         return False
     return True
+
+
+def Ro5_columns(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Check Rule of 5 compliance for whole descriptor columns at once.
+
+    Missing values (NaN) fail the check, like None does in `Ro5`.
+    """
+    with np.errstate(invalid="ignore"):
+        return (
+            (columns["mw"] <= 500)
+            & (columns["clogp"] <= 5)
+            & (columns["n_lipinski_hbd"] <= 5)
+            & (columns["n_lipinski_hba"] <= 10)
+        )
@@ -0,0 +1,183 @@
+from typing import Any, Dict, List, Optional
+import datamol as dm
+import numpy as np
+from app.core.logging_config import logger
+from app.utils.molecules.compliance import Ro5_columns
+
+# Descriptors stored for every molecule, in the order of datamol's default set
+DESCRIPTOR_NAMES = [
+    "mw",
+    "fsp3",
+    "n_lipinski_hba",
+    "n_lipinski_hbd",
+    "n_rings",
+    "n_hetero_atoms",
+    "n_heavy_atoms",
+    "n_rotatable_bonds",
+    "n_radical_electrons",
+    "tpsa",
+    "qed",
+    "clogp",
+    "sas",
+    "n_aliphatic_carbocycles",
+    "n_aliphatic_heterocycles",
+    "n_aliphatic_rings",
+    "n_aromatic_carbocycles",
+    "n_aromatic_heterocycles",
+    "n_aromatic_rings",
+    "n_saturated_carbocycles",
+    "n_saturated_heterocycles",
+    "n_saturated_rings",
+]
+
+# datamol function computing each descriptor. The pinned datamol misspells the
+# heterocycle counts ("heterocyles"), so the mapping cannot be derived from the names.
+DESCRIPTOR_FUNCTIONS = {
+    "mw": "mw",
+    "fsp3": "fsp3",
+    "n_lipinski_hba": "n_lipinski_hba",
+    "n_lipinski_hbd": "n_lipinski_hbd",
+    "n_rings": "n_rings",
+    "n_hetero_atoms": "n_hetero_atoms",
+    "n_heavy_atoms": "n_heavy_atoms",
+    "n_rotatable_bonds": "n_rotatable_bonds",
+    "n_radical_electrons": "n_radical_electrons",
+    "tpsa": "tpsa",
+    "qed": "qed",
+    "clogp": "clogp",
+    "sas": "sas",
+    "n_aliphatic_carbocycles": "n_aliphatic_carbocycles",
+    "n_aliphatic_heterocycles": "n_aliphatic_heterocyles",
+    "n_aliphatic_rings": "n_aliphatic_rings",
+    "n_aromatic_carbocycles": "n_aromatic_carbocycles",
+    "n_aromatic_heterocycles": "n_aromatic_heterocyles",
+    "n_aromatic_rings": "n_aromatic_rings",
+    "n_saturated_carbocycles": "n_saturated_carbocycles",
+    "n_saturated_heterocycles": "n_saturated_heterocyles",
+    "n_saturated_rings": "n_saturated_rings",
+}
+
+# Count descriptors, stored as integers
+INTEGER_DESCRIPTORS = [name for name in DESCRIPTOR_NAMES if name.startswith("n_")]
+
+# Descriptors that dominate the cost of a full profile; the core profile skips them
+EXPENSIVE_DESCRIPTORS = ["qed", "sas"]
+
+# none: lookups, core: cheap counts and properties (enough for Ro5), full: everything
+DESCRIPTOR_PROFILES = {
+    "none": [],
+    "core": [name for name in DESCRIPTOR_NAMES if name not in EXPENSIVE_DESCRIPTORS],
+    "full": DESCRIPTOR_NAMES,
+}
+
+
+def descriptor_names(profile: str) -> List[str]:
+    """Return the descriptors computed by a profile.
+
+    Raises:
+        ValueError: If the profile is unknown.
+    """
+    if profile not in DESCRIPTOR_PROFILES:
+        raise ValueError(
+            f"Unknown descriptor profile '{profile}'. "
+            f"Choose one of: {', '.join(DESCRIPTOR_PROFILES)}"
+        )
+    return DESCRIPTOR_PROFILES[profile]
+
+
+def compute_descriptors(mol, profile: str = "full") -> Dict[str, Any]:
+    """Compute the descriptors of a profile for a molecule.
+
+    Args:
+        mol: The RDKit molecule to describe.
+        profile (str): 'none', 'core' or 'full'. Defaults to 'full'.
+
+    Returns:
+        Dict[str, Any]: Every stored descriptor; the ones outside the profile are None
+        so they can be filled in later.
+    """
+    names = descriptor_names(profile)
+    values = dict.fromkeys(DESCRIPTOR_NAMES)
+    if names:
+        values.update(
+            dm.descriptors.compute_many_descriptors(
+                mol,
+                properties_fn={
+                    name: getattr(dm.descriptors, DESCRIPTOR_FUNCTIONS[name])
+                    for name in names
+                },
+                add_properties=False,
+            )
+        )
+    return values
+
+
+def compute_descriptor_columns(mols: List, profile: str = "full") -> Dict[str, np.ndarray]:
+    """Compute the descriptors of a profile for many molecules as columns.
+
+    Args:
+        mols (List): RDKit molecules or SMILES strings.
+        profile (str): 'none', 'core' or 'full'. Defaults to 'full'.
+
+    Returns:
+        Dict[str, np.ndarray]: One float64 array per descriptor of the profile (NaN where
+        a molecule failed) and a boolean 'valid' mask.
+    """
+    names = descriptor_names(profile)
+    columns = {name: np.full(len(mols), np.nan) for name in names}
+    valid = np.zeros(len(mols), dtype=bool)
+
+    for i, mol in enumerate(mols):
+        # Unparsable SMILES are expected here and just stay invalid
+        mol = dm.to_mol(mol) if isinstance(mol, str) else mol
+        if mol is None:
+            continue
+        try:
+            values = compute_descriptors(mol, profile)
+        except Exception as e:
+            logger.warning(f"Error computing descriptors of molecule {i}: {e}")
+            continue
+        for name in names:
+            columns[name][i] = values[name]
+        valid[i] = True
+
+    columns["valid"] = valid
+    return columns
+
+
+def add_ro5_column(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Add a vectorized 'ro5_compliant' column when the columns cover its descriptors."""
+    if all(name in columns for name in ("mw", "clogp", "n_lipinski_hbd", "n_lipinski_hba")):
+        columns["ro5_compliant"] = Ro5_columns(columns)
+    return columns
+
+
+def row_values(columns: Dict[str, np.ndarray], index: int) -> Dict[str, Any]:
+    """Convert one row of descriptor columns to Python values for the models.
+
+    Every stored descriptor is returned; the ones outside the columns, and NaN values,
+    become None. 'ro5_compliant' is included when present.
+    """
+    values = dict.fromkeys(DESCRIPTOR_NAMES)
+    for name in DESCRIPTOR_NAMES:
+        if name not in columns:
+            continue
+        value = columns[name][index]
+        if np.isnan(value):
+            continue
+        values[name] = int(value) if name in INTEGER_DESCRIPTORS else float(value)
+    if "ro5_compliant" in columns:
+        values["ro5_compliant"] = bool(columns["ro5_compliant"][index])
+    return values
+
+
+def compute_descriptors_batch(smiles_list: List[str], profile: str = "full") -> List[Optional[Dict[str, Any]]]:
+    """Compute profile descriptors and Ro5 compliance for a list of SMILES.
+
+    Unparsable entries get None.
+    """
+    columns = add_ro5_column(compute_descriptor_columns(smiles_list, profile))
+    return [
+        row_values(columns, i) if columns["valid"][i] else None
+        for i in range(len(smiles_list))
+    ]
@@ -0,0 +1,206 @@
+import re
+import threading
+from typing import List, NamedTuple, Optional, Union
+import numpy as np
+import datamol as dm
+from rdkit import DataStructs
+from rdkit.Chem import rdFingerprintGenerator
+from app.utils.molecules.fp_similarity import FP_SIZE
+
+
+class FingerprintConfig(NamedTuple):
+    """Fingerprint settings; one generator is kept per distinct configuration.
+
+    `radius` is the Morgan radius, or the maximum path length for 'rdkit' fingerprints;
+    the other types ignore it. `use_features` switches Morgan to feature invariants
+    (FCFP) and `count_simulation` encodes counts in the bit vector so count
+    fingerprints can be stored and compared like the others.
+    """
+
+    fp_type: str = "morgan"
+    radius: int = 3
+    fp_size: int = FP_SIZE
+    include_chirality: bool = True
+    use_features: bool = False
+    count_simulation: bool = False
+
+
+# Settings of the fingerprints stored in molecules.morgan_fp / rdkit_fp. They match the
+# dm.to_fp() calls they replace, so new fingerprints compare with stored ones.
+MORGAN = FingerprintConfig("morgan", radius=3, include_chirality=True)
+RDKIT = FingerprintConfig("rdkit", radius=7, include_chirality=False)
+
+FINGERPRINT_TYPES = ["morgan", "rdkit", "atompair", "torsion"]
+
+# Named fingerprint definitions available to similarity search. 'morgan' and 'rdkit'
+# are stored in their molecules columns; every other definition is stored in the
+# molecule_fingerprints side table and filled in by its backfill job, so adding one
+# here needs neither a schema change nor a re-registration.
+FINGERPRINT_REGISTRY = {
+    "morgan": MORGAN,
+    "rdkit": RDKIT,
+    "fcfp6": FingerprintConfig(
+        "morgan", radius=3, include_chirality=False, use_features=True
+    ),
+    "morgan_count": FingerprintConfig(
+        "morgan", radius=2, include_chirality=False, count_simulation=True
+    ),
+    "atompair": FingerprintConfig("atompair", include_chirality=False),
+    "torsion": FingerprintConfig("torsion", include_chirality=False),
+}
+
+# Definitions stored in a column of the molecules table
+FINGERPRINT_COLUMNS = {"morgan": "morgan_fp", "rdkit": "rdkit_fp"}
+
+# Names end up in index names and partial index predicates, so keep them to identifiers
+FINGERPRINT_NAME_PATTERN = re.compile(r"^[a-z][a-z0-9_]*$")
+
+# Generators keep per-call state, so every thread gets its own cached instances
+_local = threading.local()
+
+
+def get_config(name: str) -> FingerprintConfig:
+    """Return the registered fingerprint definition with this name.
+
+    Raises:
+        ValueError: If no fingerprint is registered under the name.
+    """
+    if name not in FINGERPRINT_REGISTRY or not FINGERPRINT_NAME_PATTERN.match(name):
+        raise ValueError(
+            f"Unknown fingerprint '{name}'. "
+            f"Choose one of: {', '.join(FINGERPRINT_REGISTRY)}"
+        )
+    return FINGERPRINT_REGISTRY[name]
+
+
+def side_table_fingerprints() -> List[str]:
+    """Names of the registered fingerprints stored in the molecule_fingerprints table."""
+    return [name for name in FINGERPRINT_REGISTRY if name not in FINGERPRINT_COLUMNS]
+
+
+def get_generator(config: FingerprintConfig):
+    """Return the cached generator of this thread for a configuration.
+
+    Raises:
+        ValueError: If the fingerprint type is not supported.
+    """
+    generators = getattr(_local, "generators", None)
+    if generators is None:
+        generators = _local.generators = {}
+
+    generator = generators.get(config)
+    if generator is None:
+        generator = generators[config] = _create_generator(config)
+    return generator
+
+
+def _create_generator(config: FingerprintConfig):
+    if config.fp_type == "morgan":
+        return rdFingerprintGenerator.GetMorganGenerator(
+            radius=config.radius,
+            fpSize=config.fp_size,
+            includeChirality=config.include_chirality,
+            countSimulation=config.count_simulation,
+            atomInvariantsGenerator=(
+                rdFingerprintGenerator.GetMorganFeatureAtomInvGen()
+                if config.use_features
+                else None
+            ),
+        )
+    if config.fp_type == "rdkit":
+        return rdFingerprintGenerator.GetRDKitFPGenerator(
+            minPath=1,
+            maxPath=config.radius,
+            useHs=True,
+            branchedPaths=True,
+            useBondOrder=True,
+            fpSize=config.fp_size,
+            # datamol's default; every path sets two bits
+            numBitsPerFeature=2,
+            countSimulation=config.count_simulation,
+        )
+    if config.fp_type == "atompair":
+        return rdFingerprintGenerator.GetAtomPairGenerator(
+            fpSize=config.fp_size,
+            includeChirality=config.include_chirality,
+            countSimulation=config.count_simulation,
+        )
+    if config.fp_type == "torsion":
+        return rdFingerprintGenerator.GetTopologicalTorsionGenerator(
+            fpSize=config.fp_size,
+            includeChirality=config.include_chirality,
+            countSimulation=config.count_simulation,
+        )
+    raise ValueError(
+        f"Unsupported fingerprint type '{config.fp_type}'. "
+        f"Choose one of: {', '.join(FINGERPRINT_TYPES)}"
+    )
+
+
+def to_mol(mol):
+    """Parse a SMILES string, passing RDKit molecules through; None if it cannot be parsed."""
+    if isinstance(mol, str):
+        try:
+            return dm.to_mol(mol)
+        except Exception:
+            return None
+    return mol
+
+
+def generate(mol, config: FingerprintConfig = MORGAN):
+    """Generate one fingerprint as an RDKit ExplicitBitVect.
+
+    Args:
+        mol: RDKit molecule or SMILES string.
+        config (FingerprintConfig): Fingerprint settings. Defaults to the stored Morgan settings.
+
+    Raises:
+        ValueError: If the molecule cannot be parsed.
+    """
+    mol = to_mol(mol)
+    if mol is None:
+        raise ValueError("Molecule cannot be None.")
+    return get_generator(config).GetFingerprint(mol)
+
+
+def generate_batch(
+    mols: List, config: FingerprintConfig = MORGAN, packed: bool = False
+) -> Union[List[Optional[bytes]], np.ndarray]:
+    """Fingerprint many molecules with one cached generator.
+
+    Args:
+        mols (List): RDKit molecules or SMILES strings.
+        config (FingerprintConfig): Fingerprint settings. Defaults to the stored Morgan settings.
+        packed (bool): Return a (len(mols), fp_size // 64) uint64 matrix in the layout of
+            `fp_similarity` instead of a list of binary fingerprints.
+
+    Returns:
+        List[Optional[bytes]] | np.ndarray: Packed bytes per molecule (None for molecules
+        that cannot be parsed), or the packed matrix.
+
+    Raises:
+        ValueError: In packed mode, if a molecule cannot be parsed.
+    """
+    generator = get_generator(config)
+
+    if packed:
+        matrix = np.zeros((len(mols), config.fp_size // 8), dtype=np.uint8)
+        for i, mol in enumerate(mols):
+            mol = to_mol(mol)
+            if mol is None:
+                raise ValueError(f"Could not parse molecule at position {i}")
+            matrix[i] = np.frombuffer(
+                DataStructs.BitVectToBinaryText(generator.GetFingerprint(mol)),
+                dtype=np.uint8,
+            )
+        return matrix.view(np.uint64)
+
+    fps = []
+    for mol in mols:
+        mol = to_mol(mol)
+        fps.append(
+            DataStructs.BitVectToBinaryText(generator.GetFingerprint(mol))
+            if mol is not None
+            else None
+        )
+    return fps
@@ -1,9 +1,13 @@
-from typing import Union
+from typing import Any, Dict, List, Optional, Union
 from app.db.models.molecule import MolType
-import datamol as dm
+from rdkit import DataStructs
 from app.core.logging_config import logger
+from app.utils.molecules import fingerprints
+from app.utils.molecules.fingerprints import MORGAN, RDKIT
+from app.utils.molecules.fp_similarity import popcount
 
-def generate_morgan_fp(mol: Union[str, MolType], radius: int = 3) -> str:
+
+def generate_morgan_fp(mol: Union[str, MolType], radius: int = 3) -> bytes:
     """Generate Morgan fingerprints for a molecule.
     
     Args:
@@ -11,7 +15,8 @@ def generate_morgan_fp(mol: Union[str, MolType], radius: int = 3) -> str:
         radius (int): The radius of the Morgan fingerprint. Default is 3.
     
     Returns:
-        str: The Morgan fingerprint as a bitstring.
+        bytes: The packed Morgan fingerprint (256 bytes for 2048 bits), as taken by
+            the cartridge's bfp_from_binary_text().
     
     Raises:
         ValueError: If there is an issue generating the fingerprint.
@@ -20,23 +25,22 @@ def generate_morgan_fp(mol: Union[str, MolType], radius: int = 3) -> str:
         raise ValueError("Molecule cannot be None.")
     
     try:
-        logger.debug(f"Generating Morgan fingerprint with radius={radius}")
-        # Generate Morgan fingerprint with datamol
-        morgan_fp = dm.to_fp(mol, as_array=False, radius=radius, includeChirality=True)
-        return morgan_fp.ToBitString()
+        morgan_fp = fingerprints.generate(mol, MORGAN._replace(radius=radius))
+        return DataStructs.BitVectToBinaryText(morgan_fp)
     except Exception as e:
         logger.error(f"Error generating Morgan fingerprint: {e}")
         raise ValueError(f"Error generating Morgan fingerprint: {e}")
 
 
-def generate_rdkit_fp(mol: Union[str, MolType]) -> str:
+def generate_rdkit_fp(mol: Union[str, MolType]) -> bytes:
     """Generate RDKit fingerprints for a molecule.
     
     Args:
         mol (MolType): The molecule object to generate the fingerprint for.
     
     Returns:
-        str: The RDKit fingerprint as a bitstring.
+        bytes: The packed RDKit fingerprint, as taken by the cartridge's
+            bfp_from_binary_text().
     
     Raises:
         ValueError: If there is an issue generating the fingerprint.
@@ -45,10 +49,80 @@ def generate_rdkit_fp(mol: Union[str, MolType]) -> str:
         raise ValueError("Molecule cannot be None.")
     
     try:
-        logger.debug("Generating RDKit fingerprint")
-        # Generate RDKit fingerprint with datamol
-        rdkit_fp = dm.to_fp(mol, as_array=False, fp_type="rdkit")
-        return rdkit_fp.ToBitString()
+        rdkit_fp = fingerprints.generate(mol, RDKIT)
+        return DataStructs.BitVectToBinaryText(rdkit_fp)
     except Exception as e:
         logger.error(f"Error generating RDKit fingerprint: {e}")
         raise ValueError(f"Error generating RDKit fingerprint: {e}")
+
+
+def generate_fingerprints_batch(smiles_list: List[str]) -> List[Optional[Dict[str, bytes]]]:
+    """Generate packed Morgan and RDKit fingerprints for a list of SMILES.
+
+    Each molecule is parsed once and both fingerprints come from cached generators.
+    Their popcounts are returned too, for popcount-bounded searches. Unparsable entries
+    get None.
+    """
+    return _column_fingerprints([fingerprints.to_mol(smiles) for smiles in smiles_list])
+
+
+def generate_registration_fingerprints_batch(
+    smiles_list: List[str],
+) -> List[Optional[Dict[str, Any]]]:
+    """Generate every stored fingerprint of new molecules from one parse each.
+
+    The entries are those of `generate_fingerprints_batch` plus 'side_table', which maps
+    each side-table fingerprint name to its {'fp', 'popcount'}. Unparsable entries get
+    None.
+    """
+    mols = [fingerprints.to_mol(smiles) for smiles in smiles_list]
+    results = _column_fingerprints(mols)
+    for mol, result in zip(mols, results):
+        if result is not None:
+            result["side_table"] = generate_side_table_fingerprints(mol)
+    return results
+
+
+def generate_side_table_fingerprints(mol: Union[str, MolType]) -> Dict[str, Dict[str, Any]]:
+    """Generate every side-table fingerprint of a molecule, as {'fp', 'popcount'} by name.
+
+    Raises:
+        ValueError: If the molecule cannot be parsed.
+    """
+    mol = fingerprints.to_mol(mol)
+    side_table_fps = {}
+    for name in fingerprints.side_table_fingerprints():
+        fp = DataStructs.BitVectToBinaryText(
+            fingerprints.generate(mol, fingerprints.get_config(name))
+        )
+        side_table_fps[name] = {"fp": fp, "popcount": popcount(fp)}
+    return side_table_fps
+
+
+def _column_fingerprints(mols: List) -> List[Optional[Dict[str, bytes]]]:
+    morgan_fps = fingerprints.generate_batch(mols, MORGAN)
+    rdkit_fps = fingerprints.generate_batch(mols, RDKIT)
+    return [
+        {
+            "morgan_fp": morgan_fp,
+            "rdkit_fp": rdkit_fp,
+            "morgan_popcount": popcount(morgan_fp),
+            "rdkit_popcount": popcount(rdkit_fp),
+        }
+        if mol is not None
+        else None
+        for mol, morgan_fp, rdkit_fp in zip(mols, morgan_fps, rdkit_fps)
+    ]
+
+
+def generate_named_fingerprints_batch(
+    name: str, smiles_list: List[str]
+) -> List[Optional[Dict[str, bytes]]]:
+    """Generate a registered fingerprint for a list of SMILES, as {'fp', 'popcount'} per entry.
+
+    Unparsable entries get None.
+    """
+    fps = fingerprints.generate_batch(smiles_list, fingerprints.get_config(name))
+    return [
+        {"fp": fp, "popcount": popcount(fp)} if fp is not None else None for fp in fps
+    ]
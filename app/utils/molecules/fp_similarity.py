@@ -0,0 +1,163 @@
+import math
+from typing import List, Optional, Tuple
+import numpy as np
+
+# Fingerprints are held as packed rows of uint64 words. Bytes follow RDKit's
+# binary text layout (LSB first), so rows from fingerprints.generate_batch() and rows
+# read back from the cartridge with bfp_to_binary_text() can be compared with each other.
+FP_SIZE = 2048
+
+
+def unpack_stored_fingerprints(raw_fps: List[bytes], fp_size: int = FP_SIZE) -> np.ndarray:
+    """Build a packed matrix from fingerprints read with the cartridge's bfp_to_binary_text().
+
+    Rows written as raw binary are used as is. Rows registered as '0'/'1' bitstrings
+    (one byte per bit) are repacked to the same layout.
+
+    Args:
+        raw_fps (List[bytes]): Stored fingerprint bytes, one entry per molecule.
+        fp_size (int): The number of bits in the fingerprint. Default is 2048.
+
+    Returns:
+        np.ndarray: A (len(raw_fps), fp_size // 64) uint64 matrix.
+
+    Raises:
+        ValueError: If a stored fingerprint has an unexpected length.
+    """
+    packed = np.zeros((len(raw_fps), fp_size // 8), dtype=np.uint8)
+    for i, raw in enumerate(raw_fps):
+        raw = bytes(raw)
+        if len(raw) == fp_size // 8:
+            packed[i] = np.frombuffer(raw, dtype=np.uint8)
+        elif len(raw) == fp_size:
+            bits = np.frombuffer(raw, dtype=np.uint8) == ord("1")
+            packed[i] = np.packbits(bits, bitorder="little")
+        else:
+            raise ValueError(
+                f"Unexpected stored fingerprint length {len(raw)} for {fp_size} bits"
+            )
+    return packed.view(np.uint64)
+
+
+# Similarity metrics supported by similarity search
+SIMILARITY_METRICS = ["tanimoto", "dice", "tversky"]
+
+
+def validate_metric(metric: str, alpha: float = 1.0, beta: float = 1.0):
+    """Check a similarity metric and, for Tversky, its weights.
+
+    Raises:
+        ValueError: If the metric is unknown or a Tversky weight is negative.
+    """
+    if metric not in SIMILARITY_METRICS:
+        raise ValueError(
+            f"Unknown similarity metric '{metric}'. "
+            f"Choose one of: {', '.join(SIMILARITY_METRICS)}"
+        )
+    if metric == "tversky" and (alpha < 0 or beta < 0 or alpha + beta == 0):
+        raise ValueError("Tversky weights must be non-negative and not both zero.")
+
+
+def popcount(fp: bytes) -> int:
+    """Return the number of set bits of one packed binary fingerprint."""
+    return int.from_bytes(fp, "little").bit_count()
+
+
+def tversky_popcount_bounds(
+    query_count: int, threshold: float, alpha: float, beta: float
+) -> Tuple[int, Optional[int]]:
+    """Range of target popcounts that can reach a Tversky threshold.
+
+    With c common bits, a target bits and b query bits, the score
+    c / (alpha * (a - c) + beta * (b - c) + c) is at most its value at c = min(a, b),
+    which bounds a from below through beta and from above through alpha.
+
+    Returns:
+        Tuple[int, Optional[int]]: The lowest and highest popcount; the upper bound is
+        None when alpha is 0, since extra target bits then cost nothing.
+    """
+    if threshold <= 0:
+        return 0, None
+    # With beta = 0 missing query bits cost nothing, so there is no lower bound (and at
+    # threshold 1 the expression below would divide by zero)
+    low = 0
+    if beta > 0:
+        low = math.ceil(
+            threshold * beta * query_count / (1 - threshold + threshold * beta) - 1e-9
+        )
+    high = None
+    if alpha > 0:
+        high = math.floor(
+            query_count * (1 - threshold + threshold * alpha) / (threshold * alpha) + 1e-9
+        )
+    return max(low, 0), high
+
+
+def popcounts(fps: np.ndarray) -> np.ndarray:
+    """Return the number of set bits of every row of a packed fingerprint matrix."""
+    return np.bitwise_count(fps).sum(axis=1, dtype=np.int32)
+
+
+def tanimoto_to_many(
+    query: np.ndarray,
+    fps: np.ndarray,
+    query_count: Optional[int] = None,
+    counts: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Tanimoto similarity of one packed fingerprint against every row of a matrix.
+
+    Args:
+        query (np.ndarray): A single packed fingerprint row.
+        fps (np.ndarray): A packed fingerprint matrix.
+        query_count (int, optional): Precomputed popcount of the query.
+        counts (np.ndarray, optional): Precomputed popcounts of the matrix rows.
+
+    Returns:
+        np.ndarray: float32 similarities, one per row of `fps`.
+    """
+    if query_count is None:
+        query_count = int(np.bitwise_count(query).sum())
+    if counts is None:
+        counts = popcounts(fps)
+    common = np.bitwise_count(fps & query).sum(axis=1, dtype=np.int32)
+    union = counts + query_count - common
+    return np.divide(
+        common, union, out=np.zeros(len(fps), dtype=np.float32), where=union > 0
+    )
+
+
+def tanimoto_block(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    row_counts: Optional[np.ndarray] = None,
+    col_counts: Optional[np.ndarray] = None,
+    tile_size: int = 4096,
+) -> np.ndarray:
+    """Tanimoto similarity matrix between two packed fingerprint matrices.
+
+    The columns are processed in tiles so the intermediate AND/popcount buffer stays
+    at roughly len(rows) * tile_size * words bytes regardless of the matrix sizes.
+
+    Returns:
+        np.ndarray: A (len(rows), len(cols)) float32 matrix.
+    """
+    if row_counts is None:
+        row_counts = popcounts(rows)
+    if col_counts is None:
+        col_counts = popcounts(cols)
+
+    result = np.empty((len(rows), len(cols)), dtype=np.float32)
+    for start in range(0, len(cols), tile_size):
+        tile = cols[start : start + tile_size]
+        common = np.bitwise_count(rows[:, None, :] & tile[None, :, :]).sum(
+            axis=2, dtype=np.int32
+        )
+        union = row_counts[:, None] + col_counts[None, start : start + len(tile)] - common
+        np.divide(
+            common,
+            union,
+            out=result[:, start : start + len(tile)],
+            where=union > 0,
+        )
+        result[:, start : start + len(tile)][union == 0] = 0.0
+    return result
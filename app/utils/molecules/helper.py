@@ -1,8 +1,33 @@
+import re
 import datamol as dm
 from chembl_structure_pipeline import standardizer
+from app.utils.molecules.standardization_cache import standardization_cache
+
+INCHIKEY_PATTERN = re.compile(r"^[A-Z]{14}-[A-Z]{10}-[A-Z]$")
 
 
 def standardize_smiles(smiles: str) -> str:
+    """Standardize a SMILES string, serving repeated inputs from the standardization cache.
+
+    Args:
+        smiles (str): The SMILES string to be standardized.
+
+    Returns:
+        str: The standardized canonical SMILES string.
+
+    Raises:
+        ValueError: If the SMILES cannot be converted to a molecule.
+    """
+    cached = standardization_cache.get("smiles", smiles)
+    if cached is not None:
+        return cached
+
+    standardized_smiles_canonical = _standardize_smiles(smiles)
+    standardization_cache.put("smiles", smiles, standardized_smiles_canonical)
+    return standardized_smiles_canonical
+
+
+def _standardize_smiles(smiles: str) -> str:
     """Standardize a SMILES string.
 
     Args:
@@ -29,3 +54,33 @@ def standardize_smiles(smiles: str) -> str:
     standardized_smiles_canonical = dm.to_smiles(standardized_molecule)
 
     return standardized_smiles_canonical
+
+
+def normalize_synonym(name: str) -> str:
+    """Normalize a molecule name or synonym for indexed lookups.
+
+    Args:
+        name (str): The name to normalize.
+
+    Returns:
+        str: The name lower-cased, with surrounding and repeated whitespace removed.
+    """
+    return " ".join(name.split()).lower()
+
+
+def normalize_inchikey(inchi_key: str) -> str:
+    """Normalize and validate a standard InChIKey.
+
+    Args:
+        inchi_key (str): The InChIKey to validate.
+
+    Returns:
+        str: The upper-cased, stripped InChIKey.
+
+    Raises:
+        ValueError: If the value is not a 27-character standard InChIKey.
+    """
+    key = inchi_key.strip().upper()
+    if not INCHIKEY_PATTERN.match(key):
+        raise ValueError(f"Invalid InChIKey: {inchi_key}")
+    return key
@@ -0,0 +1,212 @@
+import threading
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+import numpy as np
+from app.utils.molecules.fp_similarity import FP_SIZE
+
+# MinHash values per band. Four uint16 values pack into one uint64 band key.
+ROWS_PER_BAND = 4
+
+# Appended entries are merged into the sorted bands once this many have accumulated
+MERGE_THRESHOLD = 20000
+
+_EMPTY_RANK = np.iinfo(np.uint16).max
+
+
+@lru_cache(maxsize=8)
+def _permutation_ranks(n_hashes: int, fp_size: int, seed: int) -> np.ndarray:
+    """Rank of every bit under each MinHash permutation, as a (n_hashes, fp_size) matrix."""
+    rng = np.random.default_rng(seed)
+    return np.stack([rng.permutation(fp_size) for _ in range(n_hashes)]).astype(
+        np.uint16
+    )
+
+
+def band_keys(
+    fps: np.ndarray, n_bands: int, fp_size: int = FP_SIZE, seed: int = 0
+) -> np.ndarray:
+    """MinHash band keys of packed fingerprints.
+
+    The MinHash of a fingerprint under a permutation is the lowest rank of its set
+    bits; two fingerprints agree on it with probability equal to their Tanimoto
+    similarity. Each band concatenates ROWS_PER_BAND MinHashes into one uint64 key, so
+    molecules sharing any band key are candidate neighbours.
+
+    Args:
+        fps (np.ndarray): A (n, fp_size // 64) packed uint64 fingerprint matrix.
+        n_bands (int): Number of bands.
+        fp_size (int): The number of bits in the fingerprint. Default is 2048.
+        seed (int): Seed of the permutations; keys are only comparable for equal seeds.
+
+    Returns:
+        np.ndarray: A (n, n_bands) uint64 matrix of band keys.
+    """
+    ranks = _permutation_ranks(n_bands * ROWS_PER_BAND, fp_size, seed)
+    bits = np.unpackbits(
+        np.ascontiguousarray(fps).view(np.uint8), axis=1, bitorder="little"
+    ).astype(bool)
+
+    # Fingerprints are sparse, so gathering the ranks of the set bits of each row is
+    # much cheaper than masking the full (hashes, bits) matrix
+    signatures = np.full((len(bits), ranks.shape[0]), _EMPTY_RANK, dtype=np.uint16)
+    for i, row in enumerate(bits):
+        on_bits = np.flatnonzero(row)
+        if len(on_bits):
+            signatures[i] = ranks[:, on_bits].min(axis=1)
+    return signatures.view(np.uint64).reshape(len(bits), n_bands)
+
+
+class MinHashLSH:
+    """
+    Banded MinHash LSH index mapping molecule IDs to fingerprint band keys.
+
+    Every band keeps its keys sorted with the matching rows, so a query is one binary
+    search per band. New entries go to an unsorted tail that is scanned linearly and
+    merged into the sorted bands once it grows past MERGE_THRESHOLD. Removed molecules
+    are filtered at query time and dropped when the index is saved.
+    """
+
+    def __init__(self, n_bands: int = 16, fp_size: int = FP_SIZE, seed: int = 0):
+        self.n_bands = n_bands
+        self.fp_size = fp_size
+        self.seed = seed
+        self._ids = np.empty(0, dtype="S16")
+        self._keys = np.empty((0, n_bands), dtype=np.uint64)
+        # Per band: rows of the sorted part ordered by key, and the keys in that order
+        self._order = np.empty((n_bands, 0), dtype=np.int64)
+        self._sorted_keys = np.empty((n_bands, 0), dtype=np.uint64)
+        self._tail_ids: List[bytes] = []
+        self._tail_keys: List[np.ndarray] = []
+        self._removed = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids) + len(self._tail_ids) - len(self._removed)
+
+    def load(self, ids: np.ndarray, keys: np.ndarray):
+        """Replace the index content with IDs (S16 array) and their band keys."""
+        order = np.argsort(keys, axis=0, kind="stable").T
+        sorted_keys = np.take_along_axis(keys.T, order, axis=1)
+        with self._lock:
+            self._ids, self._keys = ids, keys
+            self._order, self._sorted_keys = order, sorted_keys
+            self._tail_ids, self._tail_keys = [], []
+            self._removed = set()
+
+    def add(self, molecule_ids: Iterable[UUID], keys: np.ndarray):
+        """Append molecules with their precomputed band keys."""
+        with self._lock:
+            for molecule_id, row in zip(molecule_ids, keys):
+                self._tail_ids.append(molecule_id.bytes)
+                self._tail_keys.append(row)
+                self._removed.discard(molecule_id.bytes)
+            merge = len(self._tail_ids) >= MERGE_THRESHOLD
+        if merge:
+            self.merge()
+
+    def add_fingerprints(self, molecule_ids: List[UUID], fps: np.ndarray):
+        """Append molecules from packed fingerprints, computing their band keys here."""
+        self.add(molecule_ids, band_keys(fps, self.n_bands, self.fp_size, self.seed))
+
+    def remove(self, molecule_id: UUID):
+        with self._lock:
+            self._removed.add(molecule_id.bytes)
+
+    def merge(self):
+        """Fold the unsorted tail into the sorted bands."""
+        ids, keys = self.snapshot()
+        self.load(ids, keys)
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Current IDs and band keys, without removed molecules."""
+        with self._lock:
+            ids = np.concatenate([self._ids, np.array(self._tail_ids, dtype="S16")])
+            keys = np.concatenate(
+                [
+                    self._keys,
+                    np.array(self._tail_keys, dtype=np.uint64).reshape(-1, self.n_bands),
+                ]
+            )
+            removed = self._removed.copy()
+        if removed:
+            keep = ~np.isin(ids, np.array(list(removed), dtype="S16"))
+            ids, keys = ids[keep], keys[keep]
+        return ids, keys
+
+    def query(self, fp: np.ndarray, max_candidates: Optional[int] = None) -> List[UUID]:
+        """
+        Return the IDs sharing at least one band key with a packed fingerprint.
+
+        Candidates matching more bands (more likely to be similar) come first; at most
+        `max_candidates` are returned.
+        """
+        query_keys = band_keys(fp.reshape(1, -1), self.n_bands, self.fp_size, self.seed)[0]
+
+        with self._lock:
+            rows = []
+            for band in range(self.n_bands):
+                sorted_keys = self._sorted_keys[band]
+                low = np.searchsorted(sorted_keys, query_keys[band], side="left")
+                high = np.searchsorted(sorted_keys, query_keys[band], side="right")
+                rows.append(self._order[band, low:high])
+            hits = self._ids[np.concatenate(rows)] if rows else self._ids[:0]
+
+            if self._tail_ids:
+                tail_keys = np.array(self._tail_keys, dtype=np.uint64)
+                tail_ids = np.array(self._tail_ids, dtype="S16")
+                matches = tail_keys == query_keys[None, :]
+                hits = np.concatenate(
+                    [hits, np.repeat(tail_ids, matches.sum(axis=1))]
+                )
+            removed = self._removed.copy()
+
+        if not len(hits):
+            return []
+        candidates, counts = np.unique(hits, return_counts=True)
+        ranked = candidates[np.argsort(-counts, kind="stable")]
+        if removed:
+            ranked = ranked[~np.isin(ranked, np.array(list(removed), dtype="S16"))]
+        if max_candidates is not None:
+            ranked = ranked[:max_candidates]
+        # numpy drops trailing NUL bytes of fixed-width byte strings; restore them
+        return [UUID(bytes=bytes(molecule_id).ljust(16, b"\0")) for molecule_id in ranked]
+
+    def save(self, file, **metadata):
+        """Write the index (without removed molecules) and extra metadata in .npz format.
+
+        `file` is a path or a binary file object.
+        """
+        ids, keys = self.snapshot()
+        np.savez(
+            file,
+            ids=ids,
+            keys=keys,
+            n_bands=self.n_bands,
+            fp_size=self.fp_size,
+            seed=self.seed,
+            **metadata,
+        )
+
+    def read(self, path: str) -> dict:
+        """
+        Load an index saved with `save`, returning its extra metadata.
+
+        Raises:
+            ValueError: If the file was written with other LSH parameters.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            params = (int(data["n_bands"]), int(data["fp_size"]), int(data["seed"]))
+            if params != (self.n_bands, self.fp_size, self.seed):
+                raise ValueError(
+                    f"LSH index at {path} uses bands/size/seed {params}, "
+                    f"expected {(self.n_bands, self.fp_size, self.seed)}"
+                )
+            ids, keys = data["ids"], data["keys"]
+            metadata = {
+                name: data[name].item()
+                for name in data.files
+                if name not in ("ids", "keys", "n_bands", "fp_size", "seed")
+            }
+        self.load(ids, keys)
+        return metadata
@@ -0,0 +1,87 @@
+import math
+from typing import List, Tuple
+import numpy as np
+from app.utils.molecules.fp_similarity import popcounts, tanimoto_block
+
+# Fingerprint rows compared per block. With the column tiles below the AND/popcount
+# buffer of a block stays around ROW_BLOCK_SIZE * COL_TILE_SIZE * 256 bytes (64 MB).
+ROW_BLOCK_SIZE = 256
+COL_TILE_SIZE = 1024
+
+
+def popcount_blocks(
+    counts: np.ndarray, threshold: float, block_size: int = ROW_BLOCK_SIZE
+) -> List[Tuple[int, int, int]]:
+    """Split fingerprints sorted by popcount into blocks of candidate pairs.
+
+    Tanimoto(a, b) <= min(|a|, |b|) / max(|a|, |b|), so a fingerprint can only reach
+    `threshold` against fingerprints with at most |a| / threshold bits set. Each block of
+    rows is compared with the rows from its own start up to the last one within that
+    popcount band, which covers every pair exactly once.
+
+    Args:
+        counts (np.ndarray): Popcounts of the fingerprints, sorted ascending and non-zero.
+        threshold (float): The Tanimoto cutoff, between 0 and 1.
+        block_size (int): Rows per block.
+
+    Returns:
+        List[Tuple[int, int, int]]: (row_start, row_stop, col_stop) per block, where the
+        block columns are rows row_start to col_stop.
+    """
+    blocks = []
+    for row_start in range(0, len(counts), block_size):
+        row_stop = min(row_start + block_size, len(counts))
+        max_count = math.floor(int(counts[row_stop - 1]) / threshold + 1e-9)
+        col_stop = int(np.searchsorted(counts, max_count, side="right"))
+        blocks.append((row_start, row_stop, col_stop))
+    return blocks
+
+
+def near_duplicate_pairs(
+    path: str,
+    n_fps: int,
+    n_words: int,
+    row_start: int,
+    row_stop: int,
+    col_stop: int,
+    threshold: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pairs at or above a Tanimoto cutoff within one block, for a pool worker.
+
+    The packed fingerprint matrix is memory-mapped from a file written by the caller,
+    so blocks are dispatched without pickling their fingerprints and all workers share
+    the same pages.
+
+    Args:
+        path (str): File holding the matrix as raw uint64 words.
+        n_fps (int): Rows of the matrix.
+        n_words (int): uint64 words per fingerprint.
+        row_start, row_stop, col_stop (int): The block, as returned by `popcount_blocks`.
+        threshold (float): The Tanimoto cutoff.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Row indices i < j of the pairs and
+        their similarities.
+    """
+    fps = np.memmap(path, dtype=np.uint64, mode="r", shape=(n_fps, n_words))
+    rows = np.asarray(fps[row_start:row_stop])
+    row_counts = popcounts(rows)
+    pairs_i, pairs_j, similarities = [], [], []
+
+    # Threshold tile by tile so a wide popcount band never materializes its full matrix
+    for col_start in range(row_start, col_stop, COL_TILE_SIZE):
+        cols = np.asarray(fps[col_start : min(col_start + COL_TILE_SIZE, col_stop)])
+        sims = tanimoto_block(rows, cols, row_counts=row_counts, tile_size=COL_TILE_SIZE)
+        i, j = np.nonzero(sims >= threshold)
+        i, j = i + row_start, j + col_start
+        # Keep each pair once and skip the diagonal
+        upper = j > i
+        pairs_i.append(i[upper])
+        pairs_j.append(j[upper])
+        similarities.append(sims[i[upper] - row_start, j[upper] - col_start])
+    del fps
+
+    if not pairs_i:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.float32)
+    return np.concatenate(pairs_i), np.concatenate(pairs_j), np.concatenate(similarities)
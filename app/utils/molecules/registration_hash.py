@@ -0,0 +1,73 @@
+from typing import Dict, List, Optional
+import datamol as dm
+from rdkit.Chem import RegistrationHash
+from rdkit.Chem.RegistrationHash import HashScheme
+
+# Dedup levels and the molecule column holding the key compared at each level.
+# Each level is looser than the previous one:
+#   exact        - standardized canonical SMILES
+#   stereo       - same structure ignoring stereochemistry
+#   tautomer     - same structure ignoring stereochemistry and tautomerism
+#   connectivity - same heavy-atom skeleton (InChIKey first block); also ignores
+#                  isotopes and charges/protonation
+DEDUP_COLUMNS = {
+    "exact": "smiles_canonical",
+    "stereo": "hash_no_stereo",
+    "tautomer": "hash_tautomer",
+    "connectivity": "hash_connectivity",
+}
+DEDUP_LEVELS = list(DEDUP_COLUMNS)
+
+
+def dedup_column(level: str) -> str:
+    """Return the molecule column compared for a dedup level.
+
+    Raises:
+        ValueError: If the level is unknown.
+    """
+    if level not in DEDUP_COLUMNS:
+        raise ValueError(
+            f"Unknown dedup level '{level}'. Choose one of: {', '.join(DEDUP_LEVELS)}"
+        )
+    return DEDUP_COLUMNS[level]
+
+
+def compute_registration_hashes(mol) -> Dict[str, Optional[str]]:
+    """Compute the registration hash layers used for stereo/tautomer-insensitive dedup.
+
+    Args:
+        mol: The standardized RDKit molecule (or SMILES).
+
+    Returns:
+        Dict[str, Optional[str]]: 'hash_no_stereo', 'hash_tautomer' and 'hash_connectivity'.
+
+    Raises:
+        ValueError: If the molecule cannot be parsed.
+    """
+    mol = dm.to_mol(mol) if isinstance(mol, str) else mol
+    if mol is None:
+        raise ValueError("Molecule cannot be None.")
+
+    layers = RegistrationHash.GetMolLayers(mol)
+    inchi_key = dm.to_inchikey(mol)
+
+    return {
+        "hash_no_stereo": RegistrationHash.GetMolHash(
+            layers, hash_scheme=HashScheme.STEREO_INSENSITIVE_LAYERS
+        ),
+        "hash_tautomer": RegistrationHash.GetMolHash(
+            layers, hash_scheme=HashScheme.TAUTOMER_INSENSITIVE_LAYERS
+        ),
+        "hash_connectivity": inchi_key.split("-")[0] if inchi_key else None,
+    }
+
+
+def compute_registration_hashes_batch(smiles_list: List[str]) -> List[Optional[Dict[str, Optional[str]]]]:
+    """Compute registration hashes for a list of SMILES; unparsable entries get None."""
+    results = []
+    for smiles in smiles_list:
+        try:
+            results.append(compute_registration_hashes(smiles))
+        except Exception:
+            results.append(None)
+    return results
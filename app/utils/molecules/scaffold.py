@@ -0,0 +1,53 @@
+import hashlib
+from typing import Dict, List, Optional
+import datamol as dm
+from rdkit.Chem.Scaffolds import MurckoScaffold
+
+
+def compute_scaffolds(mol) -> Dict[str, Optional[str]]:
+    """Compute the Bemis-Murcko scaffolds of a molecule.
+
+    Args:
+        mol: The RDKit molecule (or SMILES) to compute the scaffolds for.
+
+    Returns:
+        Dict[str, Optional[str]]: 'murcko_scaffold', 'generic_murcko_scaffold' and
+        'murcko_scaffold_hash'. Acyclic molecules get an empty scaffold.
+
+    Raises:
+        ValueError: If the molecule cannot be parsed.
+    """
+    mol = dm.to_mol(mol) if isinstance(mol, str) else mol
+    if mol is None:
+        raise ValueError("Molecule cannot be None.")
+
+    scaffold = MurckoScaffold.GetScaffoldForMol(mol)
+    murcko_scaffold = dm.to_smiles(scaffold)
+    # Bemis-Murcko framework: all atoms carbon and all bonds single (benzene -> C1CCCCC1)
+    generic_scaffold = (
+        dm.to_smiles(MurckoScaffold.MakeScaffoldGeneric(scaffold))
+        if murcko_scaffold
+        else ""
+    )
+
+    return {
+        "murcko_scaffold": murcko_scaffold,
+        "generic_murcko_scaffold": generic_scaffold,
+        "murcko_scaffold_hash": scaffold_hash(murcko_scaffold),
+    }
+
+
+def scaffold_hash(scaffold_smiles: str) -> str:
+    """Short fixed-width key for a scaffold SMILES, used for indexed grouping."""
+    return hashlib.sha1(scaffold_smiles.encode("utf-8")).hexdigest()[:20]
+
+
+def compute_scaffolds_batch(smiles_list: List[str]) -> List[Optional[Dict[str, Optional[str]]]]:
+    """Compute scaffolds for a list of SMILES; unparsable entries get None."""
+    results = []
+    for smiles in smiles_list:
+        try:
+            results.append(compute_scaffolds(smiles))
+        except Exception:
+            results.append(None)
+    return results
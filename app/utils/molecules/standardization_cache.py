@@ -0,0 +1,162 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+# Bump when the standardization code itself changes in a way that alters results.
+# Together with the library versions it forms the pipeline version, so entries
+# written by another pipeline are never served and get purged at startup.
+PIPELINE_REVISION = 1
+
+
+def _package_version(name: str) -> str:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def pipeline_version() -> str:
+    """Short hash of the standardizer library versions and the pipeline revision."""
+    parts = [
+        _package_version("rdkit"),
+        _package_version("datamol"),
+        _package_version("chembl_structure_pipeline"),
+        str(PIPELINE_REVISION),
+    ]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+PIPELINE_VERSION = pipeline_version()
+
+
+def cache_key(kind: str, raw_input: str) -> str:
+    """Fixed-width key for a standardization input of the given kind."""
+    return hashlib.sha1(f"{kind}\x00{raw_input}".encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit/miss counters."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class StandardizationCache:
+    """
+    First cache level for standardization results: an in-process LRU.
+
+    Values are JSON-serializable (dicts or strings) so they can be written to the
+    persistent table as is. New results are queued for persistence only in the
+    process that enabled it, so pool workers (which inherit this module on fork)
+    just keep their own LRU.
+    """
+
+    def __init__(self, maxsize: int):
+        self.lru = LRUCache(maxsize)
+        self.persistent_hits = 0
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._owner_pid = None
+
+    def enable_persistence(self):
+        self._owner_pid = os.getpid()
+
+    @property
+    def persisting(self) -> bool:
+        return self._owner_pid == os.getpid()
+
+    def get(self, kind: str, raw_input: str) -> Optional[Any]:
+        return self.lru.get(cache_key(kind, raw_input))
+
+    def put(self, kind: str, raw_input: str, value: Any):
+        key = cache_key(kind, raw_input)
+        self.lru.put(key, value)
+        if self.persisting:
+            with self._pending_lock:
+                if len(self._pending) < settings.STANDARDIZATION_CACHE_MAX_PENDING:
+                    self._pending[key] = {"key": key, "kind": kind, "result": value}
+
+    def missing_keys(self, kind: str, raw_inputs: List[str]) -> List[str]:
+        """Keys of the inputs that are not in the LRU, for a bulk persistent lookup."""
+        return list(
+            {
+                key
+                for key in (cache_key(kind, raw) for raw in raw_inputs)
+                if key not in self.lru
+            }
+        )
+
+    def load(self, values: Dict[str, Any]):
+        """Fill the LRU with entries read from the persistent table."""
+        for key, value in values.items():
+            self.lru.put(key, value)
+        self.persistent_hits += len(values)
+
+    def take_pending(self) -> List[Dict[str, Any]]:
+        with self._pending_lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        return pending
+
+    @property
+    def pending_count(self) -> int:
+        with self._pending_lock:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.lru.hits + self.lru.misses
+        return {
+            "pipeline_version": PIPELINE_VERSION,
+            "size": len(self.lru),
+            "maxsize": self.lru.maxsize,
+            "hits": self.lru.hits,
+            "misses": self.lru.misses,
+            "hit_rate": self.lru.hits / lookups if lookups else 0.0,
+            "evictions": self.lru.evictions,
+            "persistent_hits": self.persistent_hits,
+            "pending_writes": self.pending_count,
+        }
+
+
+standardization_cache = StandardizationCache(settings.STANDARDIZATION_CACHE_SIZE)
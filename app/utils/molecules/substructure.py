@@ -0,0 +1,23 @@
+from rdkit import Chem
+
+# Query languages of substructure search. SMILES queries match as molecules (the
+# cartridge's mol_from_smiles), SMARTS queries as query molecules (qmol_from_smarts).
+SUBSTRUCTURE_MODES = ["smiles", "smarts"]
+
+
+def validate_substructure_query(query: str, mode: str = "smiles"):
+    """Check that a substructure query parses before it is sent to the database.
+
+    The cartridge returns NULL for unparsable input, which would silently match nothing.
+
+    Raises:
+        ValueError: If the mode is unknown or the query cannot be parsed.
+    """
+    if mode not in SUBSTRUCTURE_MODES:
+        raise ValueError(
+            f"Unknown substructure mode '{mode}'. "
+            f"Choose one of: {', '.join(SUBSTRUCTURE_MODES)}"
+        )
+    mol = Chem.MolFromSmiles(query) if mode == "smiles" else Chem.MolFromSmarts(query)
+    if mol is None or mol.GetNumAtoms() == 0:
+        raise ValueError(f"Invalid {mode.upper()} substructure query: {query}")
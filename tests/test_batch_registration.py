@@ -0,0 +1,72 @@
+import datetime
+import uuid
+from types import SimpleNamespace
+import pytest
+from app.db.models.molecule import Molecule
+from app.repositories.molecule import get_molecule_by_dedup_key
+from app.services.molecule import batch_registration
+from app.services.molecule.batch_registration import consolidate_duplicates
+
+
+def test_consolidate_duplicates_keeps_molecules_without_hash_apart():
+    molecules = [
+        Molecule(name="a", smiles_canonical="CCO", hash_tautomer="t1"),
+        Molecule(name="b", smiles_canonical="OCC", hash_tautomer="t1"),
+        Molecule(name="c", smiles_canonical="[X]", hash_tautomer=None),
+        Molecule(name="d", smiles_canonical="[Y]", hash_tautomer=None),
+        Molecule(name="e", smiles_canonical="[X]", hash_tautomer=None),
+    ]
+
+    consolidated = consolidate_duplicates(molecules, "tautomer")
+
+    assert [molecule.name for molecule in consolidated] == ["a", "c", "d"]
+    assert consolidated[0].synonyms == "a, b"
+    assert consolidated[1].synonyms == "c, e"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_existing_molecule_without_hashes_matches_on_smiles(monkeypatch):
+    # Registered before the hash layers existed, so its hash columns are NULL
+    existing = Molecule(
+        id=uuid.uuid4(),
+        name="ethanol",
+        smiles_canonical="CCO",
+        hash_tautomer=None,
+        _created_at=datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+    )
+
+    async def get_db():
+        yield None
+
+    async def get_molecules_by_dedup_keys(db, keys, dedup_level="exact"):
+        if dedup_level == "exact":
+            return {key: existing for key in keys if key == existing.smiles_canonical}
+        return {}
+
+    monkeypatch.setattr(batch_registration, "get_db", get_db)
+    monkeypatch.setattr(
+        batch_registration, "get_molecules_by_dedup_keys", get_molecules_by_dedup_keys
+    )
+
+    molecule = Molecule(name="ethanol", smiles_canonical="CCO", hash_tautomer="t1")
+    _, _, new_molecules = await batch_registration.filter_existing_molecules(
+        [molecule], "tautomer"
+    )
+
+    assert new_molecules == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_dedup_key_lookup_also_matches_smiles_at_looser_levels():
+    class Session:
+        async def execute(self, statement):
+            self.statement = statement
+            return SimpleNamespace(scalar=lambda: None)
+
+    db = Session()
+    await get_molecule_by_dedup_key(db, None, "tautomer", "CCO")
+    assert "molecules.smiles_canonical" in str(db.statement)
+
+    await get_molecule_by_dedup_key(db, "t1", "tautomer", "CCO")
+    assert "molecules.hash_tautomer" in str(db.statement)
+    assert "molecules.smiles_canonical" in str(db.statement)
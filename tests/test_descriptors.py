@@ -0,0 +1,39 @@
+import datamol as dm
+from app.schemas.molecule_dto import InputMoleculeDto
+from app.services.molecule.standardization import standardize
+from app.utils.molecules.descriptors import (
+    DESCRIPTOR_NAMES,
+    compute_descriptor_columns,
+    compute_descriptors,
+    compute_descriptors_batch,
+)
+
+ASPIRIN = "CC(=O)Oc1ccccc1C(=O)O"
+
+
+def test_compute_descriptors_full_profile():
+    values = compute_descriptors(dm.to_mol(ASPIRIN), "full")
+    assert set(values) == set(DESCRIPTOR_NAMES)
+    assert all(values[name] is not None for name in DESCRIPTOR_NAMES)
+    assert values["n_aromatic_rings"] == 1
+    assert values["n_aromatic_heterocycles"] == 0
+
+
+def test_compute_descriptors_core_profile_skips_expensive():
+    values = compute_descriptors(dm.to_mol(ASPIRIN), "core")
+    assert values["mw"] is not None
+    assert values["qed"] is None and values["sas"] is None
+
+
+def test_compute_descriptor_columns_marks_rows_valid():
+    columns = compute_descriptor_columns([ASPIRIN, "not a smiles"], "full")
+    assert columns["valid"].tolist() == [True, False]
+    assert compute_descriptors_batch([ASPIRIN], "core")[0]["ro5_compliant"] is True
+
+
+def test_standardize():
+    molecule = standardize(InputMoleculeDto(name="aspirin", smiles=ASPIRIN))
+    assert molecule.smiles_canonical == dm.to_smiles(dm.to_mol(ASPIRIN))
+    assert molecule.n_aromatic_rings == 1
+    assert molecule.qed is not None
+    assert molecule.ro5_compliant is True
@@ -0,0 +1,35 @@
+import datamol as dm
+import pytest
+from rdkit import DataStructs
+from app.utils.molecules import fingerprints
+
+SMILES = [
+    "CC(=O)Oc1ccccc1C(=O)O",
+    "CN1CCC[C@H]1c1cccnc1",
+    "O=C(O)C[C@@H](N)C(=O)O",
+    "c1ccc2[nH]ccc2c1",
+]
+
+
+@pytest.mark.parametrize("smiles", SMILES)
+def test_morgan_matches_datamol(smiles):
+    mol = dm.to_mol(smiles)
+    expected = dm.to_fp(mol, as_array=False, radius=3, includeChirality=True)
+    assert fingerprints.generate(mol, fingerprints.MORGAN) == expected
+
+
+@pytest.mark.parametrize("smiles", SMILES)
+def test_rdkit_matches_datamol(smiles):
+    mol = dm.to_mol(smiles)
+    expected = dm.to_fp(mol, as_array=False, fp_type="rdkit")
+    assert fingerprints.generate(mol, fingerprints.RDKIT) == expected
+
+
+def test_generate_batch_matches_single_fingerprints():
+    packed = fingerprints.generate_batch(SMILES, fingerprints.RDKIT)
+    assert packed == [
+        DataStructs.BitVectToBinaryText(
+            fingerprints.generate(smiles, fingerprints.RDKIT)
+        )
+        for smiles in SMILES
+    ]
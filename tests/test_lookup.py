@@ -0,0 +1,52 @@
+import uuid
+import pytest
+from app.db.models.molecule import Molecule
+from app.services.molecule import lookup
+from app.utils.molecules.standardization_cache import standardization_cache
+
+ETHANOL = "CCO"
+
+
+def _molecule(**values):
+    return Molecule(id=uuid.uuid4(), name="ethanol", smiles_canonical=ETHANOL, **values)
+
+
+async def _noop(*args, **kwargs):
+    return None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_lookup_by_smiles_returns_found_molecule(monkeypatch):
+    molecule = _molecule()
+
+    async def get_molecules_by_dedup_keys(db, keys, dedup_level="exact"):
+        return {ETHANOL: molecule}
+
+    # A cached standardization keeps the exact lookup off the process pool
+    standardization_cache.put("smiles", ETHANOL, ETHANOL)
+    monkeypatch.setattr(lookup, "prefetch_standardizations", _noop)
+    monkeypatch.setattr(lookup, "schedule_flush", lambda: None)
+    monkeypatch.setattr(lookup, "get_molecules_by_dedup_keys", get_molecules_by_dedup_keys)
+
+    results = await lookup.lookup_molecules_by_smiles(None, [ETHANOL])
+
+    assert results[0].found
+    assert results[0].molecule.id == molecule.id
+    assert results[0].molecule.smiles_canonical == ETHANOL
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_lookup_by_inchikey_returns_earliest_molecule(monkeypatch):
+    inchi_key = "LFQSCWFLJHTTHZ-UHFFFAOYSA-N"
+    earliest, later = _molecule(inchi_key=inchi_key), _molecule(inchi_key=inchi_key)
+
+    async def get_molecules_by_inchikeys(db, inchi_keys):
+        return {inchi_key: [earliest, later]}
+
+    monkeypatch.setattr(lookup, "get_molecules_by_inchikeys", get_molecules_by_inchikeys)
+
+    results = await lookup.lookup_molecules_by_inchikeys(None, [inchi_key, "invalid"])
+
+    assert results[0].found
+    assert results[0].molecule.id == earliest.id
+    assert not results[1].found and results[1].error